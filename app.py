@@ -82,6 +82,18 @@ def load_processed_data():
         st.error(f"Erro ao carregar dados da base: {str(e)}")
         return pd.DataFrame()
 
+def activity_profile(df, by):
+    """Registros por 'data' ou 'hora': dos rollups quando a base os mantém, senão agregados do df"""
+    if DatabaseManager.rollups_maintained():
+        try:
+            profile = DatabaseManager.get_activity_profile(by)
+            if not profile.empty:
+                return profile[[by, 'registros']]
+        except Exception as e:
+            print(f"Rollups indisponíveis, agregando o DataFrame: {str(e)}")
+    key = df['data'].dt.date if by == 'data' else df['data'].dt.hour
+    return df.groupby(key.rename(by)).size().rename('registros').reset_index()
+
 def main():
     # Header principal
     st.markdown('<h1 class="main-header">🚛 Insight Hub</h1>', unsafe_allow_html=True)
@@ -159,9 +171,8 @@ def main():
         # Gráfico de distribuição temporal
         st.markdown("### 📊 **Distribuição Temporal dos Dados**")
         
-        # Agrupar por data
-        daily_data = df.groupby(df['data'].dt.date).size().reset_index()
-        daily_data.columns = ['data', 'registros']
+        # Registros por data, dos rollups diários quando disponíveis
+        daily_data = activity_profile(df, 'data')
         
         fig = px.line(
             daily_data, 
@@ -210,9 +221,8 @@ def main():
         with col1:
             # Análise por horário
             if 'data' in df.columns:
-                df_temp = df.copy()
-                df_temp['hora'] = df_temp['data'].dt.hour
-                hourly_activity = df_temp.groupby('hora').size()
+                # Registros por hora do dia, dos rollups horários quando disponíveis
+                hourly_activity = activity_profile(df, 'hora').set_index('hora')['registros']
                 
                 fig_hourly = px.bar(
                     x=hourly_activity.index,
@@ -227,7 +237,7 @@ def main():
         
         with col2:
             # Top veículos por atividade
-            vehicle_activity = df.groupby('placa').size().sort_values(ascending=False).head(8)
+            vehicle_activity = df.groupby('placa', observed=True).size().sort_values(ascending=False).head(8)
             
             fig_vehicles = px.bar(
                 x=vehicle_activity.values,
@@ -275,9 +285,8 @@ def main():
         # Distribuição temporal melhorada
         st.markdown("### 📊 **Distribuição Temporal dos Dados**")
         
-        # Agrupar por data
-        daily_data = df.groupby(df['data'].dt.date).size().reset_index()
-        daily_data.columns = ['data', 'registros']
+        # Registros por data, dos rollups diários quando disponíveis
+        daily_data = activity_profile(df, 'data')
         
         fig = px.line(
             daily_data, 
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark of the per-query overhead of opening a FleetDatabaseService.
+
+"before" replays what every service call used to do around its real query:
+a fresh connection running SELECT 1 in initialize_database(), a second
+initialize_database() from get_db_session() and a SELECT 1 on the new session.
+"after" is the current path, where the pooled connection is only pre-pinged on
+checkout. Both run the same trivial query so the difference is pure overhead.
+Requires DATABASE_URL pointing at a reachable database.
+"""
+import sys
+import time
+from sqlalchemy import event, func, select, text
+sys.path.append('.')
+
+from database import connection
+from database.models import Client
+from database.services import FleetDatabaseService
+
+ITERATIONS = 500
+
+class StatementCounter:
+    """Counts statements sent through SQLAlchemy (pre-pings go straight to the driver)"""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+def legacy_query(engine):
+    """One logical query with the removed health checks"""
+    for _ in range(2):  # FleetDatabaseService.__enter__ and get_db_session
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    session = connection.SessionLocal()
+    try:
+        session.execute(text("SELECT 1"))
+        return session.execute(select(func.count()).select_from(Client)).scalar()
+    finally:
+        session.close()
+
+def current_query(engine):
+    """One logical query through FleetDatabaseService as it is now"""
+    with FleetDatabaseService() as db:
+        return db.session.execute(select(func.count()).select_from(Client)).scalar()
+
+def run(name, query, engine, counter):
+    query(engine)  # warm the pool
+    counter.count = 0
+    connection.PoolMetrics.reset()
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        query(engine)
+    elapsed = time.perf_counter() - started
+    checkouts = connection.PoolMetrics.snapshot()['checkouts']
+    print(f"   {name:<7} {elapsed / ITERATIONS * 1000:8.3f} ms/query   "
+          f"{counter.count / ITERATIONS:4.1f} statements/query   "
+          f"{checkouts / ITERATIONS:4.1f} pool checkouts/query")
+    return elapsed
+
+def main():
+    if not connection.initialize_database():
+        print("❌ Could not connect: set DATABASE_URL")
+        return 1
+    engine = connection.engine
+    counter = StatementCounter(engine)
+
+    print(f"⏱️ {ITERATIONS} queries each")
+    before = run('before', legacy_query, engine, counter)
+    after = run('after', current_query, engine, counter)
+    print(f"\n🚀 Overhead removed: {(before - after) / ITERATIONS * 1000:.3f} ms/query "
+          f"({before / after:.1f}x faster)")
+
+    print("\n📊 Pool metrics (after run)")
+    for name, value in connection.pool_metrics().items():
+        print(f"   {name}: {value}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
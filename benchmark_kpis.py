@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark of DataAnalyzer.get_kpis on in-memory frames of 1M and 10M rows.
+
+"before" replays the previous KPI code (nunique on the plate column and the
+date span taken from Timestamp min/max); "after" is the current single-pass
+engine. The frames use the compact dtypes of FleetDatabaseService, like the
+ones loaded from the database, and both versions must return identical KPIs.
+No database is needed.
+"""
+import sys
+import time
+import numpy as np
+import pandas as pd
+sys.path.append('.')
+
+from database.services import FleetDatabaseService
+from utils.data_analyzer import DataAnalyzer
+
+SIZES = [1_000_000, 10_000_000]
+VEHICLES = 2_000
+REPEATS = 5
+
+def synthetic_frame(rows, seed=42):
+    """Telemetry-shaped frame with the dtypes returned by get_telematics_dataframe"""
+    rng = np.random.default_rng(seed)
+    plates = np.array([f"ABC{n:04d}" for n in range(VEHICLES)])
+    start = np.datetime64('2025-08-01T00:00:00', 'ns')
+    frame = pd.DataFrame({
+        'cliente': rng.choice(['Cliente A', 'Cliente B', 'Cliente C'], rows),
+        'placa': plates[rng.integers(0, VEHICLES, rows)],
+        'data': start + rng.integers(0, 31 * 86_400, rows).astype('timedelta64[s]'),
+        'velocidade_km': rng.uniform(0, 120, rows),
+        'odometro_periodo_km': rng.uniform(0, 2, rows),
+        'engine_hours_period': rng.integers(0, 120, rows).astype(float),
+        'gps': rng.integers(0, 2, rows),
+        'bloqueado': (rng.random(rows) < 0.01).astype(int),
+    })
+    dtypes = FleetDatabaseService.TELEMATICS_FRAME_DTYPES
+    return frame.astype({column: dtypes[column] for column in frame.columns if column in dtypes})
+
+def legacy_kpis(df):
+    """get_kpis as it was before the single-pass engine"""
+    return {
+        'total_veiculos': int(df['placa'].nunique()),
+        'total_registros': int(len(df)),
+        'velocidade_media': float(df['velocidade_km'].mean()),
+        'velocidade_maxima': float(df['velocidade_km'].max()),
+        'distancia_total': float(df['odometro_periodo_km'].sum()),
+        'tempo_ativo_horas': float(df['engine_hours_period'].sum() / 3600.0),
+        'cobertura_gps': float((df['gps'].sum() / len(df)) * 100),
+        'veiculos_bloqueados': int(df['bloqueado'].sum()),
+        'periodo_dias': int((df['data'].max() - df['data'].min()).days + 1) if len(df) > 0 else 0
+    }
+
+def best_of(function):
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+def main():
+    status = 0
+    for rows in SIZES:
+        df = synthetic_frame(rows)
+        analyzer = DataAnalyzer(df)
+        before, expected = best_of(lambda: legacy_kpis(df))
+        after, kpis = best_of(analyzer.get_kpis)
+
+        print(f"\n⏱️ {rows:,} rows (best of {REPEATS})")
+        print(f"   before {before * 1000:9.1f} ms")
+        print(f"   after  {after * 1000:9.1f} ms   ({before / after:.1f}x faster)")
+        if kpis != expected:
+            status = 1
+            for name in expected:
+                if kpis.get(name) != expected[name]:
+                    print(f"   ❌ {name}: {expected[name]!r} != {kpis.get(name)!r}")
+        else:
+            print("   ✅ identical KPIs")
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark query plans of the get_telematics_data filter shapes before and after
+the composite/BRIN index migration.
+
+The "before" plans are taken inside a transaction that temporarily restores the
+legacy single-column indexes and is rolled back, so the database is left as is.
+Requires DATABASE_URL pointing at a PostgreSQL database with telemetry loaded.
+"""
+import sys
+from datetime import timedelta
+from sqlalchemy import func, select, text
+sys.path.append('.')
+
+from database import connection
+from database.models import TelematicsData
+from database.services import FleetDatabaseService
+
+NEW_INDEXES = ['ix_telematics_vehicle_timestamp', 'ix_telematics_client_timestamp', 'ix_telematics_timestamp_brin']
+LEGACY_INDEXES = {
+    'ix_telematics_data_client_id': 'client_id',
+    'ix_telematics_data_vehicle_id': 'vehicle_id',
+    'ix_telematics_data_plate': 'plate',
+    'ix_telematics_data_timestamp': '"timestamp"',
+}
+
+def sample_filters(conn):
+    """Filter values taken from the busiest vehicle and the last week of data"""
+    vehicle_id, client_id = conn.execute(
+        select(TelematicsData.vehicle_id, TelematicsData.client_id)
+        .group_by(TelematicsData.vehicle_id, TelematicsData.client_id)
+        .order_by(func.count().desc())
+        .limit(1)
+    ).one()
+    end_date = conn.execute(select(func.max(TelematicsData.timestamp))).scalar()
+    start_date = end_date - timedelta(days=7)
+    return {
+        'vehicle + period': {'vehicle_id': vehicle_id, 'start_date': start_date, 'end_date': end_date},
+        'client + period': {'client_id': client_id, 'start_date': start_date, 'end_date': end_date},
+        'period only': {'start_date': start_date, 'end_date': end_date},
+        'vehicle only': {'vehicle_id': vehicle_id},
+    }
+
+def explain(conn, filters):
+    """EXPLAIN ANALYZE the same statement get_telematics_data builds for these filters"""
+    stmt = (select(TelematicsData)
+            .where(*FleetDatabaseService._telematics_filters(**filters))
+            .order_by(TelematicsData.timestamp.desc()))
+    compiled = stmt.compile(dialect=conn.dialect)
+    rows = conn.exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS) {compiled}", compiled.params).all()
+    return [row[0] for row in rows]
+
+def print_plans(title, conn, shapes):
+    print(f"\n{'=' * 70}\n📊 {title}\n{'=' * 70}")
+    for name, filters in shapes.items():
+        plan = explain(conn, filters)
+        print(f"\n🔍 {name}")
+        for line in plan:
+            print(f"   {line}")
+
+def main():
+    if not connection.initialize_database():
+        print("❌ Could not connect: set DATABASE_URL to a PostgreSQL database")
+        return 1
+    engine = connection.engine
+    if engine.dialect.name != 'postgresql':
+        print("❌ This benchmark needs PostgreSQL")
+        return 1
+
+    with engine.connect() as conn:
+        total = conn.execute(select(func.count()).select_from(TelematicsData)).scalar()
+        if not total:
+            print("⚠️ telematics_data is empty; load some CSV files first")
+            return 1
+        print(f"📦 telematics_data: {total:,} rows")
+        shapes = sample_filters(conn)
+        conn.rollback()
+
+        # Legacy layout, rolled back afterwards (PostgreSQL DDL is transactional)
+        try:
+            for index in NEW_INDEXES:
+                conn.execute(text(f"DROP INDEX IF EXISTS {index}"))
+            for index, column in LEGACY_INDEXES.items():
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index} ON telematics_data ({column})"))
+            conn.execute(text("ANALYZE telematics_data"))
+            print_plans("BEFORE: single-column indexes", conn, shapes)
+        finally:
+            conn.rollback()
+
+        conn.execute(text("ANALYZE telematics_data"))
+        print_plans("AFTER: composite + BRIN indexes", conn, shapes)
+        conn.commit()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,11 +2,14 @@
 Database connection and session management
 """
 import os
+import threading
 import time
-from sqlalchemy import create_engine, text
+from datetime import date, datetime, timezone
+from typing import Any, Dict
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.exc import DisconnectionError, OperationalError
+from sqlalchemy.pool import QueuePool
 
 # Database connection URL from environment
 DATABASE_URL = os.getenv('DATABASE_URL')
@@ -16,82 +19,140 @@ engine = None
 SessionLocal = None
 Base = declarative_base()
 
-def initialize_database():
-    """Initialize database connection lazily with robust SSL handling"""
-    global engine, SessionLocal
-    
-    if engine is not None:
+# Guards engine creation and schema bootstrap across Streamlit script threads
+_engine_lock = threading.Lock()
+_bootstrapped = False
+
+class PoolMetrics:
+    """Process-wide counters of connection pool activity"""
+
+    _lock = threading.Lock()
+    _counters = {
+        'checkouts': 0,
+        'waits': 0,
+        'wait_seconds': 0.0,
+        'max_wait_seconds': 0.0,
+        'connects': 0,
+        'invalidations': 0,
+    }
+
+    @classmethod
+    def increment(cls, name: str) -> None:
+        with cls._lock:
+            cls._counters[name] += 1
+
+    @classmethod
+    def record_checkout(cls, waited: bool, seconds: float) -> None:
+        with cls._lock:
+            cls._counters['checkouts'] += 1
+            if waited:
+                cls._counters['waits'] += 1
+                cls._counters['wait_seconds'] += seconds
+                cls._counters['max_wait_seconds'] = max(cls._counters['max_wait_seconds'], seconds)
+
+    @classmethod
+    def snapshot(cls) -> Dict[str, Any]:
+        with cls._lock:
+            return dict(cls._counters)
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls._lock:
+            for name in cls._counters:
+                cls._counters[name] = 0.0 if name.endswith('seconds') else 0
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool that records checkouts and the ones that had to wait for a free connection"""
+
+    def _do_get(self):
+        # Same condition QueuePool uses to block: no idle connection and no overflow left
+        must_wait = self.checkedin() == 0 and 0 <= self._max_overflow <= self._overflow
+        started = time.perf_counter()
         try:
-            # Test existing connection
-            with engine.connect() as conn:
-                conn.execute(text("SELECT 1"))
+            return super()._do_get()
+        finally:
+            PoolMetrics.record_checkout(must_wait, time.perf_counter() - started)
+
+def _attach_pool_events(bind) -> None:
+    event.listen(bind, 'connect', lambda dbapi_connection, record: PoolMetrics.increment('connects'))
+    # Raised e.g. when pre-ping finds a connection the server already closed
+    event.listen(bind, 'invalidate', lambda dbapi_connection, record, error: PoolMetrics.increment('invalidations'))
+
+def bootstrap_schema(bind) -> None:
+    """Create missing tables and bring older ones up to date; runs once per process"""
+    Base.metadata.create_all(bind=bind)
+    from database.migrations import run_migrations
+    run_migrations(bind)
+
+def initialize_database():
+    """Create the engine and bootstrap the schema once; later calls return without a round-trip.
+
+    Stale or dropped connections are handled by pool_pre_ping on checkout, so
+    the engine is never health-checked or replaced here.
+    """
+    global engine, SessionLocal, _bootstrapped
+
+    if _bootstrapped:
+        return True
+
+    with _engine_lock:
+        if _bootstrapped:
             return True
-        except (DisconnectionError, OperationalError):
-            # Force recreation of engine
-            engine = None
-    
-    if not DATABASE_URL:
-        return False
-    
-    try:
-        # Create engine with robust SSL and pool settings
-        engine = create_engine(
-            DATABASE_URL,
-            pool_size=10,
-            max_overflow=20,
-            pool_pre_ping=True,  # Validates connections before use
-            pool_recycle=300,    # Recycle connections every 5 minutes
-            connect_args={
-                "sslmode": "require",
-                "connect_timeout": 10,
-                "application_name": "insight_hub_fleet_monitor"
-            }
-        )
-        
+
+        created = False
+        if engine is None:
+            if not DATABASE_URL:
+                return False
+            try:
+                # Create engine with robust SSL and pool settings
+                engine = create_engine(
+                    DATABASE_URL,
+                    poolclass=MeteredQueuePool,
+                    pool_size=10,
+                    max_overflow=20,
+                    pool_pre_ping=True,  # Validates connections before use
+                    pool_recycle=300,    # Recycle connections every 5 minutes
+                    connect_args={
+                        "sslmode": "require",
+                        "connect_timeout": 10,
+                        "application_name": "insight_hub_fleet_monitor",
+                        # Naive datetimes are UTC throughout (see as_utc), whatever the server default
+                        "options": "-c timezone=UTC"
+                    }
+                )
+                _attach_pool_events(engine)
+                created = True
+            except Exception:
+                return False
+
+        try:
+            bootstrap_schema(engine)
+        except Exception:
+            # Retried on the next call, e.g. once the database is reachable
+            if created:
+                engine.dispose()
+                engine = None
+            return False
+
         SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-        
-        # Create tables if they don't exist
-        Base.metadata.create_all(bind=engine)
+        _bootstrapped = True
         return True
-    except Exception:
-        return False
+
+def as_utc(value: Any) -> datetime:
+    """Timezone-aware UTC datetime for a query bound; naive values are taken as UTC"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime.combine(value, datetime.min.time())
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
 
 def get_db_session():
-    """Get database session with retry logic"""
-    max_retries = 3
-    retry_delay = 1
-    
-    for attempt in range(max_retries):
-        session = None
-        try:
-            # Ensure database is initialized
-            if not initialize_database():
-                raise Exception("Failed to initialize database")
-            
-            session = SessionLocal()
-            
-            # Test the connection
-            session.execute(text("SELECT 1"))
-            return session
-            
-        except (DisconnectionError, OperationalError) as e:
-            if session:
-                session.close()
-            
-            if attempt < max_retries - 1:
-                time.sleep(retry_delay)
-                retry_delay *= 2  # Exponential backoff
-                
-                # Force engine recreation on connection errors
-                global engine
-                engine = None
-                continue
-            else:
-                raise e
-        except Exception as e:
-            if session:
-                session.close()
-            raise e
+    """Get a database session; its connection is checked out (and pre-pinged) on first use"""
+    if not initialize_database():
+        raise Exception("Failed to initialize database")
+    return SessionLocal()
 
 def close_db_session(session):
     """Close database session safely"""
@@ -101,6 +162,19 @@ def close_db_session(session):
         except Exception:
             pass  # Ignore errors when closing
 
+def pool_metrics() -> Dict[str, Any]:
+    """Pool size, connections in use and overflow, plus checkout/wait/connect counters"""
+    metrics = PoolMetrics.snapshot()
+    pool = engine.pool if engine is not None else None
+    if isinstance(pool, QueuePool):
+        metrics.update({
+            'pool_size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            'overflow': max(pool.overflow(), 0),
+        })
+    return metrics
+
 def test_connection():
     """Test database connection health"""
     try:
@@ -108,4 +182,4 @@ def test_connection():
             session.execute(text("SELECT 1"))
         return True
     except Exception:
-        return False
\ No newline at end of file
+        return False
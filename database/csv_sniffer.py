@@ -0,0 +1,130 @@
+"""
+Single-pass detection of CSV separator, encoding and header layout
+"""
+import codecs
+import csv
+import io
+import os
+from typing import List
+import pandas as pd
+from database.normalizer import TelematicsNormalizer
+
+class CSVReadSpec:
+    """Reusable description of how to parse a telematics CSV file"""
+
+    def __init__(self, sep: str, encoding: str, raw_columns: List[str]):
+        self.sep = sep
+        self.encoding = encoding
+        self.raw_columns = raw_columns
+        # Header names with irregular spacing collapsed ('Odômetro do período  (Km)')
+        self.columns = TelematicsNormalizer.normalize_headers(raw_columns)
+
+    def read_kwargs(self) -> dict:
+        """Keyword arguments for pd.read_csv reproducing this spec"""
+        return {
+            'sep': self.sep,
+            'encoding': self.encoding,
+            'header': 0,
+            'names': self.columns,
+        }
+
+    def _rewind(self, source):
+        """Seek file-like sources back to the start; paths are reopened by pandas"""
+        if hasattr(source, 'seek'):
+            source.seek(0)
+
+    def read(self, source, **kwargs):
+        """Parse source (path or file-like) once with the detected settings.
+
+        With `chunksize` a generator of chunks is returned; decoding is lazy
+        there, so the latin-1 fallback is applied while iterating.
+        """
+        if kwargs.get('chunksize'):
+            return self._read_chunks(source, **kwargs)
+        self._rewind(source)
+        try:
+            return pd.read_csv(source, **self.read_kwargs(), **kwargs)
+        except UnicodeDecodeError:
+            # The sample looked like UTF-8 but a later byte did not; latin-1 decodes anything
+            if self.encoding == 'latin-1':
+                raise
+            self.encoding = 'latin-1'
+            self._rewind(source)
+            return pd.read_csv(source, **self.read_kwargs(), **kwargs)
+
+    def _read_chunks(self, source, **kwargs):
+        """Yield chunks, restarting in latin-1 past the rows already yielded on a late decode error"""
+        self._rewind(source)
+        yielded = 0
+        try:
+            for chunk in pd.read_csv(source, **self.read_kwargs(), **kwargs):
+                yielded += len(chunk)
+                yield chunk
+            return
+        except UnicodeDecodeError:
+            if self.encoding == 'latin-1':
+                raise
+        self.encoding = 'latin-1'
+        self._rewind(source)
+        for chunk in pd.read_csv(source, **self.read_kwargs(), **kwargs):
+            if yielded >= len(chunk):
+                yielded -= len(chunk)
+                continue
+            if yielded:
+                chunk = chunk.iloc[yielded:]
+                yielded = 0
+            yield chunk
+
+    def __repr__(self):
+        return f"CSVReadSpec(sep={self.sep!r}, encoding={self.encoding!r}, columns={len(self.columns)})"
+
+class CSVSniffer:
+    """Inspects a bounded byte sample to build a CSVReadSpec"""
+
+    SAMPLE_BYTES = 64 * 1024
+    SEPARATORS = [';', ',', '\t']
+
+    @staticmethod
+    def _read_sample(source) -> bytes:
+        """Read the first SAMPLE_BYTES of a path or file-like without consuming it"""
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, 'rb') as f:
+                return f.read(CSVSniffer.SAMPLE_BYTES)
+        position = source.tell()
+        sample = source.read(CSVSniffer.SAMPLE_BYTES)
+        source.seek(position)
+        if isinstance(sample, str):
+            return sample.encode('utf-8')
+        return sample
+
+    @staticmethod
+    def _detect_encoding(sample: bytes) -> str:
+        """UTF-8 (with or without BOM) when the sample decodes cleanly, latin-1 otherwise"""
+        if sample.startswith(codecs.BOM_UTF8):
+            return 'utf-8-sig'
+        try:
+            # Incremental decode so a multi-byte char cut at the sample end is not an error
+            codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+            return 'utf-8'
+        except UnicodeDecodeError:
+            return 'latin-1'
+
+    @staticmethod
+    def sniff(source) -> CSVReadSpec:
+        """Detect separator, encoding and header of a CSV path or upload buffer"""
+        sample = CSVSniffer._read_sample(source)
+        if not sample.strip():
+            raise ValueError('O arquivo CSV está vazio')
+
+        encoding = CSVSniffer._detect_encoding(sample)
+        text = sample.decode(encoding, errors='replace')
+        header_line = text.splitlines()[0]
+
+        # Vendor headers never contain the separator, while data rows may ('X, X, X, X')
+        counts = {sep: header_line.count(sep) for sep in CSVSniffer.SEPARATORS}
+        sep = max(counts, key=counts.get)
+        if counts[sep] == 0:
+            raise ValueError('Could not detect a CSV separator that produces multiple columns')
+
+        raw_columns = next(csv.reader(io.StringIO(header_line), delimiter=sep))
+        return CSVReadSpec(sep, encoding, raw_columns)
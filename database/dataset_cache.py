@@ -0,0 +1,92 @@
+"""
+Process-wide cache of telemetry DataFrames shared by all pages and sessions
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+import pandas as pd
+
+class DatasetCache:
+    """LRU cache of query results keyed by (data version, filters), bounded by a memory budget.
+
+    The data version is an in-process watermark bumped after every committed
+    ingest, clear or month drop/archive, so a cached frame is never served
+    once the telemetry it came from has changed. Callers receive shallow
+    copies: column assignments stay private to the caller while the row data
+    is shared, so frames must not be modified in place.
+    """
+
+    # Budget for all cached frames together (DATASET_CACHE_MB, default 512 MB)
+    MEMORY_BUDGET_BYTES = int(os.getenv('DATASET_CACHE_MB', '512')) * 1024 * 1024
+
+    _lock = threading.Lock()
+    _version = 0
+    _entries: 'OrderedDict[Tuple[int, Hashable], Tuple[pd.DataFrame, int]]' = OrderedDict()
+    _bytes = 0
+    _hits = 0
+    _misses = 0
+
+    @classmethod
+    def version(cls) -> int:
+        with cls._lock:
+            return cls._version
+
+    @classmethod
+    def bump(cls) -> int:
+        """Advance the data version after a change to telemetry; returns the new version"""
+        with cls._lock:
+            cls._version += 1
+            # Entries of older versions can never be hit again
+            cls._entries.clear()
+            cls._bytes = 0
+            return cls._version
+
+    @staticmethod
+    def frame_bytes(frame: pd.DataFrame) -> int:
+        return int(frame.memory_usage(index=True, deep=True).sum())
+
+    @classmethod
+    def _evict(cls, needed: int) -> None:
+        """Drop least recently used entries until `needed` more bytes fit (lock held)"""
+        while cls._entries and cls._bytes + needed > cls.MEMORY_BUDGET_BYTES:
+            _, (_, size) = cls._entries.popitem(last=False)
+            cls._bytes -= size
+
+    @classmethod
+    def get_or_load(cls, filters: Dict[str, Any], loader: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """Cached frame for these filters, calling loader() on a miss"""
+        key_filters = tuple(sorted(
+            (name, tuple(value) if isinstance(value, list) else value) for name, value in filters.items()
+        ))
+        with cls._lock:
+            key = (cls._version, key_filters)
+            entry = cls._entries.get(key)
+            if entry is not None:
+                cls._entries.move_to_end(key)
+                cls._hits += 1
+                return entry[0].copy(deep=False)
+            cls._misses += 1
+
+        frame = loader()
+        size = cls.frame_bytes(frame)
+        with cls._lock:
+            # A bump during the load means the rows may predate the change
+            if key[0] == cls._version and key not in cls._entries and size <= cls.MEMORY_BUDGET_BYTES:
+                cls._evict(size)
+                cls._entries[key] = (frame, size)
+                cls._bytes += size
+        return frame.copy(deep=False)
+
+    @classmethod
+    def stats(cls) -> Dict[str, int]:
+        """Version, entry count, bytes held and hit/miss counters"""
+        with cls._lock:
+            return {
+                'version': cls._version,
+                'entries': len(cls._entries),
+                'bytes': cls._bytes,
+                'budget_bytes': cls.MEMORY_BUDGET_BYTES,
+                'hits': cls._hits,
+                'misses': cls._misses,
+            }
@@ -1,130 +1,190 @@
 """
 Database manager for integrating with existing CSV processing workflow
 """
+import hashlib
 import os
 import pandas as pd
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Union
 from datetime import datetime
 from database.services import FleetDatabaseService
-from database.connection import initialize_database
+from database import connection
+from database.connection import initialize_database, pool_metrics
+from database.csv_sniffer import CSVSniffer
+from database.dataset_cache import DatasetCache
+from database.dimensions import DimensionCatalog
+from database.partitions import TelematicsPartitions
+from database.rollups import TelematicsRollups
+from database.normalizer import TelematicsNormalizer
 
 class DatabaseManager:
     """Manager to integrate database operations with existing workflow"""
     
+    # Rows parsed, normalized and loaded per streaming step
+    STREAM_CHUNK_ROWS = 50000
+    
     @staticmethod
-    def _extract_coordinates(row):
-        """Extract and validate latitude/longitude coordinates from various sources"""
-        # Try direct latitude/longitude columns first
-        lat = DatabaseManager._safe_float_convert(row.get('latitude') or row.get('Latitude'))
-        lon = DatabaseManager._safe_float_convert(row.get('longitude') or row.get('Longitude'))
-        
-        # If we have valid coordinates, use them
-        if lat != 0.0 and lon != 0.0 and -90 <= lat <= 90 and -180 <= lon <= 180:
-            return lat, lon
-        
-        # Try extracting from location field
-        location_field = row.get('localizacao') or row.get('Localização') or row.get('location') or row.get('Location')
-        if pd.notna(location_field):
-            try:
-                location = str(location_field).strip()
-                # Handle different coordinate formats
-                if ',' in location:
-                    # Remove any parentheses or extra characters
-                    location = location.replace('(', '').replace(')', '').strip()
-                    parts = location.split(',')
-                    if len(parts) == 2:
-                        lat_str = parts[0].strip()
-                        lon_str = parts[1].strip()
-                        
-                        # Handle Portuguese decimal comma format
-                        lat_str = lat_str.replace(',', '.')
-                        lon_str = lon_str.replace(',', '.')
-                        
-                        try:
-                            parsed_lat = float(lat_str)
-                            parsed_lon = float(lon_str)
-                            
-                            # Validate coordinate ranges
-                            if -90 <= parsed_lat <= 90 and -180 <= parsed_lon <= 180:
-                                # Reject clearly invalid coordinates like (0,0)
-                                if not (parsed_lat == 0.0 and parsed_lon == 0.0):
-                                    return parsed_lat, parsed_lon
-                        except ValueError:
-                            pass
-            except Exception:
-                pass
-        
-        # Return None for invalid/missing coordinates (will be stored as NULL in DB)
-        return None, None
+    def _source_size(source) -> int:
+        """Size in bytes of a CSV path or file-like upload buffer"""
+        if isinstance(source, (str, os.PathLike)):
+            return os.path.getsize(source)
+        size = getattr(source, 'size', None)
+        if size is None:
+            position = source.tell()
+            size = source.seek(0, os.SEEK_END)
+            source.seek(position)
+        return int(size)
     
     @staticmethod
-    def _safe_int_convert(value):
-        """Safely convert value to int, handling special cases"""
-        if pd.isna(value) or value is None or str(value).strip() == '':
-            return 0
-        try:
-            # Handle special values like 'X, X, X, X'
-            val_str = str(value).strip()
-            if 'x' in val_str.lower() or ',' in val_str:
-                return 0
-            return int(float(val_str))  # float first to handle '1.0'
-        except (ValueError, TypeError):
-            return 0
+    def content_hash(source) -> str:
+        """SHA-256 of a CSV path, upload buffer or raw bytes, used to detect re-uploads"""
+        if isinstance(source, bytes):
+            return hashlib.sha256(source).hexdigest()
+        digest = hashlib.sha256()
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(block)
+        else:
+            position = source.tell()
+            source.seek(0)
+            for block in iter(lambda: source.read(1024 * 1024), b''):
+                digest.update(block)
+            source.seek(position)
+        return digest.hexdigest()
     
     @staticmethod
-    def _safe_float_convert(value):
-        """Safely convert value to float, handling special cases"""
-        if pd.isna(value) or value is None or str(value).strip() == '':
-            return 0.0
-        try:
-            # Handle special values like 'X, X, X, X'
-            val_str = str(value).strip()
-            if 'x' in val_str.lower() or val_str == '-':
-                return 0.0
-            # Remove any non-numeric characters except . and -
-            val_str = ''.join(c for c in val_str if c.isdigit() or c in '.-')
-            if not val_str or val_str == '.' or val_str == '-':
-                return 0.0
-            return float(val_str)
-        except (ValueError, TypeError):
-            return 0.0
+    def _already_processed_result(filename: str) -> Dict[str, Any]:
+        """Result returned for files whose content was already ingested"""
+        print(f"Skipping {filename}: identical content already processed")
+        return {
+            'success': True,
+            'skipped': True,
+            'records_processed': 0,
+            'unique_vehicles': 0,
+            'unique_clients': 0,
+            'message': 'Arquivo idêntico já processado anteriormente'
+        }
     
     @staticmethod
-    def migrate_csv_to_database_with_progress(csv_file_path: str, progress_callback=None) -> Dict[str, Any]:
-        """Migrate existing CSV data to database with progress callback"""
-        if not os.path.exists(csv_file_path):
-            return {'success': False, 'error': f'File not found: {csv_file_path}'}
+    def migrate_csv_stream(source, filename: Optional[str] = None, progress_callback=None,
+                           chunk_rows: Optional[int] = None) -> Dict[str, Any]:
+        """Stream a CSV (path or upload buffer) into the database chunk by chunk.
+        
+        Each chunk is parsed, normalized and bulk inserted before the next one
+        is read, so memory stays bounded by the chunk size. After each chunk
+        progress is reported as (bytes consumed, total bytes, "processando")
+        followed by (rows inserted, rows read, "inserindo").
+        """
+        chunk_rows = chunk_rows or DatabaseManager.STREAM_CHUNK_ROWS
+        if filename is None:
+            filename = os.path.basename(source) if isinstance(source, (str, os.PathLike)) else getattr(source, 'name', 'uploaded_data.csv')
         
         try:
-            # Try different separators and encodings with proper validation
-            df = None
-            separators = [',', ';']
-            encodings = ['utf-8', 'latin-1', 'iso-8859-1', 'windows-1252', 'cp1252']
-            
-            for sep in separators:
-                for enc in encodings:
-                    try:
-                        test_df = pd.read_csv(csv_file_path, sep=sep, encoding=enc)
-                        # Validate that we have multiple columns (not just one big column)
-                        if test_df.shape[1] > 1:
-                            df = test_df
-                            print(f"Successfully read CSV with separator='{sep}' and encoding='{enc}' - Shape: {df.shape}")
-                            break
-                        else:
-                            print(f"Separator '{sep}' with encoding '{enc}' resulted in only {test_df.shape[1]} column(s) - trying next combination")
-                    except Exception as e:
-                        print(f"Failed with separator='{sep}' and encoding='{enc}': {str(e)[:100]}")
-                        continue
-                if df is not None:
-                    break
-            
-            if df is None:
-                return {'success': False, 'error': 'Could not read CSV file with any encoding/separator combination that produces multiple columns'}
+            spec = CSVSniffer.sniff(source)
+            total_bytes = DatabaseManager._source_size(source)
+            content_hash = DatabaseManager.content_hash(source)
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+        
+        if not initialize_database():
+            return {'success': False, 'error': 'Database initialization failed'}
+        
+        owns_handle = isinstance(source, (str, os.PathLike))
+        handle = open(source, 'rb') if owns_handle else source
+        try:
+            with FleetDatabaseService() as db:
+                if db.is_content_processed(content_hash):
+                    return DatabaseManager._already_processed_result(filename)
+                
+                history = db.save_processing_history(
+                    filename=filename,
+                    records_processed=0,
+                    processing_status='processing',
+                    file_size_bytes=total_bytes,
+                    content_hash=content_hash
+                )
+                history_id = history.id
+                db.session.commit()
+                
+                records_read = 0
+                records_saved = 0
+                records_duplicated = 0
+                plates = set()
+                clients = set()
+                date_start = None
+                date_end = None
+                
+                try:
+                    for chunk in spec.read(handle, chunksize=chunk_rows):
+                        records_read += len(chunk)
+                        batch = TelematicsNormalizer.normalize(chunk)
+                        del chunk
+                        
+                        records_saved += db.save_telematics_data(batch)
+                        records_duplicated += db.last_save_stats['duplicates']
+                        plates.update(batch['placa'].unique())
+                        clients.update(batch['cliente'].unique())
+                        if batch['data'].notna().any():
+                            chunk_start, chunk_end = batch['data'].min(), batch['data'].max()
+                            date_start = chunk_start if date_start is None else min(date_start, chunk_start)
+                            date_end = chunk_end if date_end is None else max(date_end, chunk_end)
+                        
+                        if progress_callback:
+                            progress_callback(min(handle.tell(), total_bytes), total_bytes, "processando")
+                            progress_callback(records_saved, records_read, "inserindo")
+                
+                except Exception as e:
+                    db.session.rollback()
+                    db.finalize_processing_history(
+                        history_id,
+                        records_processed=records_saved,
+                        records_failed=records_read - records_saved - records_duplicated,
+                        unique_vehicles=len(plates),
+                        unique_clients=len(clients),
+                        processing_status='failed',
+                        error_message=str(e)
+                    )
+                    return {'success': False, 'error': str(e), 'records_processed': records_saved}
+                
+                records_failed = records_read - records_saved - records_duplicated
+                status = db.ingestion_status(records_read, records_saved, records_duplicated)
+                db.finalize_processing_history(
+                    history_id,
+                    records_processed=records_saved,
+                    records_failed=records_failed,
+                    unique_vehicles=len(plates),
+                    unique_clients=len(clients),
+                    processing_status=status,
+                    error_message=f'{records_failed} registros não carregados' if records_failed else None,
+                    date_range_start=date_start.to_pydatetime() if date_start is not None else None,
+                    date_range_end=date_end.to_pydatetime() if date_end is not None else None
+                )
             
-            return DatabaseManager.migrate_csv_to_database_from_df_with_progress(df, os.path.basename(csv_file_path), progress_callback)
+            if progress_callback:
+                progress_callback(total_bytes, total_bytes, "processando")
             
+            return {
+                'success': True,
+                'records_processed': records_saved,
+                'records_duplicated': records_duplicated,
+                'records_failed': records_failed,
+                'unique_vehicles': len(plates),
+                'unique_clients': len(clients)
+            }
+        
         except Exception as e:
             return {'success': False, 'error': str(e)}
+        finally:
+            if owns_handle:
+                handle.close()
+    
+    @staticmethod
+    def migrate_csv_to_database_with_progress(csv_file_path: str, progress_callback=None) -> Dict[str, Any]:
+        """Migrate existing CSV data to database with progress callback"""
+        if not os.path.exists(csv_file_path):
+            return {'success': False, 'error': f'File not found: {csv_file_path}'}
+        
+        return DatabaseManager.migrate_csv_stream(csv_file_path, os.path.basename(csv_file_path), progress_callback)
     
     @staticmethod
     def migrate_csv_to_database(csv_file_path: str) -> Dict[str, Any]:
@@ -132,261 +192,174 @@ class DatabaseManager:
         if not os.path.exists(csv_file_path):
             return {'success': False, 'error': f'File not found: {csv_file_path}'}
         
-        try:
-            # Try different separators and encodings with proper validation
-            df = None
-            separators = [',', ';']
-            encodings = ['utf-8', 'latin-1', 'iso-8859-1', 'windows-1252', 'cp1252']
-            
-            for sep in separators:
-                for enc in encodings:
-                    try:
-                        test_df = pd.read_csv(csv_file_path, sep=sep, encoding=enc)
-                        # Validate that we have multiple columns (not just one big column)
-                        if test_df.shape[1] > 1:
-                            df = test_df
-                            print(f"Successfully read CSV with separator='{sep}' and encoding='{enc}' - Shape: {df.shape}")
-                            break
-                        else:
-                            print(f"Separator '{sep}' with encoding '{enc}' resulted in only {test_df.shape[1]} column(s) - trying next combination")
-                    except Exception as e:
-                        print(f"Failed with separator='{sep}' and encoding='{enc}': {str(e)[:100]}")
-                        continue
-                if df is not None:
-                    break
+        return DatabaseManager.migrate_csv_stream(csv_file_path, os.path.basename(csv_file_path))
+    
+    @staticmethod
+    def _save_normalized_batch(batch: pd.DataFrame, filename: str, progress_callback=None,
+                               file_size_bytes: int = 0, content_hash: Optional[str] = None) -> Dict[str, Any]:
+        """Save a normalized telematics batch and record it in the processing history"""
+        if not initialize_database():
+            return {'success': False, 'error': 'Database initialization failed'}
+        
+        with FleetDatabaseService() as db:
+            if progress_callback:
+                records_saved = db.save_telematics_data_with_progress(batch, progress_callback)
+            else:
+                records_saved = db.save_telematics_data(batch)
             
-            if df is None:
-                return {'success': False, 'error': 'Could not read CSV file with any encoding/separator combination that produces multiple columns'}
+            unique_vehicles = int(batch['placa'].nunique())
+            unique_clients = int(batch['cliente'].nunique())
             
-            return DatabaseManager.migrate_csv_to_database_from_df(df, os.path.basename(csv_file_path))
+            date_range = (None, None)
+            if batch['data'].notna().any():
+                date_range = (batch['data'].min(), batch['data'].max())
             
-        except Exception as e:
-            return {'success': False, 'error': str(e)}
+            stats = db.last_save_stats
+            db.save_processing_history(
+                filename=filename,
+                records_processed=records_saved,
+                records_failed=stats['failed'],
+                processing_status=db.ingestion_status(len(batch), records_saved, stats['duplicates']),
+                error_message=f"{stats['failed']} registros não carregados" if stats['failed'] else None,
+                unique_vehicles=unique_vehicles,
+                unique_clients=unique_clients,
+                date_range_start=date_range[0].to_pydatetime() if date_range[0] is not None else None,
+                date_range_end=date_range[1].to_pydatetime() if date_range[1] is not None else None,
+                file_size_bytes=file_size_bytes,
+                content_hash=content_hash
+            )
+        
+        return {
+            'success': True,
+            'records_processed': records_saved,
+            'records_duplicated': stats['duplicates'],
+            'records_failed': stats['failed'],
+            'unique_vehicles': unique_vehicles,
+            'unique_clients': unique_clients
+        }
     
     @staticmethod
-    def migrate_csv_to_database_from_df_with_progress(df: pd.DataFrame, filename: str = "uploaded_data.csv", progress_callback=None) -> Dict[str, Any]:
+    def migrate_csv_to_database_from_df_with_progress(df: pd.DataFrame, filename: str = "uploaded_data.csv", progress_callback=None,
+                                                      file_size_bytes: int = 0) -> Dict[str, Any]:
         """Migrate DataFrame to database with progress callback"""
         try:
-            # Normalize column names first - handle double spaces and irregular spacing
-            df.columns = [' '.join(col.strip().split()) for col in df.columns]
-            
             total_rows = len(df)
-            processed_rows = 0
             
-            # Convert to database format
-            records = []
-            for idx, row in df.iterrows():
-                # Get client name with fallback
-                cliente_name = row.get('cliente') or row.get('Cliente')
-                if pd.isna(cliente_name) or cliente_name is None or str(cliente_name).strip() == '':
-                    cliente_name = 'Cliente Desconhecido'  # Fallback
-                
-                # Get plate with fallback
-                placa_value = row.get('placa') or row.get('Placa')
-                if pd.isna(placa_value) or placa_value is None or str(placa_value).strip() == '':
-                    continue  # Skip records without plate
-                
-                # Extract and validate coordinates first
-                latitude, longitude = DatabaseManager._extract_coordinates(row)
-                
-                record = {
-                    'cliente': str(cliente_name).strip(),
-                    'placa': str(placa_value).strip(),
-                    'ativo': row.get('ativo') or row.get('Ativo'),
-                    'data': pd.to_datetime(row.get('data') or row.get('Data'), errors='coerce', dayfirst=True),
-                    'data_gprs': pd.to_datetime(row.get('data_gprs') or row.get('Data (GPRS)'), errors='coerce', dayfirst=True),
-                    'velocidade_km': DatabaseManager._safe_float_convert(row.get('velocidade_km') or row.get('Velocidade (Km)')),
-                    'ignicao': row.get('ignicao') or row.get('Ignição'),
-                    'motorista': row.get('motorista') or row.get('Motorista'),
-                    'gps': DatabaseManager._safe_int_convert(row.get('gps') or row.get('GPS')),
-                    'gprs': DatabaseManager._safe_int_convert(row.get('gprs') or row.get('Gprs')),
-                    'localizacao': row.get('localizacao') or row.get('Localização'),
-                    'endereco': row.get('endereco') or row.get('Endereço'),
-                    'tipo_evento': row.get('tipo_evento') or row.get('Tipo do Evento'),
-                    'cerca': row.get('cerca') or row.get('Cerca'),
-                    'saida': DatabaseManager._safe_int_convert(row.get('saida') or row.get('Saida')),
-                    'entrada': DatabaseManager._safe_int_convert(row.get('entrada') or row.get('Entrada')),
-                    'pacote': row.get('pacote') or row.get('Pacote'),
-                    'odometro_periodo_km': DatabaseManager._safe_float_convert(row.get('odometro_periodo_km') or row.get('Odômetro Período (Km)')),
-                    'horimetro_periodo': row.get('horimetro_periodo') or row.get('Horímetro Período'),
-                    'horimetro_embarcado': row.get('horimetro_embarcado') or row.get('Horímetro Embarcado'),
-                    'odometro_embarcado_km': DatabaseManager._safe_float_convert(row.get('odometro_embarcado_km') or row.get('Odômetro Embarcado (Km)')),
-                    'bateria': DatabaseManager._safe_float_convert(row.get('bateria') or row.get('Bateria')),
-                    'imagem': row.get('imagem') or row.get('Imagem'),
-                    'tensao': DatabaseManager._safe_float_convert(row.get('tensao') or row.get('Tensão')),
-                    'bloqueado': DatabaseManager._safe_int_convert(row.get('bloqueado') or row.get('Bloqueado')),
-                    'latitude': latitude,
-                    'longitude': longitude
-                }
-                
-                records.append(record)
-                processed_rows += 1
-                
-                # Report progress during data preparation
-                if progress_callback and processed_rows % 100 == 0:
-                    progress_callback(processed_rows, total_rows, "preparando")
+            # Column-wise normalization of the whole frame
+            batch = TelematicsNormalizer.normalize(df)
             
-            # Save to database with progress
-            if initialize_database():
-                with FleetDatabaseService() as db:
-                    records_saved = db.save_telematics_data_with_progress(records, progress_callback)
-                    
-                    # Save processing record
-                    unique_vehicles = len(set(r['placa'] for r in records))
-                    unique_clients = len(set(r['cliente'] for r in records))
-                    db.save_processing_history(
-                        filename=filename,
-                        records_processed=records_saved,
-                        unique_vehicles=unique_vehicles,
-                        unique_clients=unique_clients,
-                        file_size_bytes=0  # Will be updated if available
-                    )
-                    
-                    return {
-                        'success': True,
-                        'records_processed': records_saved,
-                        'unique_vehicles': unique_vehicles,
-                        'unique_clients': unique_clients
-                    }
-            else:
-                return {'success': False, 'error': 'Database initialization failed'}
+            if progress_callback:
+                progress_callback(total_rows, total_rows, "preparando")
+            
+            return DatabaseManager._save_normalized_batch(batch, filename, progress_callback, file_size_bytes)
             
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
     @staticmethod
-    def migrate_csv_to_database_from_df(df: pd.DataFrame, filename: str = "uploaded_data.csv") -> Dict[str, Any]:
+    def migrate_csv_to_database_from_df(df: pd.DataFrame, filename: str = "uploaded_data.csv",
+                                        file_size_bytes: int = 0) -> Dict[str, Any]:
         """Migrate DataFrame to database"""
         try:
-            # Normalize column names first - handle double spaces and irregular spacing
-            df.columns = [' '.join(col.strip().split()) for col in df.columns]
-            
-            # Convert to database format
-            records = []
-            for _, row in df.iterrows():
-                # Get client name with fallback
-                cliente_name = row.get('cliente') or row.get('Cliente')
-                if pd.isna(cliente_name) or cliente_name is None or str(cliente_name).strip() == '':
-                    cliente_name = 'Cliente Desconhecido'  # Fallback
-                
-                # Get plate with fallback
-                placa_value = row.get('placa') or row.get('Placa')
-                if pd.isna(placa_value) or placa_value is None or str(placa_value).strip() == '':
-                    continue  # Skip records without plate
-                
-                # Extract and validate coordinates first
-                latitude, longitude = DatabaseManager._extract_coordinates(row)
-                
-                record = {
-                    'cliente': str(cliente_name).strip(),
-                    'placa': str(placa_value).strip(),
-                    'ativo': row.get('ativo') or row.get('Ativo'),
-                    'data': pd.to_datetime(row.get('data') or row.get('Data'), errors='coerce', dayfirst=True),
-                    'data_gprs': pd.to_datetime(row.get('data_gprs') or row.get('Data (GPRS)'), errors='coerce', dayfirst=True),
-                    'velocidade_km': DatabaseManager._safe_float_convert(row.get('velocidade_km') or row.get('Velocidade (Km)')),
-                    'ignicao': row.get('ignicao') or row.get('Ignição'),
-                    'motorista': row.get('motorista') or row.get('Motorista'),
-                    'gps': DatabaseManager._safe_int_convert(row.get('gps') or row.get('GPS')),
-                    'gprs': DatabaseManager._safe_int_convert(row.get('gprs') or row.get('Gprs')),
-                    'localizacao': row.get('localizacao') or row.get('Localização'),
-                    'endereco': row.get('endereco') or row.get('Endereço'),
-                    'tipo_evento': row.get('tipo_evento') or row.get('Tipo do Evento'),
-                    'cerca': row.get('cerca') or row.get('Cerca'),
-                    'saida': DatabaseManager._safe_int_convert(row.get('saida') or row.get('Saida')),
-                    'entrada': DatabaseManager._safe_int_convert(row.get('entrada') or row.get('Entrada')),
-                    'pacote': row.get('pacote') or row.get('Pacote'),
-                    'odometro_periodo_km': DatabaseManager._safe_float_convert(row.get('odometro_periodo_km') or row.get('Odômetro do período (Km)') or row.get('Odômetro do período  (Km)')),
-                    'horimetro_periodo': row.get('horimetro_periodo') or row.get('Horímetro do período'),
-                    'horimetro_embarcado': row.get('horimetro_embarcado') or row.get('Horímetro embarcado'),
-                    'odometro_embarcado_km': DatabaseManager._safe_float_convert(row.get('odometro_embarcado_km') or row.get('Odômetro embarcado (Km)')),
-                    'bateria': row.get('bateria') or row.get('Bateria'),
-                    'imagem': row.get('imagem') or row.get('Imagem'),
-                    'tensao': DatabaseManager._safe_float_convert(row.get('tensao') or row.get('Tensão')),
-                    'bloqueado': DatabaseManager._safe_int_convert(row.get('bloqueado') or row.get('Bloqueado')),
-                    'latitude': latitude,
-                    'longitude': longitude
-                }
-                
-                records.append(record)
-            
-            # Save to database
-            with FleetDatabaseService() as db:
-                records_saved = db.save_telematics_data(records)
-                
-                # Save processing history
-                unique_vehicles = df[df.columns[df.columns.str.contains('placa|Placa', case=False)].tolist()[0]].nunique()
-                unique_clients = df[df.columns[df.columns.str.contains('cliente|Cliente', case=False)].tolist()[0]].nunique()
-                
-                # Find date column
-                date_col = None
-                for col in df.columns:
-                    if 'data' in col.lower() and 'gprs' not in col.lower():
-                        date_col = col
-                        break
-                
-                date_range = (None, None)
-                if date_col and not df[date_col].isna().all():
-                    # Parse dates with Brazilian format
-                    date_series = pd.to_datetime(df[date_col], errors='coerce', dayfirst=True)
-                    date_range = (date_series.min(), date_series.max())
-                
-                db.save_processing_history(
-                    filename=filename,
-                    records_processed=records_saved,
-                    unique_vehicles=unique_vehicles,
-                    unique_clients=unique_clients,
-                    date_range_start=pd.to_datetime(date_range[0]) if date_range[0] else None,
-                    date_range_end=pd.to_datetime(date_range[1]) if date_range[1] else None,
-                    file_size_bytes=len(str(df)) if df is not None else 0
-                )
-            
-            return {
-                'success': True,
-                'records_processed': records_saved,
-                'unique_vehicles': unique_vehicles,
-                'unique_clients': unique_clients
-            }
+            batch = TelematicsNormalizer.normalize(df)
+            return DatabaseManager._save_normalized_batch(batch, filename, file_size_bytes=file_size_bytes)
             
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
+    @staticmethod
+    def _filter_ids(session, client_filter: Optional[str], vehicle_filter: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Resolve filter names to id filters through the memoized dimension catalog; None if one is unknown"""
+        ids = {'client_id': None, 'vehicle_id': None}
+        
+        if client_filter:
+            ids['client_id'] = DimensionCatalog.client_id(session, client_filter)
+            if ids['client_id'] is None:
+                return None
+        
+        if vehicle_filter:
+            ids['vehicle_id'] = DimensionCatalog.vehicle_id(session, vehicle_filter)
+            if ids['vehicle_id'] is None:
+                return None
+        
+        return ids
+    
     @staticmethod
     def get_dashboard_data(client_filter: Optional[str] = None,
                           vehicle_filter: Optional[str] = None,
                           start_date: Optional[datetime] = None,
-                          end_date: Optional[datetime] = None) -> pd.DataFrame:
-        """Get dashboard data with filters"""
+                          end_date: Optional[datetime] = None,
+                          columns: Optional[Union[str, List[str]]] = None) -> pd.DataFrame:
+        """Get the compact dashboard frame with filters, shared through the process-wide DatasetCache.
+        
+        `columns` is a column list or a panel profile name from
+        FleetDatabaseService.TELEMATICS_COLUMN_PROFILES (e.g. 'mapa_rotas');
+        only those columns are queried, transferred and cached. The default set
+        leaves out the free-text address ('endereco').
+        """
+        columns = FleetDatabaseService.resolve_columns(columns)
+        
+        def load() -> pd.DataFrame:
+            with FleetDatabaseService() as db:
+                ids = DatabaseManager._filter_ids(db.session, client_filter, vehicle_filter)
+                if ids is None:
+                    return pd.DataFrame()
+                return db.get_telematics_dataframe(columns, start_date=start_date, end_date=end_date, **ids)
+        
+        filters = {'client_filter': client_filter, 'vehicle_filter': vehicle_filter,
+                   'start_date': start_date, 'end_date': end_date, 'columns': columns}
+        return DatasetCache.get_or_load(filters, load)
+    
+    @staticmethod
+    def get_telematics_aggregates(group_by: Optional[str] = None,
+                                  client_filter: Optional[str] = None,
+                                  vehicle_filter: Optional[str] = None,
+                                  start_date: Optional[datetime] = None,
+                                  end_date: Optional[datetime] = None) -> pd.DataFrame:
+        """Get database-computed aggregates of the filtered telemetry, overall or per group"""
         with FleetDatabaseService() as db:
-            # Convert filter values to IDs if needed
-            client_id = None
-            vehicle_id = None
-            
-            if client_filter:
-                clients = db.get_all_clients()
-                for client in clients:
-                    if client.name == client_filter:
-                        client_id = client.id
-                        break
-            
-            if vehicle_filter:
-                vehicles = db.get_all_vehicles()
-                for vehicle in vehicles:
-                    if vehicle.plate == vehicle_filter:
-                        vehicle_id = vehicle.id
-                        break
-            
-            return db.get_telematics_dataframe(
-                client_id=client_id,
-                vehicle_id=vehicle_id,
-                start_date=start_date,
-                end_date=end_date
-            )
+            ids = DatabaseManager._filter_ids(db.session, client_filter, vehicle_filter)
+            if ids is None:
+                return pd.DataFrame()
+            return db.get_telematics_aggregates(group_by, start_date=start_date, end_date=end_date, **ids)
+    
+    @staticmethod
+    def rollups_maintained() -> bool:
+        """Whether the configured database keeps the hourly/daily rollups up to date"""
+        return initialize_database() and TelematicsRollups.is_maintained(connection.engine)
+    
+    @staticmethod
+    def get_activity_profile(by: str,
+                             client_filter: Optional[str] = None,
+                             vehicle_filter: Optional[str] = None,
+                             start_date: Optional[datetime] = None,
+                             end_date: Optional[datetime] = None) -> pd.DataFrame:
+        """Get rollup-backed activity by 'hora', 'data', 'dia_semana', 'mes' or 'placa'"""
+        with FleetDatabaseService() as db:
+            ids = DatabaseManager._filter_ids(db.session, client_filter, vehicle_filter)
+            if ids is None:
+                return pd.DataFrame()
+            return db.get_activity_profile(by, start_date=start_date, end_date=end_date, **ids)
+    
+    # (data version, summary) of the last get_fleet_summary call
+    _fleet_summary = None
     
     @staticmethod
     def get_fleet_summary() -> Dict[str, Any]:
-        """Get fleet summary statistics"""
+        """Get fleet summary statistics, recomputed only when the data version changes"""
+        version = DatasetCache.version()
+        cached = DatabaseManager._fleet_summary
+        if cached is not None and cached[0] == version:
+            return dict(cached[1])
         with FleetDatabaseService() as db:
-            return db.get_fleet_summary()
+            summary = db.get_fleet_summary()
+        DatabaseManager._fleet_summary = (version, summary)
+        return dict(summary)
+    
+    @staticmethod
+    def get_pool_metrics() -> Dict[str, Any]:
+        """Connection pool usage and checkout/wait counters"""
+        return pool_metrics()
     
     @staticmethod
     def get_processing_history() -> List[Dict[str, Any]]:
@@ -410,30 +383,54 @@ class DatabaseManager:
     def clear_all_data() -> Dict[str, int]:
         """Clear all data from database"""
         with FleetDatabaseService() as db:
-            return db.clear_all_data()
+            result = db.clear_all_data()
+        DimensionCatalog.invalidate()
+        DatasetCache.bump()
+        return result
+    
+    @staticmethod
+    def list_month_partitions() -> List[Dict[str, Any]]:
+        """Monthly telemetry partitions with estimated row counts"""
+        with FleetDatabaseService() as db:
+            return TelematicsPartitions.list_partitions(db.session.get_bind())
+    
+    @staticmethod
+    def archive_month(year: int, month: int) -> Optional[str]:
+        """Detach a month of telemetry into a standalone table; returns its name"""
+        with FleetDatabaseService() as db:
+            archive = TelematicsPartitions.archive_month(db.session.get_bind(), year, month)
+        if archive:
+            DatasetCache.bump()
+        return archive
+    
+    @staticmethod
+    def drop_month(year: int, month: int) -> Optional[str]:
+        """Drop a whole month of telemetry as a metadata operation; returns the partition dropped"""
+        with FleetDatabaseService() as db:
+            dropped = TelematicsPartitions.drop_month(db.session.get_bind(), year, month)
+        if dropped:
+            DatasetCache.bump()
+        return dropped
     
     @staticmethod
     def has_data() -> bool:
-        """Check if database has any telematics data"""
+        """Check if database has any telematics data with an EXISTS probe"""
         try:
             if not initialize_database():
                 return False
             with FleetDatabaseService() as db:
-                summary = db.get_fleet_summary()
-                return summary['total_records'] > 0
+                return db.has_telematics_data()
         except:
             return False
     
     @staticmethod
     def get_client_list() -> List[str]:
-        """Get list of all client names"""
+        """Get sorted client names from the dimension catalog"""
         with FleetDatabaseService() as db:
-            clients = db.get_all_clients()
-            return [client.name for client in clients]
+            return DimensionCatalog.client_names(db.session)
     
     @staticmethod
-    def get_vehicle_list() -> List[str]:
-        """Get list of all vehicle plates"""
+    def get_vehicle_list(client_filter: Optional[str] = None) -> List[str]:
+        """Get sorted vehicle plates, optionally only those of one client"""
         with FleetDatabaseService() as db:
-            vehicles = db.get_all_vehicles()
-            return [vehicle.plate for vehicle in vehicles]
\ No newline at end of file
+            return DimensionCatalog.vehicle_plates(db.session, client_filter)
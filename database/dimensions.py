@@ -0,0 +1,188 @@
+"""
+Bulk resolution of client and vehicle dimensions during ingestion
+"""
+import threading
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from database.models import Client, Vehicle
+
+class DimensionResolver:
+    """Resolves client names and vehicle plates to ids, memoized for a whole ingestion run"""
+
+    def __init__(self, session: Session):
+        self.session = session
+        self.client_ids: Dict[str, int] = {}
+        self.vehicle_ids: Dict[str, int] = {}
+        self.created = 0
+
+    def _is_postgresql(self) -> bool:
+        return self.session.get_bind().dialect.name == 'postgresql'
+
+    def _upsert_clients(self, names: List[str]) -> Dict[str, int]:
+        """Insert missing clients in one statement and return name -> id for all names"""
+        if not self._is_postgresql():
+            return {name: self._get_or_create_client(name) for name in names}
+
+        stmt = (pg_insert(Client)
+                .values([{'name': name} for name in names])
+                .on_conflict_do_nothing(index_elements=['name'])
+                .returning(Client.name, Client.id))
+        resolved = dict(self.session.execute(stmt).all())
+        self.created += len(resolved)
+
+        # Rows that already existed are not returned by ON CONFLICT DO NOTHING
+        existing = [name for name in names if name not in resolved]
+        if existing:
+            resolved.update(self.session.execute(
+                select(Client.name, Client.id).where(Client.name.in_(existing))
+            ).all())
+        return resolved
+
+    def _upsert_vehicles(self, vehicles: List[Dict]) -> Dict[str, int]:
+        """Insert missing vehicles in one statement and return plate -> id for all plates"""
+        if not self._is_postgresql():
+            return {v['plate']: self._get_or_create_vehicle(v) for v in vehicles}
+
+        stmt = (pg_insert(Vehicle)
+                .values(vehicles)
+                .on_conflict_do_nothing(index_elements=['plate'])
+                .returning(Vehicle.plate, Vehicle.id))
+        resolved = dict(self.session.execute(stmt).all())
+        self.created += len(resolved)
+
+        existing = [v['plate'] for v in vehicles if v['plate'] not in resolved]
+        if existing:
+            resolved.update(self.session.execute(
+                select(Vehicle.plate, Vehicle.id).where(Vehicle.plate.in_(existing))
+            ).all())
+        return resolved
+
+    def _get_or_create_client(self, name: str) -> int:
+        """Portable fallback for engines without ON CONFLICT ... RETURNING"""
+        client = self.session.query(Client).filter(Client.name == name).first()
+        if not client:
+            client = Client(name=name)
+            self.session.add(client)
+            self.session.flush()
+            self.created += 1
+        return client.id
+
+    def _get_or_create_vehicle(self, values: Dict) -> int:
+        """Portable fallback for engines without ON CONFLICT ... RETURNING"""
+        vehicle = self.session.query(Vehicle).filter(Vehicle.plate == values['plate']).first()
+        if not vehicle:
+            vehicle = Vehicle(**values)
+            self.session.add(vehicle)
+            self.session.flush()
+            self.created += 1
+        return vehicle.id
+
+    def resolve(self, batch: pd.DataFrame) -> Tuple[pd.Series, pd.Series]:
+        """Return per-row client and vehicle ids for a normalized batch.
+
+        Only names and plates not seen earlier in the run reach the database;
+        new dimension rows are committed immediately so a later failed data
+        chunk cannot roll back ids already memoized, and the DimensionCatalog
+        is invalidated when any were created.
+        """
+        new_clients = [name for name in batch['cliente'].unique() if name not in self.client_ids]
+        new_vehicles = batch.drop_duplicates('placa')
+        new_vehicles = new_vehicles[~new_vehicles['placa'].isin(self.vehicle_ids.keys())]
+
+        if new_clients or not new_vehicles.empty:
+            created_before = self.created
+            client_ids = dict(self.client_ids)
+            if new_clients:
+                client_ids.update(self._upsert_clients(new_clients))
+
+            vehicle_ids = dict(self.vehicle_ids)
+            if not new_vehicles.empty:
+                vehicle_ids.update(self._upsert_vehicles([
+                    {
+                        'plate': row.placa,
+                        'client_id': client_ids[row.cliente],
+                        'asset_id': row.ativo if pd.notna(row.ativo) else None
+                    }
+                    for row in new_vehicles[['cliente', 'placa', 'ativo']].itertuples(index=False)
+                ]))
+
+            self.session.commit()
+            self.client_ids = client_ids
+            self.vehicle_ids = vehicle_ids
+            if self.created > created_before:
+                DimensionCatalog.invalidate()
+
+        return batch['cliente'].map(self.client_ids), batch['placa'].map(self.vehicle_ids)
+
+class DimensionCatalog:
+    """Process-wide memo of client and vehicle lookups used by filters and dropdowns.
+
+    Loaded from the clients and vehicles tables only (never telematics_data)
+    and kept until ingestion creates new dimension rows or data is cleared.
+    """
+
+    _lock = threading.Lock()
+    _generation = 0
+    _client_ids: Optional[Dict[str, int]] = None
+    # plate -> (vehicle id, client name)
+    _vehicles: Optional[Dict[str, Tuple[int, str]]] = None
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """Drop the memo so the next lookup reloads both dimensions"""
+        with cls._lock:
+            cls._generation += 1
+            cls._client_ids = None
+            cls._vehicles = None
+
+    @classmethod
+    def _load(cls, session: Session, reload: bool = False) -> Tuple[Dict[str, int], Dict[str, Tuple[int, str]]]:
+        with cls._lock:
+            if cls._client_ids is not None and not reload:
+                return cls._client_ids, cls._vehicles
+            generation = cls._generation
+
+        client_ids = dict(session.execute(select(Client.name, Client.id)).all())
+        names = {client_id: name for name, client_id in client_ids.items()}
+        vehicles = {
+            plate: (vehicle_id, names.get(client_id))
+            for plate, vehicle_id, client_id in session.execute(
+                select(Vehicle.plate, Vehicle.id, Vehicle.client_id)
+            ).all()
+        }
+
+        with cls._lock:
+            # An invalidation during the load means these rows may already be stale
+            if cls._generation == generation:
+                cls._client_ids, cls._vehicles = client_ids, vehicles
+        return client_ids, vehicles
+
+    @classmethod
+    def client_names(cls, session: Session) -> List[str]:
+        client_ids, _ = cls._load(session)
+        return sorted(client_ids)
+
+    @classmethod
+    def vehicle_plates(cls, session: Session, client_name: Optional[str] = None) -> List[str]:
+        _, vehicles = cls._load(session)
+        return sorted(plate for plate, (_, owner) in vehicles.items()
+                      if client_name is None or owner == client_name)
+
+    @classmethod
+    def client_id(cls, session: Session, name: str) -> Optional[int]:
+        """Id for a client name; reloads once in case another process added it"""
+        client_ids, _ = cls._load(session)
+        if name not in client_ids:
+            client_ids, _ = cls._load(session, reload=True)
+        return client_ids.get(name)
+
+    @classmethod
+    def vehicle_id(cls, session: Session, plate: str) -> Optional[int]:
+        """Id for a plate; reloads once in case another process added it"""
+        _, vehicles = cls._load(session)
+        if plate not in vehicles:
+            _, vehicles = cls._load(session, reload=True)
+        return vehicles[plate][0] if plate in vehicles else None
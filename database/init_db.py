@@ -6,11 +6,13 @@ from database.models import (
     Client, Vehicle, TelematicsData, ProcessingHistory, 
     InsightData, AlertConfiguration
 )
+from database.migrations import run_migrations
 
 def create_all_tables():
     """Create all database tables"""
     try:
         Base.metadata.create_all(bind=engine)
+        run_migrations(engine)
         print("✅ Database tables created successfully!")
         return True
     except Exception as e:
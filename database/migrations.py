@@ -0,0 +1,240 @@
+"""
+Versioned schema migrations for databases created by earlier releases
+"""
+import sys
+from typing import Callable, List
+from sqlalchemy import text
+
+# Serializes concurrent app instances applying migrations to the same database
+MIGRATION_LOCK_ID = 724215
+
+SCHEMA_MIGRATIONS_DDL = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    description VARCHAR(255) NOT NULL,
+    applied_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+)
+"""
+
+class Migration:
+    """One ordered, idempotent schema change"""
+
+    def __init__(self, version: int, description: str, upgrade: Callable):
+        self.version = version
+        self.description = description
+        self.upgrade = upgrade
+
+    def __repr__(self):
+        return f"Migration({self.version}, {self.description!r})"
+
+MIGRATIONS: List[Migration] = []
+
+def migration(version: int, description: str):
+    """Register an upgrade(conn) function as a numbered migration"""
+    def register(upgrade: Callable) -> Callable:
+        MIGRATIONS.append(Migration(version, description, upgrade))
+        MIGRATIONS.sort(key=lambda m: m.version)
+        return upgrade
+    return register
+
+# Remove re-uploaded positions so the natural-key index can be built on existing data
+DEDUPLICATE_TELEMATICS_SQL = """
+DELETE FROM telematics_data a USING telematics_data b
+WHERE a.id > b.id
+  AND a.vehicle_id = b.vehicle_id
+  AND a."timestamp" = b."timestamp"
+  AND COALESCE(a.packet_id, '') = COALESCE(b.packet_id, '')
+  AND COALESCE(a.event_type, '') = COALESCE(b.event_type, '')
+"""
+
+# 'HH:MM:SS' / 'HH:MM' / 'HH' text -> seconds, same rules as TelematicsNormalizer.to_seconds
+DURATION_TO_SECONDS_SQL = r"""
+CASE WHEN trim({column}) ~ '^\d+(:\d{{1,2}}){{0,2}}$' THEN
+    split_part(trim({column}), ':', 1)::integer * 3600
+    + COALESCE(NULLIF(split_part(trim({column}), ':', 2), '')::integer, 0) * 60
+    + COALESCE(NULLIF(split_part(trim({column}), ':', 3), '')::integer, 0)
+END
+"""
+
+# '43 %' text -> whole percentage, same rules as TelematicsNormalizer.to_percent
+PERCENT_SQL = r"""
+CASE WHEN trim({column}) ~ '^\d+(\.\d+)?\s*%?$' THEN
+    round(substring(trim({column}) from '^\d+(?:\.\d+)?')::numeric)::smallint
+END
+"""
+
+# Schema v2 column types: (column, information_schema data_type, USING expression)
+TELEMATICS_TYPE_UPGRADES = [
+    ('engine_hours_period', 'integer', DURATION_TO_SECONDS_SQL),
+    ('engine_hours_total', 'integer', DURATION_TO_SECONDS_SQL),
+    ('battery_level', 'smallint', PERCENT_SQL),
+    ('latitude', 'integer', 'round({column} * 1000000)::integer'),
+    ('longitude', 'integer', 'round({column} * 1000000)::integer'),
+    ('speed_kmh', 'real', '{column}::real'),
+    ('odometer_period_km', 'real', '{column}::real'),
+    ('voltage', 'real', '{column}::real'),
+]
+
+@migration(1, 'processing_history.content_hash for re-upload detection')
+def add_content_hash(conn):
+    conn.execute(text("ALTER TABLE processing_history ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_processing_history_content_hash ON processing_history (content_hash)"))
+
+@migration(2, 'unique natural key on telematics_data')
+def add_telematics_natural_key(conn):
+    has_natural_key = conn.execute(text(
+        "SELECT 1 FROM pg_indexes WHERE indexname = 'uq_telematics_natural_key'"
+    )).first()
+    if not has_natural_key:
+        conn.execute(text(DEDUPLICATE_TELEMATICS_SQL))
+        conn.execute(text(
+            "CREATE UNIQUE INDEX uq_telematics_natural_key ON telematics_data "
+            "(vehicle_id, \"timestamp\", COALESCE(packet_id, ''), COALESCE(event_type, ''))"
+        ))
+
+@migration(3, 'compact numeric telematics column types (schema v2)')
+def upgrade_telematics_types(conn):
+    """Convert legacy text/double columns, backfilling in place.
+
+    All pending conversions run in a single ALTER TABLE so the table is
+    rewritten only once.
+    """
+    current = dict(conn.execute(text(
+        "SELECT column_name, data_type FROM information_schema.columns "
+        "WHERE table_name = 'telematics_data'"
+    )).all())
+    pending = [
+        f"ALTER COLUMN {column} TYPE {data_type} USING ({using.format(column=column)})"
+        for column, data_type, using in TELEMATICS_TYPE_UPGRADES
+        if column in current and current[column] != data_type
+    ]
+    if pending:
+        conn.execute(text("ALTER TABLE telematics_data " + ", ".join(pending)))
+
+@migration(4, 'composite (vehicle|client, timestamp) and BRIN timestamp indexes')
+def add_telematics_range_indexes(conn):
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_telematics_vehicle_timestamp ON telematics_data (vehicle_id, \"timestamp\")"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_telematics_client_timestamp ON telematics_data (client_id, \"timestamp\")"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_telematics_timestamp_brin ON telematics_data USING brin (\"timestamp\")"
+    ))
+    # Covered by the composite indexes above, the primary key, or vehicle_id (plate is 1:1 with it)
+    for index in ('ix_telematics_data_id', 'ix_telematics_data_client_id', 'ix_telematics_data_vehicle_id',
+                  'ix_telematics_data_plate', 'ix_telematics_data_timestamp'):
+        conn.execute(text(f"DROP INDEX IF EXISTS {index}"))
+
+@migration(5, 'partition telematics_data by month of timestamp')
+def partition_telematics_by_month(conn):
+    """Rebuild an ordinary telematics_data as a monthly range-partitioned table.
+    
+    The rows are copied once into the new partitions; the sequence is kept so
+    ids continue where they were.
+    """
+    from database.partitions import TelematicsPartitions
+    if TelematicsPartitions.is_partitioned(conn):
+        return
+    
+    conn.execute(text("ALTER TABLE telematics_data RENAME TO telematics_data_unpartitioned"))
+    # Index names are schema-wide; the old ones are not needed for the copy
+    conn.execute(text("ALTER TABLE telematics_data_unpartitioned DROP CONSTRAINT IF EXISTS telematics_data_pkey"))
+    for (index,) in conn.execute(text(
+        "SELECT indexname FROM pg_indexes WHERE tablename = 'telematics_data_unpartitioned'"
+    )).all():
+        conn.execute(text(f"DROP INDEX IF EXISTS {index}"))
+    
+    conn.execute(text(
+        "CREATE TABLE telematics_data (LIKE telematics_data_unpartitioned INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (\"timestamp\")"
+    ))
+    conn.execute(text("ALTER SEQUENCE IF EXISTS telematics_data_id_seq OWNED BY telematics_data.id"))
+    conn.execute(text(
+        "ALTER TABLE telematics_data ADD PRIMARY KEY (id, \"timestamp\"), "
+        "ADD FOREIGN KEY (client_id) REFERENCES clients (id), "
+        "ADD FOREIGN KEY (vehicle_id) REFERENCES vehicles (id)"
+    ))
+    conn.execute(text(
+        "CREATE UNIQUE INDEX uq_telematics_natural_key ON telematics_data "
+        "(vehicle_id, \"timestamp\", COALESCE(packet_id, ''), COALESCE(event_type, ''))"
+    ))
+    add_telematics_range_indexes(conn)
+    
+    bounds = conn.execute(text(
+        "SELECT min(\"timestamp\")::timestamp, max(\"timestamp\")::timestamp FROM telematics_data_unpartitioned"
+    )).first()
+    if bounds[0] is not None:
+        TelematicsPartitions.create_partitions(conn, TelematicsPartitions.months_between(*bounds))
+    conn.execute(text("INSERT INTO telematics_data SELECT * FROM telematics_data_unpartitioned"))
+    conn.execute(text("DROP TABLE telematics_data_unpartitioned"))
+
+@migration(6, 'hourly and daily per-vehicle telemetry rollups')
+def backfill_telematics_rollups(conn):
+    """create_all has already created the (empty) rollup tables; fill them from existing telemetry"""
+    from database.rollups import TelematicsRollups
+    TelematicsRollups.rebuild(conn)
+
+@migration(7, 'rebucket telemetry rollups on UTC boundaries')
+def rebucket_telematics_rollups_utc(conn):
+    """Buckets used to follow the session time zone; recompute them in UTC"""
+    from database.rollups import TelematicsRollups
+    TelematicsRollups.rebuild(conn)
+
+def applied_versions(conn) -> List[int]:
+    conn.execute(text(SCHEMA_MIGRATIONS_DDL))
+    return [row[0] for row in conn.execute(text("SELECT version FROM schema_migrations ORDER BY version"))]
+
+def pending_migrations(bind) -> List[Migration]:
+    """Migrations not yet recorded in schema_migrations"""
+    if bind.dialect.name != 'postgresql':
+        return []
+    with bind.begin() as conn:
+        applied = set(applied_versions(conn))
+    return [m for m in MIGRATIONS if m.version not in applied]
+
+def run_migrations(bind) -> List[int]:
+    """Apply pending migrations in order, each in its own transaction; returns applied versions.
+
+    create_all only creates missing tables, so existing PostgreSQL databases
+    reach the current model through these steps. Every step is idempotent,
+    which also lets a freshly created schema simply record them as applied.
+    """
+    if bind.dialect.name != 'postgresql':
+        return []
+    applied_now = []
+    for m in pending_migrations(bind):
+        with bind.begin() as conn:
+            conn.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {'lock_id': MIGRATION_LOCK_ID})
+            # Re-check under the lock: another instance may have applied it meanwhile
+            if m.version in applied_versions(conn):
+                continue
+            m.upgrade(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, description) VALUES (:version, :description)"),
+                {'version': m.version, 'description': m.description}
+            )
+            applied_now.append(m.version)
+            print(f"Applied migration {m.version}: {m.description}")
+    return applied_now
+
+def main() -> int:
+    """Bring the configured database up to date and list its migrations"""
+    from database import connection
+    import database.models  # noqa: F401 - register the tables create_all should build
+    # initialize_database creates missing tables and applies pending migrations
+    if not connection.initialize_database():
+        print("❌ Database initialization failed")
+        return 1
+    if connection.engine.dialect.name != 'postgresql':
+        print("Migrations only apply to PostgreSQL databases")
+        return 0
+    with connection.engine.begin() as conn:
+        applied = set(applied_versions(conn))
+    for m in MIGRATIONS:
+        print(f"{'✅' if m.version in applied else '⏳'} {m.version}: {m.description}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,32 @@
 """
 Database models for fleet monitoring system
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey
-from sqlalchemy.orm import relationship
+import numpy as np
+from sqlalchemy import Column, Integer, SmallInteger, String, Float, REAL, DateTime, Boolean, Text, ForeignKey, Index
+from sqlalchemy.orm import declared_attr, relationship
 from sqlalchemy.sql import func
+from sqlalchemy.types import TypeDecorator
 from database.connection import Base
 
+class MicroDegrees(TypeDecorator):
+    """Coordinate stored as a 32-bit integer of micro-degrees (~0.1 m precision)"""
+    impl = Integer
+    cache_ok = True
+    SCALE = 1_000_000
+    
+    def process_bind_param(self, value, dialect):
+        if value is None or value != value:
+            return None
+        return int(round(value * self.SCALE))
+    
+    def process_result_value(self, value, dialect):
+        return None if value is None else value / self.SCALE
+    
+    @classmethod
+    def to_storage(cls, series):
+        """Vectorized bind conversion for bulk loads that bypass the ORM (COPY)"""
+        return np.round(series * cls.SCALE).astype('Int32')
+
 class Client(Base):
     """Client/Customer table"""
     __tablename__ = 'clients'
@@ -40,28 +61,29 @@ class TelematicsData(Base):
     """Main telematics data table - stores all GPS and sensor data"""
     __tablename__ = 'telematics_data'
     
-    id = Column(Integer, primary_key=True, index=True)
+    # Partitioned tables need the partition key in the primary key
+    id = Column(Integer, primary_key=True, autoincrement=True)
     
     # Basic identification
-    client_id = Column(Integer, ForeignKey('clients.id'), nullable=False, index=True)
-    vehicle_id = Column(Integer, ForeignKey('vehicles.id'), nullable=False, index=True)
-    plate = Column(String(20), nullable=False, index=True)
+    client_id = Column(Integer, ForeignKey('clients.id'), nullable=False)
+    vehicle_id = Column(Integer, ForeignKey('vehicles.id'), nullable=False)
+    plate = Column(String(20), nullable=False)
     asset_id = Column(String(50))
     
     # Timestamps
-    timestamp = Column(DateTime(timezone=True), nullable=False, index=True)
+    timestamp = Column(DateTime(timezone=True), primary_key=True)  # Partition key (monthly ranges)
     gprs_timestamp = Column(DateTime(timezone=True))
     
     # Location and GPS data
-    latitude = Column(Float)
-    longitude = Column(Float)
+    latitude = Column(MicroDegrees)
+    longitude = Column(MicroDegrees)
     location = Column(String(255))  # Localização formatted
     address = Column(Text)  # Endereço completo
     gps_quality = Column(Boolean, default=False)  # GPS signal quality
     gprs_quality = Column(Boolean, default=False)  # GPRS signal quality
     
     # Vehicle status
-    speed_kmh = Column(Float, default=0.0)  # Velocidade em km/h
+    speed_kmh = Column(REAL, default=0.0)  # Velocidade em km/h
     ignition = Column(String(10))  # D=Dirigindo, L=Ligado, etc.
     driver_name = Column(String(255))  # Motorista
     blocked = Column(Boolean, default=False)  # Bloqueado
@@ -74,12 +96,12 @@ class TelematicsData(Base):
     
     # Technical data
     packet_id = Column(String(50))  # ID do pacote
-    odometer_period_km = Column(Float, default=0.0)  # Odômetro do período
-    engine_hours_period = Column(String(20))  # Horímetro do período
-    engine_hours_total = Column(String(20))  # Horímetro embarcado
-    odometer_total_km = Column(Float, default=0.0)  # Odômetro embarcado
-    battery_level = Column(String(10))  # Nível da bateria
-    voltage = Column(Float)  # Tensão
+    odometer_period_km = Column(REAL, default=0.0)  # Odômetro do período
+    engine_hours_period = Column(Integer)  # Horímetro do período, em segundos
+    engine_hours_total = Column(Integer)  # Horímetro embarcado, em segundos
+    odometer_total_km = Column(Float, default=0.0)  # Odômetro embarcado (double: totais passam da precisão de real)
+    battery_level = Column(SmallInteger)  # Nível da bateria (%)
+    voltage = Column(REAL)  # Tensão
     image_url = Column(String(500))  # URL da imagem se disponível
     
     # Metadata
@@ -88,6 +110,64 @@ class TelematicsData(Base):
     # Relationships
     client = relationship("Client", back_populates="telematics_data")
     vehicle = relationship("Vehicle", back_populates="telematics_data")
+    
+    __table_args__ = (
+        # Natural key: the same position re-exported in another report is stored once
+        Index(
+            'uq_telematics_natural_key',
+            'vehicle_id', 'timestamp',
+            func.coalesce(packet_id, ''), func.coalesce(event_type, ''),
+            unique=True
+        ),
+        # Dashboard queries filter a vehicle or client over a time range
+        Index('ix_telematics_vehicle_timestamp', 'vehicle_id', 'timestamp'),
+        Index('ix_telematics_client_timestamp', 'client_id', 'timestamp'),
+        # Positions arrive roughly in time order, so a BRIN index serves range-only scans cheaply
+        Index('ix_telematics_timestamp_brin', 'timestamp', postgresql_using='brin'),
+        # One partition per month, created on ingest by TelematicsPartitions
+        {'postgresql_partition_by': 'RANGE ("timestamp")'},
+    )
+
+class TelematicsRollupColumns:
+    """Per-vehicle aggregates of one time bucket, maintained by TelematicsRollups on ingest"""
+
+    @declared_attr
+    def vehicle_id(cls):
+        return Column(Integer, ForeignKey('vehicles.id'), primary_key=True)
+
+    @declared_attr
+    def client_id(cls):
+        return Column(Integer, ForeignKey('clients.id'), primary_key=True)
+
+    bucket = Column(DateTime(timezone=True), primary_key=True)  # Início da hora/dia
+    records = Column(Integer, nullable=False, default=0)
+    speed_samples = Column(Integer, nullable=False, default=0)  # Registros com velocidade
+    speed_sum = Column(Float, nullable=False, default=0.0)
+    speed_min = Column(REAL)
+    speed_max = Column(REAL)
+    distance_km = Column(Float, nullable=False, default=0.0)  # Soma do odômetro do período
+    gps_count = Column(Integer, nullable=False, default=0)
+    gprs_count = Column(Integer, nullable=False, default=0)
+    ignition_on_count = Column(Integer, nullable=False, default=0)
+    speed_violation_count = Column(Integer, nullable=False, default=0)
+
+class TelematicsHourlyRollup(TelematicsRollupColumns, Base):
+    """Hourly per-vehicle telemetry aggregates"""
+    __tablename__ = 'telematics_hourly_rollup'
+
+    __table_args__ = (
+        Index('ix_telematics_hourly_rollup_client_bucket', 'client_id', 'bucket'),
+        Index('ix_telematics_hourly_rollup_bucket', 'bucket'),
+    )
+
+class TelematicsDailyRollup(TelematicsRollupColumns, Base):
+    """Daily per-vehicle telemetry aggregates"""
+    __tablename__ = 'telematics_daily_rollup'
+
+    __table_args__ = (
+        Index('ix_telematics_daily_rollup_client_bucket', 'client_id', 'bucket'),
+        Index('ix_telematics_daily_rollup_bucket', 'bucket'),
+    )
 
 class ProcessingHistory(Base):
     """Track CSV file processing history"""
@@ -102,9 +182,10 @@ class ProcessingHistory(Base):
     unique_clients = Column(Integer, default=0)
     date_range_start = Column(DateTime(timezone=True))
     date_range_end = Column(DateTime(timezone=True))
-    processing_status = Column(String(50), default='completed')  # completed, failed, processing
+    processing_status = Column(String(50), default='completed')  # completed, partial, failed, processing
     error_message = Column(Text)
     file_size_bytes = Column(Integer)
+    content_hash = Column(String(64), index=True)  # SHA-256 of the uploaded file
 
 class InsightData(Base):
     """Store generated insights and analysis results"""
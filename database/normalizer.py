@@ -0,0 +1,242 @@
+"""
+Column-wise normalization of vendor CSV frames into typed telematics batches
+"""
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+class TelematicsNormalizer:
+    """Turns raw position-report frames into the columnar batch consumed by the database layer"""
+
+    UNKNOWN_CLIENT = 'Cliente Desconhecido'
+
+    # Canonical column -> accepted headers (after whitespace normalization), in lookup order
+    COLUMN_ALIASES: Dict[str, List[str]] = {
+        'cliente': ['cliente', 'Cliente'],
+        'placa': ['placa', 'Placa'],
+        'ativo': ['ativo', 'Ativo'],
+        'data': ['data', 'Data'],
+        'data_gprs': ['data_gprs', 'Data (GPRS)'],
+        'velocidade_km': ['velocidade_km', 'Velocidade (Km)'],
+        'ignicao': ['ignicao', 'Ignição'],
+        'motorista': ['motorista', 'Motorista'],
+        'gps': ['gps', 'GPS'],
+        'gprs': ['gprs', 'Gprs'],
+        'localizacao': ['localizacao', 'Localização'],
+        'endereco': ['endereco', 'Endereço'],
+        'tipo_evento': ['tipo_evento', 'Tipo do Evento'],
+        'cerca': ['cerca', 'Cerca'],
+        'saida': ['saida', 'Saida'],
+        'entrada': ['entrada', 'Entrada'],
+        'pacote': ['pacote', 'Pacote'],
+        'odometro_periodo_km': ['odometro_periodo_km', 'Odômetro do período (Km)', 'Odômetro Período (Km)'],
+        'horimetro_periodo': ['horimetro_periodo', 'Horímetro do período', 'Horímetro Período'],
+        'horimetro_embarcado': ['horimetro_embarcado', 'Horímetro embarcado', 'Horímetro Embarcado'],
+        'odometro_embarcado_km': ['odometro_embarcado_km', 'Odômetro embarcado (Km)', 'Odômetro Embarcado (Km)'],
+        'bateria': ['bateria', 'Bateria'],
+        'imagem': ['imagem', 'Imagem'],
+        'tensao': ['tensao', 'Tensão'],
+        'bloqueado': ['bloqueado', 'Bloqueado'],
+    }
+
+    LATITUDE_ALIASES = ['latitude', 'Latitude']
+    LONGITUDE_ALIASES = ['longitude', 'Longitude']
+    LOCATION_ALIASES = ['localizacao', 'Localização', 'location', 'Location']
+
+    DATE_FIELDS = ['data', 'data_gprs']
+    FLOAT_FIELDS = ['velocidade_km', 'odometro_periodo_km', 'odometro_embarcado_km', 'tensao']
+    FLAG_FIELDS = ['gps', 'gprs', 'saida', 'entrada', 'bloqueado']
+    DURATION_FIELDS = ['horimetro_periodo', 'horimetro_embarcado']
+    PERCENT_FIELDS = ['bateria']
+    TEXT_FIELDS = ['ativo', 'ignicao', 'motorista', 'localizacao', 'endereco', 'tipo_evento',
+                   'cerca', 'pacote', 'imagem']
+
+    # Column order of the normalized batch
+    BATCH_COLUMNS = [
+        'cliente', 'placa', 'ativo', 'data', 'data_gprs', 'velocidade_km', 'ignicao', 'motorista',
+        'gps', 'gprs', 'localizacao', 'endereco', 'tipo_evento', 'cerca', 'saida', 'entrada',
+        'pacote', 'odometro_periodo_km', 'horimetro_periodo', 'horimetro_embarcado',
+        'odometro_embarcado_km', 'bateria', 'imagem', 'tensao', 'bloqueado', 'latitude', 'longitude'
+    ]
+
+    DATE_FORMAT = '%d/%m/%Y %H:%M:%S'
+
+    @staticmethod
+    def normalize_headers(columns) -> List[str]:
+        """Collapse repeated and surrounding whitespace in header names"""
+        return [' '.join(str(col).strip().split()) for col in columns]
+
+    @staticmethod
+    def _pick(df: pd.DataFrame, aliases: List[str]) -> Optional[pd.Series]:
+        """Coalesce the first non-empty value across the alias columns present in df"""
+        result = None
+        for alias in aliases:
+            if alias not in df.columns:
+                continue
+            column = df[alias]
+            if isinstance(column, pd.DataFrame):
+                column = column.iloc[:, 0]
+            if result is None:
+                result = column
+            else:
+                empty = result.isna() | (result.astype(str).str.strip() == '')
+                if empty.any():
+                    result = result.where(~empty, column)
+        return result
+
+    @staticmethod
+    def parse_dates(series: pd.Series) -> pd.Series:
+        """Parse Brazilian day-first timestamps for a whole column (invalid -> NaT)"""
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return series
+        text = series.astype('string').str.strip()
+        parsed = pd.to_datetime(text, format=TelematicsNormalizer.DATE_FORMAT, errors='coerce')
+        # Fall back to per-value inference only for cells outside the vendor format
+        retry = parsed.isna() & text.notna() & (text != '')
+        if retry.any():
+            parsed[retry] = pd.to_datetime(text[retry], errors='coerce', dayfirst=True, format='mixed')
+        return parsed
+
+    @staticmethod
+    def to_float(series: pd.Series) -> pd.Series:
+        """Convert a column to float, mapping blanks, '-' and 'X, X, X, X' markers to 0.0"""
+        if pd.api.types.is_bool_dtype(series):
+            return series.astype('float64')
+        if pd.api.types.is_numeric_dtype(series):
+            return series.astype('float64').fillna(0.0)
+        text = series.astype(str).str.strip()
+        # Special values like 'X, X, X, X' and '-' become zero
+        skip = series.isna() | (text == '') | (text == '-') | text.str.contains('x', case=False, regex=False)
+        cleaned = text.str.replace(r'[^0-9.\-]', '', regex=True)
+        values = pd.to_numeric(cleaned.where(~skip), errors='coerce')
+        return values.fillna(0.0).astype('float64')
+
+    @staticmethod
+    def to_int(series: pd.Series) -> pd.Series:
+        """Convert a column to int, mapping blanks and 'X, X, X, X' markers to 0"""
+        if pd.api.types.is_bool_dtype(series):
+            return series.astype('int64')
+        if pd.api.types.is_numeric_dtype(series):
+            values = series.astype('float64')
+        else:
+            text = series.astype(str).str.strip()
+            # Special values like 'X, X, X, X' (or anything with a comma) become zero
+            skip = series.isna() | text.str.contains('x', case=False, regex=False) | text.str.contains(',', regex=False)
+            values = pd.to_numeric(text.where(~skip), errors='coerce').astype('float64')
+        values = values.where(np.isfinite(values), 0.0)
+        return np.trunc(values).astype('int64')
+
+    @staticmethod
+    def to_seconds(series: pd.Series) -> pd.Series:
+        """Convert 'HH:MM:SS' / 'HH:MM' / 'HH' durations to whole seconds (invalid -> <NA>)"""
+        if pd.api.types.is_numeric_dtype(series):
+            # Bare numbers are hours, like a single-part 'HH' value
+            return np.round(series.astype('float64') * 3600).astype('Int64')
+        text = series.astype('string').str.strip()
+        parts = text.str.extract(r'^(\d+)(?::(\d{1,2}))?(?::(\d{1,2}))?$').astype('float64')
+        seconds = parts[0] * 3600 + parts[1].fillna(0) * 60 + parts[2].fillna(0)
+        return seconds.astype('Int64')
+
+    @staticmethod
+    def to_percent(series: pd.Series) -> pd.Series:
+        """Convert '43 %' style readings to whole percentages (invalid -> <NA>)"""
+        if pd.api.types.is_numeric_dtype(series):
+            values = series.astype('float64')
+        else:
+            text = series.astype('string').str.strip()
+            values = pd.to_numeric(text.str.extract(r'^(\d+(?:\.\d+)?)\s*%?$')[0], errors='coerce')
+        return np.round(values).astype('Int16')
+
+    @staticmethod
+    def to_text(series: Optional[pd.Series], index) -> pd.Series:
+        """Keep raw text values, with missing cells as None"""
+        if series is None:
+            return pd.Series(None, index=index, dtype=object)
+        return series.astype(object).where(series.notna(), None)
+
+    @staticmethod
+    def extract_coordinates(df: pd.DataFrame):
+        """Extract latitude/longitude from direct columns or the 'lat,lon' location field"""
+        n = TelematicsNormalizer
+        lat = n._pick(df, n.LATITUDE_ALIASES)
+        lon = n._pick(df, n.LONGITUDE_ALIASES)
+        lat = n.to_float(lat) if lat is not None else pd.Series(0.0, index=df.index)
+        lon = n.to_float(lon) if lon is not None else pd.Series(0.0, index=df.index)
+
+        # Direct latitude/longitude columns win when they hold valid, non-zero values
+        direct = (lat != 0.0) & (lon != 0.0) & lat.between(-90, 90) & lon.between(-180, 180)
+        result_lat = lat.where(direct)
+        result_lon = lon.where(direct)
+
+        location = n._pick(df, n.LOCATION_ALIASES)
+        if location is not None:
+            text = location.astype(str).str.strip()
+            has_comma = location.notna() & text.str.contains(',', regex=False)
+            text = text.str.replace('(', '', regex=False).str.replace(')', '', regex=False).str.strip()
+            single_pair = text.str.count(',') == 1
+            parts = text.str.partition(',')
+            parsed_lat = pd.to_numeric(parts[0].str.strip(), errors='coerce')
+            parsed_lon = pd.to_numeric(parts[2].str.strip(), errors='coerce')
+            valid = (
+                has_comma & single_pair
+                & parsed_lat.between(-90, 90) & parsed_lon.between(-180, 180)
+                # Reject clearly invalid coordinates like (0,0)
+                & ~((parsed_lat == 0.0) & (parsed_lon == 0.0))
+            )
+            from_location = ~direct & valid
+            result_lat = result_lat.where(~from_location, parsed_lat)
+            result_lon = result_lon.where(~from_location, parsed_lon)
+
+        # NaN marks invalid/missing coordinates (stored as NULL in DB)
+        return result_lat.astype('float64'), result_lon.astype('float64')
+
+    @staticmethod
+    def normalize(df: pd.DataFrame) -> pd.DataFrame:
+        """Normalize a raw CSV frame into the typed telematics batch.
+
+        Rows without a plate are dropped, missing clients fall back to
+        'Cliente Desconhecido' and invalid dates become NaT. Engine hours are
+        parsed to seconds and battery readings to percentages.
+        """
+        n = TelematicsNormalizer
+        raw = df.copy(deep=False)
+        raw.columns = n.normalize_headers(raw.columns)
+
+        placa = n._pick(raw, n.COLUMN_ALIASES['placa'])
+        if placa is None:
+            return pd.DataFrame(columns=n.BATCH_COLUMNS)
+        placa_text = placa.astype(str).str.strip()
+        keep = placa.notna() & (placa_text != '')
+        raw = raw[keep]
+
+        batch = pd.DataFrame(index=raw.index)
+        cliente = n._pick(raw, n.COLUMN_ALIASES['cliente'])
+        if cliente is None:
+            batch['cliente'] = n.UNKNOWN_CLIENT
+        else:
+            cliente_text = cliente.astype(str).str.strip()
+            unknown = cliente.isna() | (cliente_text == '')
+            batch['cliente'] = cliente_text.where(~unknown, n.UNKNOWN_CLIENT)
+        batch['placa'] = placa_text[keep]
+
+        for field in n.DATE_FIELDS:
+            values = n._pick(raw, n.COLUMN_ALIASES[field])
+            batch[field] = n.parse_dates(values) if values is not None else pd.NaT
+        for field in n.FLOAT_FIELDS:
+            values = n._pick(raw, n.COLUMN_ALIASES[field])
+            batch[field] = n.to_float(values) if values is not None else 0.0
+        for field in n.FLAG_FIELDS:
+            values = n._pick(raw, n.COLUMN_ALIASES[field])
+            batch[field] = n.to_int(values) if values is not None else 0
+        for field in n.DURATION_FIELDS:
+            values = n._pick(raw, n.COLUMN_ALIASES[field])
+            batch[field] = n.to_seconds(values) if values is not None else pd.Series(pd.NA, index=raw.index, dtype='Int64')
+        for field in n.PERCENT_FIELDS:
+            values = n._pick(raw, n.COLUMN_ALIASES[field])
+            batch[field] = n.to_percent(values) if values is not None else pd.Series(pd.NA, index=raw.index, dtype='Int16')
+        for field in n.TEXT_FIELDS:
+            batch[field] = n.to_text(n._pick(raw, n.COLUMN_ALIASES[field]), raw.index)
+
+        batch['latitude'], batch['longitude'] = n.extract_coordinates(raw)
+
+        return batch[n.BATCH_COLUMNS].reset_index(drop=True)
@@ -0,0 +1,133 @@
+"""
+Parallel ingestion of multiple CSV files with a process pool and bounded DB writers
+"""
+import io
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import pandas as pd
+from database.csv_sniffer import CSVSniffer
+from database.db_manager import DatabaseManager
+from database.normalizer import TelematicsNormalizer
+from database.services import FleetDatabaseService
+
+def _parse_and_normalize(source) -> pd.DataFrame:
+    """Worker process entry point: sniff, parse and normalize one CSV (path or raw bytes)"""
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    spec = CSVSniffer.sniff(source)
+    return TelematicsNormalizer.normalize(spec.read(source))
+
+class ParallelIngestor:
+    """Ingests independent CSV files concurrently.
+
+    Parsing and normalization run in `workers` separate processes; the
+    normalized batches are written by at most `writers` threads, each with its
+    own database connection. At most workers + writers files are in flight,
+    which bounds memory for large monthly batches. Files whose content hash
+    was already ingested are skipped without being parsed.
+    """
+
+    DEFAULT_WRITERS = 2
+
+    def __init__(self, workers: Optional[int] = None, writers: Optional[int] = None):
+        self.workers = max(1, workers or min(4, os.cpu_count() or 1))
+        self.writers = max(1, writers or self.DEFAULT_WRITERS)
+
+    @staticmethod
+    def _failure(error: Exception) -> Dict[str, Any]:
+        return {'success': False, 'error': str(error), 'records_processed': 0}
+
+    @staticmethod
+    def _record_failure(filename: str, file_size_bytes: int, content_hash: str, error: Exception) -> None:
+        """Keep files that could not be parsed visible in the processing history"""
+        try:
+            with FleetDatabaseService() as db:
+                db.save_processing_history(
+                    filename=filename,
+                    records_processed=0,
+                    processing_status='failed',
+                    error_message=str(error),
+                    file_size_bytes=file_size_bytes,
+                    content_hash=content_hash
+                )
+        except Exception as history_error:
+            print(f"Failed to record processing history for {filename}: {history_error}")
+
+    @staticmethod
+    def _write(batch: pd.DataFrame, filename: str, file_size_bytes: int, content_hash: str) -> Dict[str, Any]:
+        """Writer thread entry point: bulk load one normalized file"""
+        try:
+            return DatabaseManager._save_normalized_batch(
+                batch, filename, file_size_bytes=file_size_bytes, content_hash=content_hash
+            )
+        except Exception as e:
+            ParallelIngestor._record_failure(filename, file_size_bytes, content_hash, e)
+            return ParallelIngestor._failure(e)
+
+    def run(self, sources: List[Tuple[str, Any, int]],
+            progress_callback: Optional[Callable[[str, Dict[str, Any], int, int], None]] = None) -> List[Dict[str, Any]]:
+        """Ingest (filename, path-or-bytes, size_bytes) sources and return per-file results.
+
+        Results are in completion order and carry their 'filename'.
+
+        progress_callback(filename, result, completed, total) is called from the
+        calling thread as each file finishes, so it may safely update the UI.
+        """
+        total = len(sources)
+        results: List[Dict[str, Any]] = []
+
+        def finish(filename: str, result: Dict[str, Any]) -> None:
+            results.append({'filename': filename, **result})
+            if progress_callback:
+                progress_callback(filename, result, len(results), total)
+
+        # Files already ingested (or repeated in this batch) are skipped before parsing
+        hashes = [DatabaseManager.content_hash(source) for _, source, _ in sources]
+        try:
+            with FleetDatabaseService() as db:
+                seen = db.get_processed_hashes(list(set(hashes)))
+        except Exception as e:
+            print(f"Could not check previously processed files: {e}")
+            seen = set()
+
+        pending = []
+        for (filename, source, size), content_hash in zip(sources, hashes):
+            if content_hash in seen:
+                finish(filename, DatabaseManager._already_processed_result(filename))
+                continue
+            seen.add(content_hash)
+            pending.append((filename, source, size, content_hash))
+
+        # Spawned, not forked: the Streamlit server is multi-threaded and holds the
+        # connection pool, which a forked child would inherit mid-lock
+        spawn = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=spawn) as parsers, \
+                ThreadPoolExecutor(max_workers=self.writers) as writers:
+            parsing = {}
+            writing = {}
+
+            def refill():
+                while pending and len(parsing) + len(writing) < self.workers + self.writers:
+                    filename, source, size, content_hash = pending.pop(0)
+                    parsing[parsers.submit(_parse_and_normalize, source)] = (filename, size, content_hash)
+
+            refill()
+            while parsing or writing:
+                done, _ = wait(list(parsing) + list(writing), return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in parsing:
+                        filename, size, content_hash = parsing.pop(future)
+                        try:
+                            batch = future.result()
+                        except Exception as e:
+                            self._record_failure(filename, size, content_hash, e)
+                            finish(filename, self._failure(e))
+                            continue
+                        writing[writers.submit(self._write, batch, filename, size, content_hash)] = filename
+                    else:
+                        finish(writing.pop(future), future.result())
+                refill()
+
+        return results
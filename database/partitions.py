@@ -0,0 +1,153 @@
+"""
+Monthly range partitions of telematics_data
+"""
+import threading
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+import pandas as pd
+from sqlalchemy import text
+from database.rollups import TelematicsRollups
+
+class TelematicsPartitions:
+    """Creates, lists, archives and drops the monthly partitions of telematics_data.
+
+    Partition bounds are written without a time zone, so they are read in the
+    session time zone exactly like the naive timestamps loaded by COPY; the
+    connection pins that zone to UTC, the zone the rollups are bucketed in.
+    """
+
+    PARENT = 'telematics_data'
+    # Serializes concurrent writers creating the same month
+    LOCK_ID = 724216
+
+    _lock = threading.Lock()
+    _known = set()
+
+    @staticmethod
+    def partition_name(month: date) -> str:
+        return f"{TelematicsPartitions.PARENT}_{month:%Y_%m}"
+
+    @staticmethod
+    def next_month(month: date) -> date:
+        return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+    @staticmethod
+    def months_between(start, end) -> List[date]:
+        """First day of every month from start to end, inclusive"""
+        month = date(start.year, start.month, 1)
+        last = date(end.year, end.month, 1)
+        months = []
+        while month <= last:
+            months.append(month)
+            month = TelematicsPartitions.next_month(month)
+        return months
+
+    @staticmethod
+    def is_partitioned(conn) -> bool:
+        return bool(conn.execute(text(
+            "SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(:parent)"
+        ), {'parent': TelematicsPartitions.PARENT}).scalar())
+
+    @classmethod
+    def create_partitions(cls, conn, months: Iterable[date]) -> List[str]:
+        """CREATE the given month partitions if missing; returns their names"""
+        conn.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {'lock_id': cls.LOCK_ID})
+        names = []
+        for month in months:
+            following = cls.next_month(month)
+            name = cls.partition_name(month)
+            conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {cls.PARENT} "
+                f"FOR VALUES FROM ('{month:%Y-%m-%d} 00:00:00') TO ('{following:%Y-%m-%d} 00:00:00')"
+            ))
+            names.append(name)
+        return names
+
+    @classmethod
+    def ensure_for_timestamps(cls, bind, timestamps: pd.Series) -> None:
+        """Create the partitions needed to store these timestamps before they are loaded"""
+        if bind.dialect.name != 'postgresql':
+            return
+        timestamps = timestamps.dropna()
+        if timestamps.empty:
+            return
+
+        # One day of slack on each side covers session time-zone shifts around month boundaries
+        months = cls.months_between(timestamps.min() - timedelta(days=1), timestamps.max() + timedelta(days=1))
+        with cls._lock:
+            missing = [month for month in months if cls.partition_name(month) not in cls._known]
+        if not missing:
+            return
+
+        with bind.begin() as conn:
+            if not cls.is_partitioned(conn):
+                return
+            names = cls.create_partitions(conn, missing)
+        with cls._lock:
+            cls._known.update(names)
+
+    @classmethod
+    def list_partitions(cls, bind) -> List[Dict[str, Any]]:
+        """Month partitions with their bounds and estimated row counts"""
+        if bind.dialect.name != 'postgresql':
+            return []
+        with bind.connect() as conn:
+            rows = conn.execute(text(
+                "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples::bigint "
+                "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = to_regclass(:parent) ORDER BY c.relname"
+            ), {'parent': cls.PARENT}).all()
+        return [
+            {'partition': name, 'bounds': bounds, 'estimated_rows': max(int(rows_estimate), 0)}
+            for name, bounds, rows_estimate in rows
+        ]
+
+    @classmethod
+    def _detach(cls, conn, year: int, month: int) -> Optional[str]:
+        """Detach a month partition and drop its rollup buckets; returns its name if it was attached"""
+        first_day = date(year, month, 1)
+        name = cls.partition_name(first_day)
+        attached = conn.execute(text(
+            "SELECT 1 FROM pg_inherits WHERE inhparent = to_regclass(:parent) AND inhrelid = to_regclass(:name)"
+        ), {'parent': cls.PARENT, 'name': name}).first()
+        if not attached:
+            return None
+        conn.execute(text(f"ALTER TABLE {cls.PARENT} DETACH PARTITION {name}"))
+        following = cls.next_month(first_day)
+        TelematicsRollups.delete_between(
+            conn,
+            datetime(first_day.year, first_day.month, 1, tzinfo=timezone.utc),
+            datetime(following.year, following.month, 1, tzinfo=timezone.utc)
+        )
+        with cls._lock:
+            cls._known.discard(name)
+        return name
+
+    @classmethod
+    def archive_month(cls, bind, year: int, month: int) -> Optional[str]:
+        """Detach a month; its rows stay in a standalone table (e.g. for pg_dump) and leave all queries.
+
+        The table is renamed so a later upload of the same month gets a fresh
+        partition; the archive table name is returned.
+        """
+        with bind.begin() as conn:
+            name = cls._detach(conn, year, month)
+            if not name:
+                return None
+            archive = f"{name}_archived_{datetime.now():%Y%m%d%H%M%S}"
+            conn.execute(text(f"ALTER TABLE {name} RENAME TO {archive}"))
+            # A standalone copy must not keep clients/vehicles from being cleared
+            for (constraint,) in conn.execute(text(
+                "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(:archive) AND contype = 'f'"
+            ), {'archive': archive}).all():
+                conn.execute(text(f'ALTER TABLE {archive} DROP CONSTRAINT "{constraint}"'))
+            return archive
+
+    @classmethod
+    def drop_month(cls, bind, year: int, month: int) -> Optional[str]:
+        """Detach and drop a month in constant time instead of a row-by-row DELETE"""
+        with bind.begin() as conn:
+            name = cls._detach(conn, year, month)
+            if name:
+                conn.execute(text(f"DROP TABLE {name}"))
+            return name
@@ -0,0 +1,101 @@
+"""
+Hourly and daily per-vehicle rollups of telematics_data
+"""
+from datetime import datetime
+from sqlalchemy import text
+from database.connection import as_utc
+
+class TelematicsRollups:
+    """Maintains telematics_hourly_rollup and telematics_daily_rollup.
+
+    Ingestion feeds only the rows it actually inserted (RETURNING of the
+    natural-key insert), so each load touches just its own buckets and
+    duplicates are never counted twice. Sums and counts are added, min/max
+    are combined with LEAST/GREATEST. Buckets start on UTC hour/day
+    boundaries whatever the session time zone, like the UTC timestamps
+    DataAnalyzer groups in memory.
+    """
+
+    # date_trunc unit -> rollup table
+    TABLES = {
+        'hour': 'telematics_hourly_rollup',
+        'day': 'telematics_daily_rollup',
+    }
+
+    # Same limit DataAnalyzer uses for speed compliance
+    SPEED_LIMIT_KMH = 80
+
+    # telematics_data columns the aggregates are computed from
+    SOURCE_COLUMNS = (
+        'vehicle_id, client_id, "timestamp", speed_kmh, odometer_period_km, '
+        'gps_quality, gprs_quality, ignition'
+    )
+
+    AGGREGATES = (
+        # real columns are summed in double precision (sum(real) would return real)
+        'count(*), count(speed_kmh), COALESCE(sum(speed_kmh::float8), 0), min(speed_kmh), max(speed_kmh), '
+        'COALESCE(sum(odometer_period_km::float8), 0), '
+        'count(*) FILTER (WHERE gps_quality), count(*) FILTER (WHERE gprs_quality), '
+        "count(*) FILTER (WHERE ignition LIKE 'L%'), "  # L=Ligada / LM / LP; D=Desligada
+        'count(*) FILTER (WHERE speed_kmh > {limit})'
+    )
+
+    ROLLUP_COLUMNS = (
+        'vehicle_id, client_id, bucket, records, speed_samples, speed_sum, speed_min, speed_max, '
+        'distance_km, gps_count, gprs_count, ignition_on_count, speed_violation_count'
+    )
+
+    ACCUMULATE = (
+        'records = r.records + EXCLUDED.records, '
+        'speed_samples = r.speed_samples + EXCLUDED.speed_samples, '
+        'speed_sum = r.speed_sum + EXCLUDED.speed_sum, '
+        'speed_min = LEAST(r.speed_min, EXCLUDED.speed_min), '
+        'speed_max = GREATEST(r.speed_max, EXCLUDED.speed_max), '
+        'distance_km = r.distance_km + EXCLUDED.distance_km, '
+        'gps_count = r.gps_count + EXCLUDED.gps_count, '
+        'gprs_count = r.gprs_count + EXCLUDED.gprs_count, '
+        'ignition_on_count = r.ignition_on_count + EXCLUDED.ignition_on_count, '
+        'speed_violation_count = r.speed_violation_count + EXCLUDED.speed_violation_count'
+    )
+
+    @staticmethod
+    def is_maintained(bind) -> bool:
+        """Only the PostgreSQL COPY path feeds the rollups; other databases must read telematics_data"""
+        return bind.dialect.name == 'postgresql'
+
+    @classmethod
+    def aggregate_sql(cls, unit: str, source: str) -> str:
+        """INSERT ... SELECT ... GROUP BY adding the rows of `source` to the `unit` rollup"""
+        return (
+            f"INSERT INTO {cls.TABLES[unit]} AS r ({cls.ROLLUP_COLUMNS}) "
+            f"SELECT vehicle_id, client_id, "
+            f"date_trunc('{unit}', \"timestamp\" AT TIME ZONE 'UTC') AT TIME ZONE 'UTC', "
+            f"{cls.AGGREGATES.format(limit=cls.SPEED_LIMIT_KMH)} "
+            # Sorted so concurrent writers lock shared buckets in the same order
+            f"FROM {source} GROUP BY 1, 2, 3 ORDER BY 1, 2, 3 "
+            f"ON CONFLICT (vehicle_id, client_id, bucket) DO UPDATE SET {cls.ACCUMULATE}"
+        )
+
+    @classmethod
+    def accumulate_ctes(cls, source: str) -> str:
+        """WITH items that add the rows of CTE `source` to every rollup in the same statement"""
+        return ', '.join(
+            f"{unit}_rollup AS ({cls.aggregate_sql(unit, source)})" for unit in cls.TABLES
+        )
+
+    @classmethod
+    def rebuild(cls, conn) -> None:
+        """Recompute every rollup from telematics_data"""
+        for unit, table in cls.TABLES.items():
+            conn.execute(text(f"DELETE FROM {table}"))
+            conn.execute(text(cls.aggregate_sql(unit, 'telematics_data')))
+
+    @classmethod
+    def delete_between(cls, conn, start: datetime, end: datetime) -> None:
+        """Remove the buckets in [start, end), e.g. after a month partition was dropped or archived.
+
+        Naive bounds are UTC, like the bucket boundaries, whatever the session time zone.
+        """
+        bounds = {'start': as_utc(start), 'end': as_utc(end)}
+        for table in cls.TABLES.values():
+            conn.execute(text(f"DELETE FROM {table} WHERE bucket >= :start AND bucket < :end"), bounds)
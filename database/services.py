@@ -1,15 +1,22 @@
 """
 Database service layer for fleet monitoring operations
 """
-from typing import List, Optional, Dict, Any, Tuple
+import io
+from typing import List, Optional, Dict, Any, Tuple, Union
 from datetime import datetime, timedelta
 import pandas as pd
+from pandas.api.types import union_categoricals
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_, Integer
-from database.connection import get_db_session, close_db_session, initialize_database
+from sqlalchemy import func, and_, or_, case, cast, distinct, extract, select, Date, Float, Integer
+from database.connection import get_db_session, close_db_session, initialize_database, as_utc
+from database.dataset_cache import DatasetCache
+from database.dimensions import DimensionResolver
+from database.partitions import TelematicsPartitions
+from database.rollups import TelematicsRollups
 from database.models import (
     Client, Vehicle, TelematicsData, ProcessingHistory, 
-    InsightData, AlertConfiguration
+    InsightData, AlertConfiguration, MicroDegrees,
+    TelematicsHourlyRollup, TelematicsDailyRollup
 )
 
 class FleetDatabaseService:
@@ -17,11 +24,14 @@ class FleetDatabaseService:
     
     def __init__(self):
         self.session = None
+        self.dimensions = None
+        self.last_save_stats = {'saved': 0, 'failed': 0, 'duplicates': 0}
     
     def __enter__(self):
         if not initialize_database():
             raise Exception("Falha ao conectar com a base de dados")
         self.session = get_db_session()
+        self.dimensions = DimensionResolver(self.session)
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
@@ -69,178 +79,169 @@ class FleetDatabaseService:
         return self.session.query(Vehicle).all()
     
     # Telematics data operations
-    def save_telematics_data_with_progress(self, data_records: List[Dict[str, Any]], progress_callback=None) -> int:
-        """Save multiple telematics data records with progress callback"""
-        records_saved = 0
-        records_failed = 0
-        total_records = len(data_records)
+    # telematics_data column -> normalized batch column for bulk loading
+    TELEMATICS_COPY_COLUMNS = {
+        'plate': 'placa',
+        'asset_id': 'ativo',
+        'timestamp': 'data',
+        'gprs_timestamp': 'data_gprs',
+        'latitude': 'latitude',
+        'longitude': 'longitude',
+        'location': 'localizacao',
+        'address': 'endereco',
+        'speed_kmh': 'velocidade_km',
+        'ignition': 'ignicao',
+        'driver_name': 'motorista',
+        'event_type': 'tipo_evento',
+        'geofence': 'cerca',
+        'packet_id': 'pacote',
+        'odometer_period_km': 'odometro_periodo_km',
+        'engine_hours_period': 'horimetro_periodo',
+        'engine_hours_total': 'horimetro_embarcado',
+        'odometer_total_km': 'odometro_embarcado_km',
+        'battery_level': 'bateria',
+        'voltage': 'tensao',
+        'image_url': 'imagem',
+    }
+    
+    # telematics_data boolean column -> normalized 0/1 flag column
+    TELEMATICS_FLAG_COLUMNS = {
+        'gps_quality': 'gps',
+        'gprs_quality': 'gprs',
+        'blocked': 'bloqueado',
+        'entry': 'entrada',
+        'exit': 'saida',
+    }
+    
+    BULK_CHUNK_SIZE = 10000
+    
+    def _telematics_frame(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Map a normalized batch chunk onto telematics_data columns"""
+        client_ids, vehicle_ids = self.dimensions.resolve(chunk)
+        frame = pd.DataFrame({'client_id': client_ids, 'vehicle_id': vehicle_ids})
+        for column, source in self.TELEMATICS_COPY_COLUMNS.items():
+            frame[column] = chunk[source]
+        for column, source in self.TELEMATICS_FLAG_COLUMNS.items():
+            frame[column] = chunk[source] == 1
+        return frame
+    
+    # Natural key used to skip rows that were already loaded by an earlier export
+    TELEMATICS_NATURAL_KEY = '(vehicle_id, "timestamp", COALESCE(packet_id, \'\'), COALESCE(event_type, \'\'))'
+    
+    def _copy_telematics(self, frame: pd.DataFrame) -> int:
+        """Load rows into telematics_data, skipping natural-key duplicates; returns rows inserted.
         
-        # Process in batches to avoid memory issues
-        batch_size = 50  # Smaller batch for more frequent progress updates
-        for i in range(0, total_records, batch_size):
-            batch = data_records[i:i + batch_size]
-            batch_saved = 0
-            
-            try:
-                for record in batch:
-                    try:
-                        # Validate timestamp before processing
-                        timestamp = record.get('data')
-                        if timestamp is None or pd.isna(timestamp):
-                            records_failed += 1
-                            continue
-                        
-                        # Get or create client and vehicle
-                        client = self.get_or_create_client(record['cliente'])
-                        vehicle = self.get_or_create_vehicle(
-                            record['placa'], 
-                            client.id, 
-                            record.get('ativo')
-                        )
-                        
-                        # Create telematics data record
-                        telematics = TelematicsData(
-                            client_id=client.id,
-                            vehicle_id=vehicle.id,
-                            plate=record['placa'],
-                            asset_id=record.get('ativo'),
-                            timestamp=timestamp,
-                            gprs_timestamp=record.get('data_gprs'),
-                            latitude=record.get('latitude'),
-                            longitude=record.get('longitude'),
-                            location=record.get('localizacao'),
-                            address=record.get('endereco'),
-                            gps_quality=record.get('gps', 0) == 1,
-                            gprs_quality=record.get('gprs', 0) == 1,
-                            speed_kmh=record.get('velocidade_km', 0.0),
-                            ignition=record.get('ignicao'),
-                            driver_name=record.get('motorista'),
-                            blocked=record.get('bloqueado', 0) == 1,
-                            event_type=record.get('tipo_evento'),
-                            geofence=record.get('cerca'),
-                            entry=record.get('entrada', 0) == 1,
-                            exit=record.get('saida', 0) == 1,
-                            packet_id=record.get('pacote'),
-                            odometer_period_km=record.get('odometro_periodo_km', 0.0),
-                            odometer_total_km=record.get('odometro_embarcado_km', 0.0),
-                            engine_hours_period=record.get('horimetro_periodo'),
-                            engine_hours_total=record.get('horimetro_embarcado'),
-                            battery_level=record.get('bateria'),
-                            voltage=record.get('tensao'),
-                            image_url=record.get('imagem')
-                        )
-                        
-                        self.session.add(telematics)
-                        batch_saved += 1
-                        records_saved += 1
-                        
-                        # Report progress every 10 records within batch
-                        if progress_callback and records_saved % 10 == 0:
-                            progress_callback(records_saved, total_records, "inserindo")
-                        
-                    except Exception as record_error:
-                        records_failed += 1
-                        print(f"Failed to save record: {str(record_error)[:200]}")
-                        continue
-                
-                # Commit the batch
-                self.session.commit()
-                
-                # Report progress after each batch
-                if progress_callback:
-                    progress_callback(records_saved, total_records, "inserindo")
-                
-            except Exception as batch_error:
-                self.session.rollback()
-                records_failed += batch_size
-                print(f"Batch failed: {str(batch_error)[:200]}")
-                continue
+        On PostgreSQL the rows are streamed with COPY FROM STDIN into a temporary
+        staging table and moved with INSERT ... SELECT ... ON CONFLICT DO NOTHING;
+        the same statement adds the inserted rows to the hourly/daily rollups.
+        Missing month partitions are created first.
+        """
+        TelematicsPartitions.ensure_for_timestamps(self.session.get_bind(), frame['timestamp'])
+        connection = self.session.connection()
+        if connection.dialect.name != 'postgresql':
+            rows = frame.astype(object).where(frame.notna(), None).to_dict('records')
+            stmt = TelematicsData.__table__.insert().prefix_with('OR IGNORE', dialect='sqlite')
+            return connection.execute(stmt, rows).rowcount
         
-        print(f"Batch insertion completed: {records_saved} saved, {records_failed} failed")
-        return records_saved
+        # COPY bypasses column types, so apply the micro-degree storage scale here
+        frame = frame.assign(
+            latitude=MicroDegrees.to_storage(frame['latitude']),
+            longitude=MicroDegrees.to_storage(frame['longitude'])
+        )
+        buffer = io.StringIO()
+        frame.to_csv(buffer, index=False, header=False, date_format='%Y-%m-%d %H:%M:%S')
+        buffer.seek(0)
+        columns = ', '.join(f'"{column}"' for column in frame.columns)
+        with connection.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TEMP TABLE telematics_staging ON COMMIT DROP AS "
+                f"SELECT {columns} FROM telematics_data WITH NO DATA"
+            )
+            cursor.copy_expert(f"COPY telematics_staging ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+            cursor.execute(
+                f"WITH inserted AS ("
+                f"INSERT INTO telematics_data ({columns}) SELECT {columns} FROM telematics_staging "
+                f"ON CONFLICT {self.TELEMATICS_NATURAL_KEY} DO NOTHING "
+                f"RETURNING {TelematicsRollups.SOURCE_COLUMNS}), "
+                f"{TelematicsRollups.accumulate_ctes('inserted')} "
+                f"SELECT count(*) FROM inserted"
+            )
+            return cursor.fetchone()[0]
     
-    def save_telematics_data(self, data_records: List[Dict[str, Any]]) -> int:
-        """Save multiple telematics data records with proper error handling"""
+    def save_telematics_data_with_progress(self, batch: pd.DataFrame, progress_callback=None) -> int:
+        """Bulk load a normalized telematics batch with progress callback.
+        
+        Counts of the call are kept in self.last_save_stats (saved, failed, duplicates).
+        """
         records_saved = 0
         records_failed = 0
+        records_duplicated = 0
+        total_records = len(batch)
+        
+        # Records without a valid timestamp cannot be stored
+        valid = batch['data'].notna()
+        records_failed += int((~valid).sum())
+        batch = batch[valid]
         
-        # Process in batches to avoid memory issues
-        batch_size = 100
-        for i in range(0, len(data_records), batch_size):
-            batch = data_records[i:i + batch_size]
-            batch_saved = 0
+        for i in range(0, len(batch), self.BULK_CHUNK_SIZE):
+            chunk = batch.iloc[i:i + self.BULK_CHUNK_SIZE]
             
             try:
-                for record in batch:
-                    try:
-                        # Validate timestamp before processing
-                        timestamp = record.get('data')
-                        if timestamp is None or pd.isna(timestamp):
-                            records_failed += 1
-                            continue
-                        
-                        # Get or create client and vehicle
-                        client = self.get_or_create_client(record['cliente'])
-                        vehicle = self.get_or_create_vehicle(
-                            record['placa'], 
-                            client.id, 
-                            record.get('ativo')
-                        )
-                        
-                        # Create telematics data record
-                        telematics = TelematicsData(
-                            client_id=client.id,
-                            vehicle_id=vehicle.id,
-                            plate=record['placa'],
-                            asset_id=record.get('ativo'),
-                            timestamp=timestamp,
-                            gprs_timestamp=record.get('data_gprs'),
-                            latitude=record.get('latitude'),
-                            longitude=record.get('longitude'),
-                            location=record.get('localizacao'),
-                            address=record.get('endereco'),
-                            gps_quality=record.get('gps', 0) == 1,
-                            gprs_quality=record.get('gprs', 0) == 1,
-                            speed_kmh=record.get('velocidade_km', 0.0),
-                            ignition=record.get('ignicao'),
-                            driver_name=record.get('motorista'),
-                            blocked=record.get('bloqueado', 0) == 1,
-                            event_type=record.get('tipo_evento'),
-                            geofence=record.get('cerca'),
-                            entry=record.get('entrada', 0) == 1,
-                            exit=record.get('saida', 0) == 1,
-                            packet_id=record.get('pacote'),
-                            odometer_period_km=record.get('odometro_periodo_km', 0.0),
-                            engine_hours_period=record.get('horimetro_periodo'),
-                            engine_hours_total=record.get('horimetro_embarcado'),
-                            odometer_total_km=record.get('odometro_embarcado_km', 0.0),
-                            battery_level=record.get('bateria'),
-                            voltage=record.get('tensao'),
-                            image_url=record.get('imagem')
-                        )
-                        
-                        self.session.add(telematics)
-                        batch_saved += 1
-                        
-                    except Exception as e:
-                        # Log individual record error but continue processing
-                        print(f"Error processing record {record.get('placa', 'unknown')}: {str(e)}")
-                        records_failed += 1
-                        continue
-                
-                # Commit the batch
+                inserted = self._copy_telematics(self._telematics_frame(chunk))
                 self.session.commit()
-                records_saved += batch_saved
+                if inserted:
+                    DatasetCache.bump()
+                records_saved += inserted
+                records_duplicated += len(chunk) - inserted
                 
-            except Exception as e:
-                # If batch commit fails, rollback and mark all batch records as failed
-                print(f"Error committing batch {i//batch_size + 1}: {str(e)}")
+            except Exception as chunk_error:
+                # If the chunk fails, rollback and mark all chunk records as failed
                 self.session.rollback()
-                records_failed += len(batch)
+                records_failed += len(chunk)
+                print(f"Batch failed: {str(chunk_error)[:200]}")
+            
+            # Report progress after each chunk
+            if progress_callback:
+                progress_callback(records_saved + records_duplicated, total_records, "inserindo")
         
-        print(f"Migration complete: {records_saved} saved, {records_failed} failed")
+        self.last_save_stats = {'saved': records_saved, 'failed': records_failed, 'duplicates': records_duplicated}
+        print(f"Batch insertion completed: {records_saved} saved, {records_duplicated} duplicates skipped, {records_failed} failed")
         return records_saved
     
+    def save_telematics_data(self, batch: pd.DataFrame) -> int:
+        """Bulk load a normalized telematics batch"""
+        return self.save_telematics_data_with_progress(batch)
+    
+    @staticmethod
+    def ingestion_status(records_read: int, records_saved: int, records_duplicated: int) -> str:
+        """History status of a load: 'completed' only when every row read is now stored.
+        
+        Files with rows that failed to load are 'partial', which keeps them out of
+        get_processed_hashes so a re-upload can bring in the missing rows.
+        """
+        return 'completed' if records_saved + records_duplicated >= records_read else 'partial'
+    
+    @staticmethod
+    def _telematics_filters(client_id: Optional[int] = None,
+                            vehicle_id: Optional[int] = None,
+                            plate: Optional[str] = None,
+                            start_date: Optional[datetime] = None,
+                            end_date: Optional[datetime] = None) -> list:
+        """WHERE conditions shared by the ORM and DataFrame telemetry queries"""
+        conditions = []
+        if client_id:
+            conditions.append(TelematicsData.client_id == client_id)
+        if vehicle_id:
+            conditions.append(TelematicsData.vehicle_id == vehicle_id)
+        if plate:
+            conditions.append(TelematicsData.plate == plate)
+        # Naive bounds are UTC, as in the rollup profiles
+        if start_date:
+            conditions.append(TelematicsData.timestamp >= as_utc(start_date))
+        if end_date:
+            conditions.append(TelematicsData.timestamp <= as_utc(end_date))
+        return conditions
+    
     def get_telematics_data(self, 
                            client_id: Optional[int] = None,
                            vehicle_id: Optional[int] = None,
@@ -249,18 +250,9 @@ class FleetDatabaseService:
                            end_date: Optional[datetime] = None,
                            limit: Optional[int] = None) -> List[TelematicsData]:
         """Get telematics data with filters"""
-        query = self.session.query(TelematicsData)
-        
-        if client_id:
-            query = query.filter(TelematicsData.client_id == client_id)
-        if vehicle_id:
-            query = query.filter(TelematicsData.vehicle_id == vehicle_id)
-        if plate:
-            query = query.filter(TelematicsData.plate == plate)
-        if start_date:
-            query = query.filter(TelematicsData.timestamp >= start_date)
-        if end_date:
-            query = query.filter(TelematicsData.timestamp <= end_date)
+        query = self.session.query(TelematicsData).filter(
+            *self._telematics_filters(client_id, vehicle_id, plate, start_date, end_date)
+        )
         
         query = query.order_by(TelematicsData.timestamp.desc())
         
@@ -269,83 +261,328 @@ class FleetDatabaseService:
         
         return query.all()
     
-    def get_telematics_dataframe(self, **filters) -> pd.DataFrame:
-        """Get telematics data as pandas DataFrame"""
-        data = self.get_telematics_data(**filters)
+    # DataFrame column (original CSV names, for compatibility) -> SQL expression
+    TELEMATICS_FRAME_COLUMNS = {
+        'cliente': Client.name,
+        'placa': TelematicsData.plate,
+        'ativo': TelematicsData.asset_id,
+        'data': TelematicsData.timestamp,
+        'data_gprs': TelematicsData.gprs_timestamp,
+        'velocidade_km': TelematicsData.speed_kmh,
+        'ignicao': TelematicsData.ignition,
+        'motorista': TelematicsData.driver_name,
+        'gps': func.coalesce(cast(TelematicsData.gps_quality, Integer), 0),
+        'gprs': func.coalesce(cast(TelematicsData.gprs_quality, Integer), 0),
+        'localizacao': TelematicsData.location,
+        'endereco': TelematicsData.address,
+        'tipo_evento': TelematicsData.event_type,
+        'cerca': TelematicsData.geofence,
+        'saida': func.coalesce(cast(TelematicsData.exit, Integer), 0),
+        'entrada': func.coalesce(cast(TelematicsData.entry, Integer), 0),
+        'pacote': TelematicsData.packet_id,
+        'odometro_periodo_km': TelematicsData.odometer_period_km,
+        'engine_hours_period': TelematicsData.engine_hours_period,
+        'engine_hours_total': TelematicsData.engine_hours_total,
+        'odometer_total_km': TelematicsData.odometer_total_km,
+        'battery_level': TelematicsData.battery_level,
+        'imagem': TelematicsData.image_url,
+        'tensao': TelematicsData.voltage,
+        'bloqueado': func.coalesce(cast(TelematicsData.blocked, Integer), 0),
+        'latitude': TelematicsData.latitude,
+        'longitude': TelematicsData.longitude,
+    }
+    
+    # Free-text columns left out of the default frame; request them through `columns`
+    TELEMATICS_OPTIONAL_COLUMNS = ['endereco']
+    
+    # Columns each panel renders, usable by name wherever `columns` is accepted
+    TELEMATICS_COLUMN_PROFILES = {
+        'analise': ['cliente', 'placa', 'data', 'velocidade_km', 'odometro_periodo_km',
+                    'gps', 'bloqueado', 'engine_hours_period'],
+        'mapa_rotas': ['cliente', 'placa', 'data', 'velocidade_km', 'motorista', 'latitude', 'longitude', 'endereco'],
+        'controle_operacional': ['cliente', 'placa', 'data', 'velocidade_km', 'ignicao',
+                                 'latitude', 'longitude', 'endereco'],
+        'alertas': ['placa', 'data', 'velocidade_km', 'battery_level', 'endereco'],
+    }
+    
+    # Compact in-memory dtypes. Low-cardinality text becomes categorical; real
+    # columns and short durations fit float32 exactly, while coordinates and
+    # embedded totals keep double precision. Flags are never NULL (coalesced).
+    TELEMATICS_FRAME_DTYPES = {
+        'cliente': 'category',
+        'placa': 'category',
+        'ativo': 'category',
+        'ignicao': 'category',
+        'motorista': 'category',
+        'tipo_evento': 'category',
+        'cerca': 'category',
+        'velocidade_km': 'float32',
+        'odometro_periodo_km': 'float32',
+        'engine_hours_period': 'float32',
+        'battery_level': 'float32',
+        'tensao': 'float32',
+        'engine_hours_total': 'float64',
+        'odometer_total_km': 'float64',
+        'latitude': 'float64',
+        'longitude': 'float64',
+        'gps': 'int8',
+        'gprs': 'int8',
+        'saida': 'int8',
+        'entrada': 'int8',
+        'bloqueado': 'int8',
+    }
+    
+    FETCH_CHUNK_ROWS = 50000
+    
+    @classmethod
+    def compact_frame(cls, chunks: List[pd.DataFrame]) -> pd.DataFrame:
+        """Concatenate fetched chunks into one frame with TELEMATICS_FRAME_DTYPES.
         
-        if not data:
-            return pd.DataFrame()
+        Each chunk is narrowed as soon as it arrives; categorical columns are
+        then given the union of their categories so concat keeps them categorical.
+        """
+        chunks = [
+            chunk.astype({column: dtype for column, dtype in cls.TELEMATICS_FRAME_DTYPES.items()
+                          if column in chunk.columns})
+            for chunk in chunks
+        ]
+        if len(chunks) == 1:
+            return chunks[0]
+        for column in chunks[0].columns:
+            if isinstance(chunks[0][column].dtype, pd.CategoricalDtype):
+                categories = union_categoricals([chunk[column] for chunk in chunks], sort_categories=True).categories
+                for chunk in chunks:
+                    chunk[column] = chunk[column].cat.set_categories(categories)
+        return pd.concat(chunks, ignore_index=True)
+    
+    @classmethod
+    def resolve_columns(cls, columns: Optional[Union[str, List[str]]] = None) -> List[str]:
+        """Frame columns for None (default set), a TELEMATICS_COLUMN_PROFILES name or a column list"""
+        if columns is None:
+            return [column for column in cls.TELEMATICS_FRAME_COLUMNS if column not in cls.TELEMATICS_OPTIONAL_COLUMNS]
+        if isinstance(columns, str):
+            if columns not in cls.TELEMATICS_COLUMN_PROFILES:
+                raise ValueError(f"Unknown column profile: {columns}")
+            return list(cls.TELEMATICS_COLUMN_PROFILES[columns])
+        columns = list(dict.fromkeys(columns))
+        unknown = [column for column in columns if column not in cls.TELEMATICS_FRAME_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown telematics columns: {unknown}")
+        return columns
+    
+    def get_telematics_dataframe(self, columns: Optional[Union[str, List[str]]] = None,
+                                 limit: Optional[int] = None, **filters) -> pd.DataFrame:
+        """Get telematics data as a compact pandas DataFrame.
         
-        # Convert to DataFrame with original column names for compatibility
-        records = []
-        for record in data:
-            records.append({
-                'cliente': record.client.name,
-                'placa': record.plate,
-                'ativo': record.asset_id,
-                'data': record.timestamp,
-                'data_gprs': record.gprs_timestamp,
-                'velocidade_km': record.speed_kmh,
-                'ignicao': record.ignition,
-                'motorista': record.driver_name,
-                'gps': 1 if record.gps_quality else 0,
-                'gprs': 1 if record.gprs_quality else 0,
-                'localizacao': record.location,
-                'endereco': record.address,
-                'tipo_evento': record.event_type,
-                'cerca': record.geofence,
-                'saida': 1 if record.exit else 0,
-                'entrada': 1 if record.entry else 0,
-                'pacote': record.packet_id,
-                'odometro_periodo_km': record.odometer_period_km,
-                'engine_hours_period': record.engine_hours_period,
-                'engine_hours_total': record.engine_hours_total,
-                'odometer_total_km': record.odometer_total_km,
-                'battery_level': record.battery_level,
-                'imagem': record.image_url,
-                'tensao': record.voltage,
-                'bloqueado': 1 if record.blocked else 0,
-                'latitude': record.latitude,
-                'longitude': record.longitude
-            })
+        Only the requested columns (a list or a TELEMATICS_COLUMN_PROFILES name;
+        TELEMATICS_FRAME_COLUMNS minus the optional free-text ones by default)
+        are selected, client names come from a single join, and rows are
+        streamed from a server-side cursor and narrowed to
+        TELEMATICS_FRAME_DTYPES chunk by chunk.
         
-        return pd.DataFrame(records)
-    
+        Rows come grouped by vehicle in time order, read along the
+        (vehicle_id, timestamp) index; this is the layout DataAnalyzer slices
+        by plate and date without re-sorting. With a limit, the most recent
+        rows are returned instead.
+        """
+        columns = self.resolve_columns(columns)
+        
+        stmt = select(*[self.TELEMATICS_FRAME_COLUMNS[column].label(column) for column in columns])
+        if 'cliente' in columns:
+            stmt = stmt.select_from(TelematicsData).join(Client, Client.id == TelematicsData.client_id)
+        stmt = stmt.where(*self._telematics_filters(**filters))
+        if limit:
+            stmt = stmt.order_by(TelematicsData.timestamp.desc()).limit(limit)
+        else:
+            stmt = stmt.order_by(TelematicsData.vehicle_id, TelematicsData.timestamp)
+        stmt = stmt.execution_options(stream_results=True)
+        
+        chunks = list(pd.read_sql(stmt, self.session.connection(), chunksize=self.FETCH_CHUNK_ROWS))
+        if not chunks or all(chunk.empty for chunk in chunks):
+            return pd.DataFrame()
+        return self.compact_frame(chunks)
+
+    # Aggregate grouping -> SQL expression (same buckets DataAnalyzer uses on DataFrames)
+    TELEMATICS_AGGREGATE_GROUPS = {
+        'placa': TelematicsData.plate,
+        'hora': cast(extract('hour', TelematicsData.timestamp), Integer),
+        'velocidade_km': TelematicsData.speed_kmh,
+        'faixa_velocidade': case(
+            (TelematicsData.speed_kmh == 0, 'Parado'),
+            (and_(TelematicsData.speed_kmh > 0, TelematicsData.speed_kmh <= 40), 'Baixa (1-40)'),
+            (and_(TelematicsData.speed_kmh > 40, TelematicsData.speed_kmh <= 60), 'Moderada (41-60)'),
+            (and_(TelematicsData.speed_kmh > 60, TelematicsData.speed_kmh <= 80), 'Alta (61-80)'),
+            (TelematicsData.speed_kmh > 80, 'Muito Alta (80+)'),
+            else_='Indefinido'
+        ),
+    }
+
+    def get_telematics_aggregates(self, group_by: Optional[str] = None, **filters) -> pd.DataFrame:
+        """Counts, means, maxima and sums of the filtered telemetry, computed by the database.
+
+        One row overall, or one per group of TELEMATICS_AGGREGATE_GROUPS;
+        used instead of loading raw rows when only aggregates are shown.
+        """
+        if group_by is not None and group_by not in self.TELEMATICS_AGGREGATE_GROUPS:
+            raise ValueError(f"Unknown telematics grouping: {group_by}")
+
+        aggregates = [
+            func.count().label('registros'),
+            func.count(distinct(TelematicsData.vehicle_id)).label('veiculos'),
+            func.count(TelematicsData.speed_kmh).label('velocidade_amostras'),
+            func.avg(TelematicsData.speed_kmh).label('velocidade_media'),
+            func.max(TelematicsData.speed_kmh).label('velocidade_maxima'),
+            func.coalesce(func.sum(cast(TelematicsData.odometer_period_km, Float)), 0).label('km'),
+            func.coalesce(func.sum(TelematicsData.engine_hours_period), 0).label('horimetro_segundos'),
+            func.avg(func.coalesce(cast(TelematicsData.gps_quality, Integer), 0)).label('gps'),
+            func.count().filter(TelematicsData.blocked).label('bloqueados'),
+            func.coalesce(func.bool_or(TelematicsData.blocked), False).label('algum_bloqueado'),
+            func.min(TelematicsData.timestamp).label('inicio'),
+            func.max(TelematicsData.timestamp).label('fim'),
+        ]
+        stmt = select(*aggregates).select_from(TelematicsData).where(*self._telematics_filters(**filters))
+        if group_by is not None:
+            key = self.TELEMATICS_AGGREGATE_GROUPS[group_by]
+            stmt = stmt.add_columns(key.label(group_by)).group_by(key).order_by(key)
+
+        df = pd.read_sql(stmt, self.session.connection())
+        for column in ('velocidade_media', 'velocidade_maxima', 'km', 'horimetro_segundos', 'gps'):
+            df[column] = pd.to_numeric(df[column])
+        return df
+
+    # Activity profile grouping -> (rollup model, bucket unit, group key expression).
+    # Keys are taken from the bucket in UTC, the zone the rollups are bucketed in.
+    ACTIVITY_PROFILES = {
+        'hora': (TelematicsHourlyRollup, 'h',
+                 cast(extract('hour', func.timezone('UTC', TelematicsHourlyRollup.bucket)), Integer)),
+        'data': (TelematicsDailyRollup, 'D', cast(func.timezone('UTC', TelematicsDailyRollup.bucket), Date)),
+        'dia_semana': (TelematicsDailyRollup, 'D',
+                       cast(extract('isodow', func.timezone('UTC', TelematicsDailyRollup.bucket)), Integer)),
+        'mes': (TelematicsDailyRollup, 'D', func.date_trunc('month', func.timezone('UTC', TelematicsDailyRollup.bucket))),
+        'placa': (TelematicsDailyRollup, 'D', Vehicle.plate),
+    }
+
+    @staticmethod
+    def _bucket_bounds(unit: str, start_date: Optional[datetime],
+                       end_date: Optional[datetime]) -> Tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]:
+        """UTC [start, end) bucket range for inclusive timestamp bounds; naive bounds are UTC.
+
+        An end one microsecond before a boundary (23:59:59.999999) includes the
+        bucket it closes; an end on a boundary excludes the bucket it opens.
+        Bounds inside a bucket raise ValueError, since a bucket cannot be split.
+        """
+        start, end = (pd.Timestamp(as_utc(value)) if value is not None else None for value in (start_date, end_date))
+        if end is not None and end != end.floor(unit):
+            end += pd.Timedelta(microseconds=1)
+        for bound in (start, end):
+            if bound is not None and bound != bound.floor(unit):
+                raise ValueError(f"Activity profile bound {bound} is not on a '{unit}' bucket boundary")
+        return start, end
+
+    def get_activity_profile(self, by: str,
+                             client_id: Optional[int] = None,
+                             vehicle_id: Optional[int] = None,
+                             start_date: Optional[datetime] = None,
+                             end_date: Optional[datetime] = None) -> pd.DataFrame:
+        """Activity by hour of day, day, ISO weekday (1 = Monday), month or plate, read from the rollups.
+
+        Buckets and keys are in UTC. The bounds must fall on bucket boundaries
+        (see _bucket_bounds), so the result matches the same timestamp filter
+        applied to raw rows; raw telemetry is not scanned.
+        """
+        if by not in self.ACTIVITY_PROFILES:
+            raise ValueError(f"Unknown activity grouping: {by}")
+        rollup, unit, key = self.ACTIVITY_PROFILES[by]
+        start, end = self._bucket_bounds(unit, start_date, end_date)
+
+        stmt = select(
+            key.label(by),
+            func.sum(rollup.records).label('registros'),
+            func.count(distinct(rollup.vehicle_id)).label('veiculos'),
+            (func.sum(rollup.speed_sum) / func.nullif(func.sum(rollup.speed_samples), 0)).label('velocidade_media'),
+            func.max(rollup.speed_max).label('velocidade_maxima'),
+            func.sum(rollup.distance_km).label('km'),
+            func.sum(rollup.gps_count).label('gps'),
+            func.sum(rollup.gprs_count).label('gprs'),
+            func.sum(rollup.ignition_on_count).label('ignicao_ligada'),
+            func.sum(rollup.speed_violation_count).label('excesso_velocidade'),
+        ).select_from(rollup)
+        if by == 'placa':
+            stmt = stmt.join(Vehicle, Vehicle.id == rollup.vehicle_id)
+
+        conditions = []
+        if client_id:
+            conditions.append(rollup.client_id == client_id)
+        if vehicle_id:
+            conditions.append(rollup.vehicle_id == vehicle_id)
+        if start is not None:
+            conditions.append(rollup.bucket >= start.to_pydatetime())
+        if end is not None:
+            conditions.append(rollup.bucket < end.to_pydatetime())
+        stmt = stmt.where(*conditions).group_by(key).order_by(key)
+
+        return pd.read_sql(stmt, self.session.connection())
+
     # Analytics and KPI methods
+    def has_telematics_data(self) -> bool:
+        """Whether any telemetry row exists; stops at the first row found"""
+        return bool(self.session.execute(select(select(TelematicsData.id).limit(1).exists())).scalar())
+    
     def get_fleet_summary(self) -> Dict[str, Any]:
-        """Get overall fleet summary statistics"""
-        total_vehicles = self.session.query(Vehicle).count()
-        total_clients = self.session.query(Client).count()
+        """Get overall fleet summary statistics in a single statement.
         
-        # Get latest data period
-        latest_data = self.session.query(
-            func.min(TelematicsData.timestamp).label('start_date'),
-            func.max(TelematicsData.timestamp).label('end_date'),
-            func.count(TelematicsData.id).label('total_records')
-        ).first()
-        
-        # Calculate average speed and total distance
-        speed_stats = self.session.query(
-            func.avg(TelematicsData.speed_kmh).label('avg_speed'),
-            func.max(TelematicsData.speed_kmh).label('max_speed'),
-            func.sum(TelematicsData.odometer_period_km).label('total_distance')
-        ).first()
+        Totals come from the daily rollup; the exact first and last timestamps
+        are looked up only inside the first and last hourly buckets, so raw
+        telemetry is never aggregated. Where the rollups are not maintained
+        (non-PostgreSQL databases) telematics_data is aggregated directly.
+        """
+        counts = (
+            select(func.count()).select_from(Vehicle).scalar_subquery().label('total_vehicles'),
+            select(func.count()).select_from(Client).scalar_subquery().label('total_clients'),
+        )
         
-        # GPS coverage - simplified approach
-        gps_coverage = self.session.query(
-            func.avg(TelematicsData.gps_quality.cast(Integer)).label('gps_coverage')
-        ).first()
+        if not TelematicsRollups.is_maintained(self.session.get_bind()):
+            summary = self.session.execute(select(
+                *counts,
+                func.count().label('total_records'),
+                func.min(TelematicsData.timestamp).label('start_date'),
+                func.max(TelematicsData.timestamp).label('end_date'),
+                func.avg(TelematicsData.speed_kmh).label('avg_speed'),
+                func.max(TelematicsData.speed_kmh).label('max_speed'),
+                func.sum(cast(TelematicsData.odometer_period_km, Float)).label('total_distance'),
+                func.avg(func.coalesce(cast(TelematicsData.gps_quality, Integer), 0)).label('gps_coverage'),
+            ).select_from(TelematicsData)).one()
+        else:
+            rollup = TelematicsDailyRollup
+            first_hour = select(func.min(TelematicsHourlyRollup.bucket)).scalar_subquery()
+            last_hour = select(func.max(TelematicsHourlyRollup.bucket)).scalar_subquery()
+            one_hour = timedelta(hours=1)
+            
+            summary = self.session.execute(select(
+                *counts,
+                func.sum(rollup.records).label('total_records'),
+                select(func.min(TelematicsData.timestamp)).where(
+                    TelematicsData.timestamp >= first_hour, TelematicsData.timestamp < first_hour + one_hour
+                ).scalar_subquery().label('start_date'),
+                select(func.max(TelematicsData.timestamp)).where(
+                    TelematicsData.timestamp >= last_hour, TelematicsData.timestamp < last_hour + one_hour
+                ).scalar_subquery().label('end_date'),
+                (func.sum(rollup.speed_sum) / func.nullif(func.sum(rollup.speed_samples), 0)).label('avg_speed'),
+                func.max(rollup.speed_max).label('max_speed'),
+                func.sum(rollup.distance_km).label('total_distance'),
+                (cast(func.sum(rollup.gps_count), Float) / func.nullif(func.sum(rollup.records), 0)).label('gps_coverage'),
+            ).select_from(rollup)).one()
         
         return {
-            'total_vehicles': total_vehicles,
-            'total_clients': total_clients,
-            'total_records': latest_data.total_records if latest_data.total_records else 0,
-            'start_date': latest_data.start_date,
-            'end_date': latest_data.end_date,
-            'avg_speed': round(speed_stats.avg_speed, 1) if speed_stats.avg_speed else 0,
-            'max_speed': speed_stats.max_speed if speed_stats.max_speed else 0,
-            'total_distance': round(speed_stats.total_distance, 1) if speed_stats.total_distance else 0,
-            'gps_coverage': round(gps_coverage.gps_coverage * 100, 1) if gps_coverage.gps_coverage else 0
+            'total_vehicles': summary.total_vehicles,
+            'total_clients': summary.total_clients,
+            'total_records': int(summary.total_records) if summary.total_records else 0,
+            'start_date': summary.start_date,
+            'end_date': summary.end_date,
+            'avg_speed': round(summary.avg_speed, 1) if summary.avg_speed else 0,
+            'max_speed': summary.max_speed if summary.max_speed else 0,
+            'total_distance': round(summary.total_distance, 1) if summary.total_distance else 0,
+            'gps_coverage': round(summary.gps_coverage * 100, 1) if summary.gps_coverage else 0
         }
     
     # Processing history operations
@@ -359,7 +596,8 @@ class FleetDatabaseService:
                                date_range_end: Optional[datetime] = None,
                                processing_status: str = 'completed',
                                error_message: Optional[str] = None,
-                               file_size_bytes: Optional[int] = None) -> ProcessingHistory:
+                               file_size_bytes: Optional[int] = None,
+                               content_hash: Optional[str] = None) -> ProcessingHistory:
         """Save processing history record"""
         history = ProcessingHistory(
             filename=filename,
@@ -371,13 +609,52 @@ class FleetDatabaseService:
             date_range_end=date_range_end,
             processing_status=processing_status,
             error_message=error_message,
-            file_size_bytes=file_size_bytes
+            file_size_bytes=file_size_bytes,
+            content_hash=content_hash
         )
         
         self.session.add(history)
         self.session.flush()
         return history
     
+    def finalize_processing_history(self,
+                                    history_id: int,
+                                    records_processed: int,
+                                    records_failed: int = 0,
+                                    unique_vehicles: int = 0,
+                                    unique_clients: int = 0,
+                                    date_range_start: Optional[datetime] = None,
+                                    date_range_end: Optional[datetime] = None,
+                                    processing_status: str = 'completed',
+                                    error_message: Optional[str] = None) -> ProcessingHistory:
+        """Update a 'processing' history record with the final results of an ingestion"""
+        history = self.session.get(ProcessingHistory, history_id)
+        history.records_processed = records_processed
+        history.records_failed = records_failed
+        history.unique_vehicles = unique_vehicles
+        history.unique_clients = unique_clients
+        history.date_range_start = date_range_start
+        history.date_range_end = date_range_end
+        history.processing_status = processing_status
+        history.error_message = error_message
+        self.session.flush()
+        return history
+    
+    def get_processed_hashes(self, content_hashes: List[str]) -> set:
+        """Return which content hashes belong to files already ingested successfully"""
+        if not content_hashes:
+            return set()
+        rows = (self.session.query(ProcessingHistory.content_hash)
+                .filter(ProcessingHistory.content_hash.in_(content_hashes))
+                .filter(ProcessingHistory.processing_status == 'completed')
+                .distinct()
+                .all())
+        return {row.content_hash for row in rows}
+    
+    def is_content_processed(self, content_hash: str) -> bool:
+        """Check whether a file with this content hash was already ingested"""
+        return content_hash in self.get_processed_hashes([content_hash])
+    
     def get_processing_history(self, limit: int = 10) -> List[ProcessingHistory]:
         """Get recent processing history"""
         return (self.session.query(ProcessingHistory)
@@ -400,6 +677,8 @@ class FleetDatabaseService:
         clients_count = self.session.query(Client).count()
         
         # Clear all data
+        self.session.query(TelematicsHourlyRollup).delete()
+        self.session.query(TelematicsDailyRollup).delete()
         self.session.query(TelematicsData).delete()
         self.session.query(ProcessingHistory).delete() 
         self.session.query(InsightData).delete()
@@ -10,7 +10,6 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from utils.data_analyzer import DataAnalyzer
-from utils.visualizations import FleetVisualizations
 from database.db_manager import DatabaseManager
 
 st.set_page_config(
@@ -20,13 +19,12 @@ st.set_page_config(
 )
 
 def load_data():
-    """Carrega dados APENAS da base de dados (dados reais)"""
+    """Carrega o período disponível dos rollups diários, sem buscar registros brutos"""
     try:
-        # Carregar dados diretamente da base de dados
-        df = DatabaseManager.get_dashboard_data()
-        if not df.empty:
-            st.success(f"✅ Dados reais carregados: {len(df):,} registros da base de dados")
-            return df
+        daily = DatabaseManager.get_activity_profile('data')
+        if not daily.empty:
+            st.success(f"✅ Dados reais na base: {int(daily['registros'].sum()):,} registros")
+            return daily
         
         # Se não há dados, mostrar mensagem clara
         st.warning("⚠️ Nenhum dado encontrado na base de dados. Faça upload dos seus arquivos CSV.")
@@ -41,26 +39,25 @@ def main():
     st.markdown("---")
     
     # Carregar dados
-    df = load_data()
+    daily = load_data()
     
-    if df.empty:
+    if daily.empty:
         st.warning("📁 Nenhum dado encontrado. Faça o upload de um arquivo CSV primeiro.")
         st.stop()
     
-    # Inicializar analisador com dados da base de dados
-    analyzer = DataAnalyzer.from_database()
-    visualizer = FleetVisualizations(analyzer)
+    # Analisador em modo push-down: KPIs e agregações são calculados pela base
+    analyzer = DataAnalyzer.from_database(pushdown=True, columns='analise')
     
     # Sidebar com filtros
     st.sidebar.header("🔍 Filtros")
     
     # Filtro por cliente
-    clientes = ['Todos'] + sorted(df['cliente'].unique().tolist())
+    clientes = ['Todos'] + DatabaseManager.get_client_list()
     cliente_selecionado = st.sidebar.selectbox("Cliente:", clientes)
     
     # Filtro por período
-    min_date = df['data'].min().date()
-    max_date = df['data'].max().date()
+    min_date = daily['data'].min()
+    max_date = daily['data'].max()
     
     col_data1, col_data2 = st.sidebar.columns(2)
     with col_data1:
@@ -69,34 +66,30 @@ def main():
         data_fim = st.date_input("Data Fim:", max_date, min_value=min_date, max_value=max_date)
     
     # Filtro por veículo
-    veiculos_disponiveis = ['Todos']
-    if cliente_selecionado != "Todos":
-        veiculos_disponiveis.extend(sorted(df[df['cliente'] == cliente_selecionado]['placa'].unique().tolist()))
-    else:
-        veiculos_disponiveis.extend(sorted(df['placa'].unique().tolist()))
+    veiculos_disponiveis = ['Todos'] + DatabaseManager.get_vehicle_list(
+        cliente_selecionado if cliente_selecionado != "Todos" else None
+    )
     
     veiculo_selecionado = st.sidebar.selectbox("Veículo:", veiculos_disponiveis)
     
-    # Aplicar filtros
-    filtered_df = analyzer.apply_filters(
+    # Aplicar filtros (sem carregar registros)
+    analyzer.set_filters(
         cliente=cliente_selecionado,
         placa=veiculo_selecionado,
         data_inicio=data_inicio,
         data_fim=data_fim
     )
     
-    if filtered_df.empty:
-        st.warning("⚠️ Nenhum registro encontrado com os filtros aplicados.")
-        st.stop()
-    
     # Obter KPIs
     kpis = analyzer.get_kpis()
     
     # Verificar se há KPIs válidos
     if not kpis:
-        st.warning("⚠️ Não foi possível calcular métricas com os filtros aplicados. Tente ajustar os filtros.")
+        st.warning("⚠️ Nenhum registro encontrado com os filtros aplicados.")
         st.stop()
     
+    vehicle_totals = analyzer.get_vehicle_aggregates()
+    
     # Mostrar métricas principais
     st.header("📈 Métricas Principais")
     
@@ -106,7 +99,7 @@ def main():
         st.metric(
             label="🚗 Total de Veículos",
             value=f"{kpis['total_veiculos']:,}",
-            delta=f"{len(filtered_df):,} registros"
+            delta=f"{kpis['total_registros']:,} registros"
         )
     
     with col2:
@@ -138,9 +131,15 @@ def main():
     with col_left:
         st.subheader("📊 Distribuição de Velocidade")
         
+        # Contagem por valor de velocidade, somada nas mesmas 30 faixas do histograma
+        speed_counts = analyzer.get_aggregates('velocidade_km')
+        if speed_counts is None:
+            speed_counts = analyzer.filtered_df['velocidade_km'].value_counts().rename('registros').reset_index()
         speed_dist_fig = px.histogram(
-            filtered_df,
+            speed_counts,
             x='velocidade_km',
+            y='registros',
+            histfunc='sum',
             nbins=30,
             title='Distribuição de Velocidade',
             labels={'velocidade_km': 'Velocidade (km/h)', 'count': 'Frequência'}
@@ -151,7 +150,7 @@ def main():
     with col_right:
         st.subheader("🚗 Top 10 Veículos Mais Ativos")
         
-        vehicle_activity = filtered_df.groupby('placa').size().sort_values(ascending=False).head(10)
+        vehicle_activity = vehicle_totals.set_index('placa')['registros'].sort_values(ascending=False).head(10)
         
         activity_fig = px.bar(
             x=vehicle_activity.values,
@@ -166,44 +165,38 @@ def main():
     # Análise temporal
     st.subheader("⏰ Análise Temporal")
     
-    # Atividade por hora
-    hourly_activity = filtered_df.groupby(filtered_df['data'].dt.hour).agg({
-        'placa': 'nunique',
-        'velocidade_km': 'mean'
-    }).reset_index()
-    
-    col_temp1, col_temp2 = st.columns(2)
-    
-    with col_temp1:
-        hourly_vehicles_fig = px.line(
-            hourly_activity,
-            x='data',
-            y='placa',
-            title='Veículos Ativos por Hora',
-            labels={'data': 'Hora do Dia', 'placa': 'Número de Veículos Ativos'}
-        )
-        hourly_vehicles_fig.update_layout(height=350)
-        st.plotly_chart(hourly_vehicles_fig, use_container_width=True)
+    # Atividade por hora, dos rollups da base com os mesmos filtros
+    hourly_activity = analyzer.get_activity_profile('hora')
     
-    with col_temp2:
-        hourly_speed_fig = px.line(
-            hourly_activity,
-            x='data',
-            y='velocidade_km',
-            title='Velocidade Média por Hora',
-            labels={'data': 'Hora do Dia', 'velocidade_km': 'Velocidade Média (km/h)'}
-        )
-        hourly_speed_fig.update_layout(height=350)
-        st.plotly_chart(hourly_speed_fig, use_container_width=True)
+    if hourly_activity is not None:
+        hourly_activity = hourly_activity.rename(columns={'hora': 'data'})
+        col_temp1, col_temp2 = st.columns(2)
+        
+        with col_temp1:
+            hourly_vehicles_fig = px.line(
+                hourly_activity,
+                x='data',
+                y='placa',
+                title='Veículos Ativos por Hora',
+                labels={'data': 'Hora do Dia', 'placa': 'Número de Veículos Ativos'}
+            )
+            hourly_vehicles_fig.update_layout(height=350)
+            st.plotly_chart(hourly_vehicles_fig, use_container_width=True)
+        
+        with col_temp2:
+            hourly_speed_fig = px.line(
+                hourly_activity,
+                x='data',
+                y='velocidade_km',
+                title='Velocidade Média por Hora',
+                labels={'data': 'Hora do Dia', 'velocidade_km': 'Velocidade Média (km/h)'}
+            )
+            hourly_speed_fig.update_layout(height=350)
+            st.plotly_chart(hourly_speed_fig, use_container_width=True)
     
     # Atividade diária (se mais de um dia)
-    if kpis['periodo_dias'] > 1:
-        daily_activity = filtered_df.groupby(filtered_df['data'].dt.date).agg({
-            'placa': 'nunique',
-            'velocidade_km': 'mean',
-            'odometro_periodo_km': 'sum'
-        }).reset_index()
-        
+    daily_activity = analyzer.get_activity_profile('data')
+    if kpis['periodo_dias'] > 1 and daily_activity is not None:
         st.subheader("📅 Tendência Diária")
         
         daily_fig = px.line(
@@ -219,18 +212,14 @@ def main():
     # Tabela de resumo por veículo
     st.subheader("📋 Resumo por Veículo")
     
-    vehicle_summary = filtered_df.groupby('placa').agg({
-        'velocidade_km': ['count', 'mean', 'max'],
-        'odometro_periodo_km': 'sum',
-        'gps': lambda x: (x.sum() / len(x)) * 100,
-        'bloqueado': 'any'
-    }).round(2)
-    
-    # Achatar MultiIndex
-    vehicle_summary.columns = [
-        'Registros', 'Vel. Média', 'Vel. Máxima', 
-        'KM Total', 'GPS (%)', 'Bloqueado'
-    ]
+    vehicle_summary = pd.DataFrame({
+        'Registros': vehicle_totals['velocidade_amostras'],
+        'Vel. Média': vehicle_totals['velocidade_media'],
+        'Vel. Máxima': vehicle_totals['velocidade_maxima'],
+        'KM Total': vehicle_totals['km'],
+        'GPS (%)': vehicle_totals['gps'] * 100,
+        'Bloqueado': vehicle_totals['algum_bloqueado'].astype(bool)
+    }).set_axis(vehicle_totals['placa']).round(2)
     
     vehicle_summary = vehicle_summary.sort_values('Registros', ascending=False)
     
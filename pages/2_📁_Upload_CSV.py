@@ -9,6 +9,8 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from utils.csv_processor import CSVProcessor
 from database.db_manager import DatabaseManager
+from database.csv_sniffer import CSVSniffer
+from database.parallel_ingestion import ParallelIngestor
 
 st.set_page_config(
     page_title="Upload CSV - Insight Hub",
@@ -86,20 +88,13 @@ def main():
         try:
             first_file = uploaded_files[0]
             preview_df = None
-            separators = [';', ',']
-            encodings = ['latin-1', 'utf-8', 'iso-8859-1', 'windows-1252', 'cp1252']
             
-            for sep in separators:
-                for enc in encodings:
-                    try:
-                        first_file.seek(0)
-                        preview_df = pd.read_csv(first_file, sep=sep, encoding=enc, nrows=5)
-                        st.success(f"📄 Formato detectado: separador '{sep}', encoding '{enc}'")
-                        break
-                    except:
-                        continue
-                if preview_df is not None:
-                    break
+            try:
+                spec = CSVSniffer.sniff(first_file)
+                preview_df = spec.read(first_file, nrows=5)
+                st.success(f"📄 Formato detectado: separador '{spec.sep}', encoding '{spec.encoding}'")
+            except Exception as sniff_error:
+                st.warning(f"⚠️ Não foi possível detectar o formato: {str(sniff_error)}")
             
             if preview_df is not None:
                 st.subheader("👀 Preview dos Dados")
@@ -113,12 +108,29 @@ def main():
             
             first_file.seek(0)
             
+            # Número de arquivos processados simultaneamente
+            workers = 1
+            if len(uploaded_files) > 1:
+                workers = st.slider(
+                    "⚙️ Arquivos processados em paralelo",
+                    min_value=1,
+                    max_value=8,
+                    value=min(4, os.cpu_count() or 1, len(uploaded_files)),
+                    help="Cada arquivo é lido em um processo separado; a gravação usa um número limitado de conexões"
+                )
+            
             # Botão para processar todos os arquivos
             if st.button("🚀 Processar Todos os Arquivos", type="primary"):
-                # Ordenar arquivos por tamanho (menor para maior) para processamento mais eficiente
-                sorted_files = sorted(uploaded_files, key=lambda f: f.size)
-                st.info(f"📊 Arquivos ordenados por tamanho: menor → maior para otimizar processamento")
-                process_multiple_csv_files(sorted_files)
+                if workers > 1:
+                    # Maiores primeiro: o tempo total fica próximo ao do maior arquivo
+                    sorted_files = sorted(uploaded_files, key=lambda f: f.size, reverse=True)
+                    st.info(f"📊 Processando {len(sorted_files)} arquivos em paralelo ({workers} processos)")
+                    process_multiple_csv_files_parallel(sorted_files, workers)
+                else:
+                    # Ordenar arquivos por tamanho (menor para maior) para processamento mais eficiente
+                    sorted_files = sorted(uploaded_files, key=lambda f: f.size)
+                    st.info(f"📊 Arquivos ordenados por tamanho: menor → maior para otimizar processamento")
+                    process_multiple_csv_files(sorted_files)
                 
         except Exception as e:
             st.error(f"❌ Erro ao ler os arquivos: {str(e)}")
@@ -211,7 +223,13 @@ def process_multiple_csv_files(uploaded_files):
         file_progress_bar.progress(1.0)
         file_processing_time = time.time() - file_start_time
         
-        if result['success']:
+        if result.get('skipped'):
+            processed_files += 1
+            file_status.markdown("⏭️ **Arquivo já processado anteriormente**")
+            
+            with st.expander(f"⏭️ {uploaded_file.name}", expanded=False):
+                st.info(result.get('message', 'Arquivo idêntico já processado anteriormente'))
+        elif result['success']:
             processed_files += 1
             records_processed = result.get('records_processed', 0)
             total_records += records_processed
@@ -221,6 +239,8 @@ def process_multiple_csv_files(uploaded_files):
             # Log de sucesso
             with st.expander(f"✅ {uploaded_file.name}", expanded=False):
                 st.success(f"Processado com sucesso: {records_processed:,} registros")
+                if result.get('records_failed'):
+                    st.warning(f"{result['records_failed']:,} registros não carregados; reenvie o arquivo para completá-lo")
                 st.info(f"Tempo: {file_processing_time:.1f}s | Velocidade: {records_processed/file_processing_time:.0f} reg/s")
         else:
             failed_files += 1
@@ -229,9 +249,6 @@ def process_multiple_csv_files(uploaded_files):
             # Log de erro
             with st.expander(f"❌ {uploaded_file.name}", expanded=True):
                 st.error(f"Erro: {result.get('error', 'Erro desconhecido')}")
-        
-        # Pequena pausa para visualização
-        time.sleep(0.1)
     
     # Finalizar progresso geral
     overall_progress.progress(1.0)
@@ -276,66 +293,99 @@ def process_multiple_csv_files(uploaded_files):
         - ⏱️ Tempo total: {total_time:.1f} segundos
         """)
 
+def process_multiple_csv_files_parallel(uploaded_files, workers):
+    """Processa múltiplos arquivos CSV em paralelo com progresso por arquivo"""
+    
+    st.markdown("### 📊 Progresso de Processamento")
+    overall_progress = st.progress(0)
+    overall_status = st.empty()
+    
+    metrics_cols = st.columns(3)
+    with metrics_cols[0]:
+        files_metric = st.empty()
+    with metrics_cols[1]:
+        records_metric = st.empty()
+    with metrics_cols[2]:
+        speed_metric = st.empty()
+    
+    import time
+    start_time = time.time()
+    totals = {'processed': 0, 'failed': 0, 'records': 0}
+    
+    def on_file_done(filename, result, completed, total):
+        overall_progress.progress(completed / total)
+        overall_status.markdown(f"📂 **{completed} de {total} arquivos concluídos**")
+        
+        if result.get('skipped'):
+            totals['processed'] += 1
+            with st.expander(f"⏭️ {filename}", expanded=False):
+                st.info(result.get('message', 'Arquivo idêntico já processado anteriormente'))
+        elif result['success']:
+            totals['processed'] += 1
+            totals['records'] += result.get('records_processed', 0)
+            with st.expander(f"✅ {filename}", expanded=False):
+                st.success(f"Processado com sucesso: {result.get('records_processed', 0):,} registros")
+                if result.get('records_failed'):
+                    st.warning(f"{result['records_failed']:,} registros não carregados; reenvie o arquivo para completá-lo")
+        else:
+            totals['failed'] += 1
+            with st.expander(f"❌ {filename}", expanded=True):
+                st.error(f"Erro: {result.get('error', 'Erro desconhecido')}")
+        
+        elapsed_time = time.time() - start_time
+        files_metric.metric(label="📁 Arquivos", value=f"{completed}/{total}")
+        records_metric.metric(label="📊 Registros", value=f"{totals['records']:,}")
+        if elapsed_time > 0:
+            speed_metric.metric(label="⚡ Velocidade", value=f"{totals['records']/elapsed_time:.0f}", delta="registros/s")
+    
+    overall_status.markdown(f"🔄 Processando {len(uploaded_files)} arquivos com {workers} processos...")
+    sources = [(f.name, f.getvalue(), f.size) for f in uploaded_files]
+    ParallelIngestor(workers=workers).run(sources, on_file_done)
+    
+    total_time = time.time() - start_time
+    overall_progress.progress(1.0)
+    overall_status.markdown("🎉 **Processamento Finalizado!**")
+    
+    if totals['failed'] == 0:
+        st.success(f"""
+        🎉 **Processamento 100% concluído!**
+        - ✅ {totals['processed']} arquivos processados com sucesso
+        - 📊 {totals['records']:,} registros inseridos na base de dados
+        - ⏱️ Tempo total: {total_time:.1f} segundos
+        """)
+    else:
+        st.warning(f"""
+        ⚠️ **Processamento concluído com erros**
+        - ✅ {totals['processed']} arquivos processados com sucesso
+        - ❌ {totals['failed']} arquivos com erro
+        - 📊 {totals['records']:,} registros inseridos na base de dados
+        - ⏱️ Tempo total: {total_time:.1f} segundos
+        """)
+
 def process_single_csv_file_with_progress(uploaded_file, progress_bar, status_display):
     """Processa um único arquivo CSV com progresso em tempo real"""
     
     try:
-        import tempfile
-        import time
-        
-        # Fase 1: Salvando arquivo temporário
-        status_display.markdown("📥 Salvando arquivo temporário...")
-        progress_bar.progress(0.1)
-        
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.csv') as tmp_file:
-            tmp_file.write(uploaded_file.getvalue())
-            tmp_path = tmp_file.name
-        
-        # Fase 2: Analisando estrutura
         status_display.markdown("🔍 Analisando estrutura do arquivo...")
-        progress_bar.progress(0.2)
-        time.sleep(0.1)
+        progress_bar.progress(0.0)
         
-        # Contagem estimada de linhas para melhor progresso
-        try:
-            with open(tmp_path, 'r', encoding='latin-1') as f:
-                estimated_rows = sum(1 for _ in f) - 1  # -1 para header
-        except:
-            estimated_rows = 1000  # Fallback
-        
-        status_display.markdown(f"📊 Arquivo com ~{estimated_rows:,} registros detectados")
-        progress_bar.progress(0.3)
-        
-        # Fase 3: Processando dados
-        status_display.markdown("⚙️ Processando e validando dados...")
-        progress_bar.progress(0.5)
-        time.sleep(0.2)
+        # Progresso real: barra pelos bytes lidos, texto com registros inseridos
+        state = {'bytes': 0, 'total_bytes': uploaded_file.size or 0, 'saved': 0, 'read': 0}
         
-        # Fase 4: Inserindo na base de dados
-        status_display.markdown("💾 Inserindo registros na base de dados...")
-        progress_bar.progress(0.7)
-        
-        # Usar DatabaseManager para migrar com progresso
         def update_progress(current, total, phase):
-            progress = 0.7 + (current / total) * 0.2  # 70% até 90%
-            progress_bar.progress(progress)
-            if phase == "preparando":
-                status_display.markdown(f"⚙️ Preparando dados: {current:,}/{total:,}")
+            if phase == "processando":
+                state['bytes'], state['total_bytes'] = current, total
+                if total > 0:
+                    progress_bar.progress(min(current / total, 1.0))
             elif phase == "inserindo":
-                status_display.markdown(f"💾 Inserindo registros: {current:,}/{total:,}")
-        
-        result = DatabaseManager.migrate_csv_to_database_with_progress(tmp_path, update_progress)
-        
-        # Fase 5: Finalizando
-        status_display.markdown("🔄 Finalizando processamento...")
-        progress_bar.progress(0.9)
-        time.sleep(0.1)
-        
-        # Limpar arquivo temporário
-        import os
-        os.unlink(tmp_path)
+                state['saved'], state['read'] = current, total
+            status_display.markdown(
+                f"⚙️ Processando: {state['bytes'] / 1024 / 1024:,.1f}/{state['total_bytes'] / 1024 / 1024:,.1f} MB"
+                f" | 💾 {state['saved']:,}/{state['read']:,} registros inseridos"
+            )
         
-        return result
+        # Lê direto do buffer enviado, sem arquivo temporário
+        return DatabaseManager.migrate_csv_stream(uploaded_file, uploaded_file.name, update_progress)
         
     except Exception as e:
         status_display.markdown(f"❌ Erro: {str(e)}")
@@ -349,17 +399,7 @@ def process_single_csv_file(uploaded_file):
     """Processa um único arquivo CSV (versão simplificada para compatibilidade)"""
     
     try:
-        import tempfile
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.csv') as tmp_file:
-            tmp_file.write(uploaded_file.getvalue())
-            tmp_path = tmp_file.name
-        
-        result = DatabaseManager.migrate_csv_to_database(tmp_path)
-        
-        import os
-        os.unlink(tmp_path)
-        
-        return result
+        return DatabaseManager.migrate_csv_stream(uploaded_file, uploaded_file.name)
         
     except Exception as e:
         return {
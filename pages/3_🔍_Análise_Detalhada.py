@@ -177,7 +177,7 @@ def show_overview_analysis(analyzer):
     with col_left:
         st.subheader("📈 Atividade por Veículo")
         
-        vehicle_activity = analyzer.filtered_df.groupby('placa').size().sort_values(ascending=False).head(15)
+        vehicle_activity = analyzer.filtered_df.groupby('placa', observed=True).size().sort_values(ascending=False).head(15)
         
         fig_activity = px.bar(
             x=vehicle_activity.values,
@@ -192,7 +192,8 @@ def show_overview_analysis(analyzer):
     with col_right:
         st.subheader("🎯 Distribuição de Clientes")
         
-        client_dist = analyzer.filtered_df['cliente'].value_counts()
+        # Coluna categórica: clientes fora do filtro aparecem com contagem zero
+        client_dist = analyzer.filtered_df['cliente'].value_counts().loc[lambda counts: counts > 0]
         
         fig_clients = px.pie(
             values=client_dist.values,
@@ -205,7 +206,7 @@ def show_overview_analysis(analyzer):
     # Estatísticas detalhadas por veículo
     st.subheader("📋 Estatísticas Detalhadas por Veículo")
     
-    vehicle_stats = analyzer.filtered_df.groupby('placa').agg({
+    vehicle_stats = analyzer.filtered_df.groupby('placa', observed=True).agg({
         'velocidade_km': ['count', 'mean', 'max', 'std'],
         'odometro_periodo_km': 'sum',
         'gps': lambda x: (x.sum() / len(x)) * 100,
@@ -358,7 +359,7 @@ def show_speed_analysis(analyzer):
     
     if not violations.empty:
         # Violações por veículo
-        violations_by_vehicle = violations.groupby('placa').size().sort_values(ascending=False).head(10)
+        violations_by_vehicle = violations.groupby('placa', observed=True).size().sort_values(ascending=False).head(10)
         
         fig_violations = px.bar(
             x=violations_by_vehicle.values,
@@ -411,7 +412,7 @@ def show_operational_analysis(analyzer):
     with col_left:
         st.subheader("📈 Quilometragem por Veículo")
         
-        km_by_vehicle = df.groupby('placa')['odometro_periodo_km'].sum().sort_values(ascending=False).head(15)
+        km_by_vehicle = df.groupby('placa', observed=True)['odometro_periodo_km'].sum().sort_values(ascending=False).head(15)
         
         fig_km = px.bar(
             x=km_by_vehicle.values,
@@ -425,10 +426,7 @@ def show_operational_analysis(analyzer):
     with col_right:
         st.subheader("⏰ Utilização por Hora")
         
-        hourly_usage = df.groupby(df['data'].dt.hour).agg({
-            'placa': 'nunique',
-            'odometro_periodo_km': 'sum'
-        }).reset_index()
+        hourly_usage = operational['utilizacao_por_hora']
         
         fig_hourly = px.bar(
             hourly_usage,
@@ -442,37 +440,28 @@ def show_operational_analysis(analyzer):
     # Análise de eficiência
     st.subheader("📊 Análise de Eficiência")
     
-    efficiency_data = []
-    for placa in df['placa'].unique():
-        vehicle_data = df[df['placa'] == placa]
-        
-        total_records = len(vehicle_data)
-        total_km = vehicle_data['odometro_periodo_km'].sum()
-        avg_speed = vehicle_data['velocidade_km'].mean()
-        gps_coverage = (vehicle_data['gps'].mean()) * 100
-        
-        # Tempo parado
-        stopped_time = len(vehicle_data[vehicle_data['velocidade_km'] == 0]) / total_records * 100
-        
-        # Score de eficiência
-        efficiency_score = (
-            (avg_speed / 80 * 30) +  # Velocidade adequada (30%)
-            (gps_coverage) * 0.3 +    # Cobertura GPS (30%)
-            ((100 - stopped_time) * 0.2) + # Tempo ativo (20%)
-            (min(total_km / 1000, 1) * 20)  # Produtividade KM (20%)
-        )
-        
-        efficiency_data.append({
-            'Placa': placa,
-            'Registros': total_records,
-            'Total KM': total_km,
-            'Vel. Média': avg_speed,
-            'GPS (%)': gps_coverage,
-            'Tempo Parado (%)': stopped_time,
-            'Score Eficiência': min(efficiency_score, 100)
-        })
-    
-    efficiency_df = pd.DataFrame(efficiency_data)
+    efficiency = analyzer.get_efficiency_metrics()
+    vehicle_efficiency = efficiency['eficiencia_por_veiculo']
+    
+    # Score de eficiência
+    efficiency_score = (
+        (vehicle_efficiency['velocidade_media'] / 80 * 30) +  # Velocidade adequada (30%)
+        (vehicle_efficiency['cobertura_gps']) * 0.3 +    # Cobertura GPS (30%)
+        ((100 - vehicle_efficiency['tempo_parado_pct']) * 0.2) + # Tempo ativo (20%)
+        ((vehicle_efficiency['distancia_total'] / 1000).clip(upper=1) * 20)  # Produtividade KM (20%)
+    )
+    
+    efficiency_df = vehicle_efficiency.reset_index()[[
+        'placa', 'total_registros', 'distancia_total', 'velocidade_media', 'cobertura_gps', 'tempo_parado_pct'
+    ]].rename(columns={
+        'placa': 'Placa',
+        'total_registros': 'Registros',
+        'distancia_total': 'Total KM',
+        'velocidade_media': 'Vel. Média',
+        'cobertura_gps': 'GPS (%)',
+        'tempo_parado_pct': 'Tempo Parado (%)'
+    })
+    efficiency_df['Score Eficiência'] = efficiency_score.clip(upper=100).to_numpy()
     efficiency_df = efficiency_df.sort_values('Score Eficiência', ascending=False)
     
     # Colorir por score de eficiência
@@ -631,11 +620,7 @@ def show_temporal_patterns(analyzer):
     # Padrões por hora do dia
     st.subheader("🕐 Padrões por Hora do Dia")
     
-    hourly_data = df.groupby(df['data'].dt.hour).agg({
-        'placa': 'nunique',
-        'velocidade_km': 'mean',
-        'odometro_periodo_km': 'sum'
-    }).reset_index()
+    hourly_data = patterns['padroes_por_hora'].reset_index()
     
     col_hour1, col_hour2 = st.columns(2)
     
@@ -667,13 +652,7 @@ def show_temporal_patterns(analyzer):
     if len(df['data'].dt.date.unique()) > 7:  # Mais de uma semana de dados
         st.subheader("📅 Padrões por Dia da Semana")
         
-        df['dia_semana'] = df['data'].dt.day_name()
-        
-        weekly_data = df.groupby('dia_semana').agg({
-            'placa': 'nunique',
-            'velocidade_km': 'mean',
-            'odometro_periodo_km': 'sum'
-        }).reindex(dias_ordem).reset_index()
+        weekly_data = patterns['padroes_semanais'].reindex(dias_ordem).reset_index()
         
         weekly_data['dia_semana'] = dias_pt
         
@@ -19,7 +19,6 @@ st.set_page_config(
     layout="wide"
 )
 
-@st.cache_data(ttl=300)  # Cache por 5 minutos
 def load_data():
     """Carrega dados APENAS da base de dados (dados reais) com otimizações"""
     try:
@@ -95,12 +94,11 @@ def main():
     # Seleção de veículos para comparação
     st.subheader("🚗 Seleção de Veículos para Comparação")
     
+    # Estatísticas por veículo em uma única agregação, reaproveitadas na comparação
+    all_vehicle_stats = analyzer.get_vehicle_stats()
+    
     # Mostrar estatísticas rápidas dos veículos disponíveis
-    vehicle_stats = filtered_df.groupby('placa').agg({
-        'velocidade_km': ['count', 'mean'],
-        'odometro_periodo_km': 'sum',
-        'gps': lambda x: (x.mean() * 100)
-    }).round(2)
+    vehicle_stats = all_vehicle_stats[['total_registros', 'velocidade_media', 'distancia_total', 'cobertura_gps']].round(2)
     
     vehicle_stats.columns = ['Registros', 'Vel. Média', 'KM Total', 'GPS (%)']
     vehicle_stats = vehicle_stats.sort_values('Registros', ascending=False)
@@ -143,10 +141,9 @@ def main():
     
     # Filtrar dados para veículos selecionados
     comparison_df = filtered_df[filtered_df['placa'].isin(veiculos_selecionados)]
-    analyzer.filtered_df = comparison_df
     
     # Executar comparação
-    comparison_data = analyzer.compare_vehicles(veiculos_selecionados)
+    comparison_data = analyzer.compare_vehicles(veiculos_selecionados, all_vehicle_stats)
     
     if not comparison_data:
         st.error("❌ Não foi possível gerar dados de comparação.")
@@ -462,7 +459,7 @@ def show_operational_comparison(comparison_data, df):
     st.subheader("⏰ Padrões de Atividade por Hora")
     
     # Atividade por hora para cada veículo
-    hourly_activity = df.groupby(['placa', df['data'].dt.hour]).size().unstack(fill_value=0)
+    hourly_activity = df.groupby(['placa', df['data'].dt.hour], observed=True).size().unstack(fill_value=0)
     
     # Criar heatmap
     fig_heatmap = px.imshow(
@@ -626,7 +623,7 @@ def show_temporal_evolution(df):
     st.subheader("⏰ Evolução Temporal")
     
     # Agregar dados por dia
-    daily_data = df.groupby(['placa', df['data'].dt.date]).agg({
+    daily_data = df.groupby(['placa', df['data'].dt.date], observed=True).agg({
         'velocidade_km': 'mean',
         'odometro_periodo_km': 'sum',
         'gps': lambda x: (x.mean() * 100)
@@ -645,7 +642,7 @@ def show_temporal_evolution(df):
     st.plotly_chart(fig_temporal, use_container_width=True)
     
     # Gráfico de quilometragem acumulada
-    daily_data['km_acumulado'] = daily_data.groupby('placa')['odometro_periodo_km'].cumsum()
+    daily_data['km_acumulado'] = daily_data.groupby('placa', observed=True)['odometro_periodo_km'].cumsum()
     
     fig_cumulative = px.line(
         daily_data,
@@ -15,7 +15,7 @@ st.title("🗺️ Mapa de Rotas")
 st.markdown("**Análise de trajetos, frequência de rotas, desvios e picos de velocidade**")
 
 # Carregar dados
-df = DatabaseManager.get_dashboard_data()
+df = DatabaseManager.get_dashboard_data(columns='mapa_rotas')
 if df.empty:
     st.warning("⚠️ Nenhum dado encontrado. Faça o upload de um arquivo CSV primeiro.")
     st.stop()
@@ -184,9 +184,9 @@ with tab1:
         # Cliente e motorista se disponível
         info_adicional = ""
         if 'cliente' in map_data.columns:
-            map_data['info_cliente'] = map_data['cliente'].fillna("Cliente não informado")
+            map_data['info_cliente'] = map_data['cliente'].astype(object).fillna("Cliente não informado")
         if 'motorista' in map_data.columns:
-            map_data['info_motorista'] = map_data['motorista'].fillna("Motorista não informado")
+            map_data['info_motorista'] = map_data['motorista'].astype(object).fillna("Motorista não informado")
         
         # Tooltip otimizado para usuários finais
         tooltip_text = {
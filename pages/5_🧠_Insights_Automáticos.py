@@ -471,38 +471,31 @@ def show_opportunities(insights, analyzer):
         # Identificar top performers e underperformers
         vehicle_efficiency = efficiency['eficiencia_por_veiculo']
         
-        if vehicle_efficiency is not None and hasattr(vehicle_efficiency, 'empty') and not vehicle_efficiency.empty:
-            # Converter series para lista de dicts
-            efficiency_data = []
-            for placa, data in vehicle_efficiency.items():
-                if isinstance(data, dict):
-                    efficiency_data.append({
-                        'Placa': placa,
-                        'KM por Dia': data.get('km_por_dia', 0),
-                        'Utilização Diária': data.get('utilizacao_diaria', 0),
-                        'Velocidade Média': data.get('velocidade_media', 0),
-                        'Tempo Parado (%)': data.get('tempo_parado_pct', 0)
-                    })
+        if not vehicle_efficiency.empty:
+            efficiency_df = vehicle_efficiency.reset_index().rename(columns={
+                'placa': 'Placa',
+                'km_por_dia': 'KM por Dia',
+                'utilizacao_diaria': 'Utilização Diária',
+                'velocidade_media': 'Velocidade Média',
+                'tempo_parado_pct': 'Tempo Parado (%)'
+            })
             
-            if efficiency_data:
-                efficiency_df = pd.DataFrame(efficiency_data)
-                
-                # Top performers
-                top_performers = efficiency_df.nlargest(5, 'KM por Dia')
-                
-                col_eff1, col_eff2 = st.columns(2)
-                
-                with col_eff1:
-                    st.write("**🏆 Top Performers (KM por Dia):**")
-                    for _, row in top_performers.iterrows():
-                        st.success(f"**{row['Placa']}** - {row['KM por Dia']:.1f} km/dia")
-                
-                with col_eff2:
-                    st.write("**⚠️ Baixa Utilização:**")
-                    low_performers = efficiency_df.nsmallest(5, 'Utilização Diária')
-                    for _, row in low_performers.iterrows():
-                        if row['Utilização Diária'] < 10:
-                            st.warning(f"**{row['Placa']}** - {row['Utilização Diária']:.1f} reg/dia")
+            # Top performers
+            top_performers = efficiency_df.nlargest(5, 'KM por Dia')
+            
+            col_eff1, col_eff2 = st.columns(2)
+            
+            with col_eff1:
+                st.write("**🏆 Top Performers (KM por Dia):**")
+                for _, row in top_performers.iterrows():
+                    st.success(f"**{row['Placa']}** - {row['KM por Dia']:.1f} km/dia")
+            
+            with col_eff2:
+                st.write("**⚠️ Baixa Utilização:**")
+                low_performers = efficiency_df.nsmallest(5, 'Utilização Diária')
+                for _, row in low_performers.iterrows():
+                    if row['Utilização Diária'] < 10:
+                        st.warning(f"**{row['Placa']}** - {row['Utilização Diária']:.1f} reg/dia")
     
     # Oportunidades de otimização
     st.subheader("🎯 Oportunidades de Otimização")
@@ -605,7 +598,7 @@ def show_predictions(insights, analyzer):
     predictions = []
     
     # Predição de manutenção
-    high_usage_vehicles = df.groupby('placa')['odometro_periodo_km'].sum().sort_values(ascending=False).head(10)
+    high_usage_vehicles = df.groupby('placa', observed=True)['odometro_periodo_km'].sum().sort_values(ascending=False).head(10)
     
     for placa, total_km in high_usage_vehicles.items():
         if total_km > 1000:  # Veículos com alta quilometragem
@@ -60,8 +60,7 @@ if df_inicial.empty:
 else:
     st.success(f"✅ Dados carregados: {len(df_inicial):,} registros para geração de relatórios")
 
-# Carregar dados com cache para performance
-@st.cache_data(ttl=300)  # Cache por 5 minutos
+# Os registros vêm do cache de dados compartilhado do DatabaseManager (invalidado a cada carga)
 def load_report_data():
     """Carrega dados otimizados para relatórios"""
     try:
@@ -242,7 +241,7 @@ def show_executive_preview(df, summary, analyzer):
         st.metric("🚗 Taxa de Utilização", f"{utilizacao:.1f}%")
     
     # Gráfico de utilização por veículo
-    vehicle_usage = df.groupby('placa').agg({
+    vehicle_usage = df.groupby('placa', observed=True).agg({
         'velocidade_km': 'mean',
         'data': 'count'
     }).reset_index()
@@ -302,7 +301,7 @@ def show_performance_preview(df, analyzer):
         return
     
     # Top performers
-    performance = df.groupby('placa').agg({
+    performance = df.groupby('placa', observed=True).agg({
         'velocidade_km': 'mean',
         'odometro_periodo_km': 'sum',
         'data': 'count'
@@ -353,7 +352,7 @@ def show_compliance_preview(df, analyzer):
     
     if len(excesso_velocidade) > 0:
         # Veículos com mais violações
-        violacoes_por_veiculo = excesso_velocidade.groupby('placa').size().reset_index(name='Violações')
+        violacoes_por_veiculo = excesso_velocidade.groupby('placa', observed=True).size().reset_index(name='Violações')
         violacoes_por_veiculo = violacoes_por_veiculo.sort_values('Violações', ascending=False)
         
         fig = px.bar(violacoes_por_veiculo.head(10), x='placa', y='Violações',
@@ -12,7 +12,7 @@ def main():
     st.markdown("**Monitoramento de conformidade operacional das vans da prefeitura**")
     
     # Carregar dados diretamente
-    df_inicial = DatabaseManager.get_dashboard_data()
+    df_inicial = DatabaseManager.get_dashboard_data(columns='controle_operacional')
     if df_inicial.empty:
         st.warning("⚠️ Não há dados carregados. Faça upload de arquivos CSV primeiro.")
         return
@@ -148,29 +148,20 @@ def main():
     with tab4:
         show_detailed_report(df)
 
-@st.cache_data(ttl=300)
 def get_client_list():
-    """Busca lista de clientes com cache para melhor performance"""
+    """Busca lista de clientes no catálogo de dimensões (sem ler a telemetria)"""
     try:
-        df = DatabaseManager.get_dashboard_data()
-        if not df.empty and 'cliente' in df.columns:
-            return sorted(df['cliente'].unique().tolist())
-        return []
+        return DatabaseManager.get_client_list()
     except Exception as e:
         st.error(f"Erro ao carregar clientes: {str(e)}")
         return []
 
-@st.cache_data(ttl=300)
 def get_vehicle_list(client_filter=None):
-    """Busca lista de veículos com cache para melhor performance"""
+    """Busca lista de veículos no catálogo de dimensões (sem ler a telemetria)"""
     try:
-        df = DatabaseManager.get_dashboard_data()
-        if not df.empty and 'placa' in df.columns:
-            # Filtrar por cliente se especificado
-            if client_filter and client_filter != "Todos":
-                df = df[df['cliente'] == client_filter]
-            return sorted(df['placa'].unique().tolist())
-        return []
+        if client_filter == "Todos":
+            client_filter = None
+        return DatabaseManager.get_vehicle_list(client_filter)
     except Exception as e:
         st.error(f"Erro ao carregar veículos: {str(e)}")
         return []
@@ -190,7 +181,8 @@ def load_filtered_data(client_filter, vehicle_filter, start_date, end_date):
             client_filter=client_f,
             vehicle_filter=vehicle_f,
             start_date=start_datetime,
-            end_date=end_datetime
+            end_date=end_datetime,
+            columns='controle_operacional'
         )
         
         return df
@@ -286,7 +278,11 @@ def safe_column_access(df, column, default_value=None, numeric=False):
     if numeric:
         return pd.to_numeric(series, errors='coerce').fillna(0)
     else:
-        return series.fillna(default_value if default_value is not None else '')
+        fill_value = default_value if default_value is not None else ''
+        # Colunas categóricas só aceitam valores que já são categorias
+        if isinstance(series.dtype, pd.CategoricalDtype) and fill_value not in series.cat.categories:
+            series = series.cat.add_categories([fill_value])
+        return series.fillna(fill_value)
 
 def process_operational_data(df, include_stationary=False):
     """Processa dados para análise operacional com critérios de movimento"""
@@ -738,7 +734,7 @@ def show_detailed_report(df):
     # Relatório por veículo
     st.markdown("#### 🚗 Análise por Veículo")
     
-    vehicle_summary = df.groupby('placa').agg({
+    vehicle_summary = df.groupby('placa', observed=True).agg({
         'data': 'count',
         'operacao_autorizada': ['sum', 'mean'],
         'velocidade_km': ['mean', 'max'],
@@ -0,0 +1,121 @@
+"""
+Behavior checks of DataAnalyzer's indexed and aggregated paths against plain pandas on the same frame
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from database.db_manager import DatabaseManager
+from utils.data_analyzer import DataAnalyzer, VehicleTimeIndex
+
+def make_frame(unit='us', tz='UTC', rows=600):
+    """Telemetry of three vehicles interleaved in time, as rows arrive from a CSV"""
+    rng = np.random.default_rng(7)
+    dates = pd.date_range('2025-01-01', periods=rows, freq='37min', tz=tz).as_unit(unit)
+    return pd.DataFrame({
+        'cliente': pd.Categorical(np.where(np.arange(rows) % 3 == 2, 'Cliente B', 'Cliente A')),
+        'placa': pd.Categorical(np.array(['AAA1111', 'BBB2222', 'CCC3333'])[np.arange(rows) % 3]),
+        'data': dates,
+        'velocidade_km': rng.integers(0, 120, rows).astype('float32'),
+        'odometro_periodo_km': rng.random(rows).astype('float32'),
+        'gps': rng.integers(0, 2, rows).astype('int8'),
+        'bloqueado': np.zeros(rows, dtype='int8'),
+        'engine_hours_period': rng.integers(0, 600, rows).astype('float32'),
+    })
+
+def mask_filter(df, placa=None, start=None, end=None):
+    """Reference result: boolean masks over the unsorted frame"""
+    tz = df['data'].dt.tz
+    mask = pd.Series(True, index=df.index)
+    if placa is not None:
+        mask &= df['placa'] == placa
+    if start is not None:
+        mask &= df['data'] >= VehicleTimeIndex.as_bound(start, tz)
+    if end is not None:
+        mask &= df['data'] <= VehicleTimeIndex.as_bound(end, tz)
+    return df[mask]
+
+def same_rows(left, right):
+    key = ['placa', 'data']
+    left = left.sort_values(key).reset_index(drop=True)
+    right = right.sort_values(key).reset_index(drop=True)
+    pd.testing.assert_frame_equal(left, right)
+
+@pytest.mark.parametrize('unit', ['s', 'ms', 'us', 'ns'])
+@pytest.mark.parametrize('tz', ['UTC', None])
+@pytest.mark.parametrize('placa', [None, 'BBB2222', 'ZZZ0000'])
+def test_indexed_filters_match_boolean_masks(unit, tz, placa):
+    df = make_frame(unit, tz)
+    analyzer = DataAnalyzer(df)
+    assert analyzer._index is not None
+
+    start, end = '2025-01-03 10:15:30.5', '2025-01-07'
+    filtered = analyzer.apply_filters(placa=placa, data_inicio=start, data_fim=end)
+    expected = mask_filter(df, placa, start, end)
+    if placa != 'ZZZ0000':
+        assert len(expected) > 0
+    same_rows(filtered, expected)
+
+def test_indexed_filter_without_dates_keeps_all_vehicle_rows():
+    df = make_frame()
+    filtered = DataAnalyzer(df).apply_filters(placa='AAA1111')
+    same_rows(filtered, mask_filter(df, 'AAA1111'))
+
+def test_single_day_filter_includes_the_whole_day():
+    df = make_frame('us', 'UTC')
+    filtered = DataAnalyzer(df).apply_filters(data_inicio='2025-01-04', data_fim='2025-01-04')
+    same_rows(filtered, mask_filter(df, None, '2025-01-04', '2025-01-04 23:59:59.999999'))
+
+def test_kpis_over_filtered_us_frame():
+    df = make_frame('us', 'UTC')
+    analyzer = DataAnalyzer(df)
+    analyzer.apply_filters(data_inicio='2025-01-03', data_fim='2025-01-07')
+    expected = mask_filter(df, None, '2025-01-03', '2025-01-07')
+
+    kpis = analyzer.get_kpis()
+    assert kpis['total_registros'] == len(expected)
+    assert kpis['total_veiculos'] == expected['placa'].nunique()
+
+def test_compare_vehicles_matches_per_plate_pandas():
+    df = make_frame()
+    analyzer = DataAnalyzer(df)
+    comparison = analyzer.compare_vehicles(['AAA1111', 'CCC3333', 'ZZZ0000'])
+
+    assert set(comparison) == {'AAA1111', 'CCC3333'}
+    for placa, stats in comparison.items():
+        rows = df[df['placa'] == placa]
+        assert stats['total_registros'] == len(rows)
+        assert stats['velocidade_maxima'] == rows['velocidade_km'].max()
+        assert stats['violacoes_velocidade'] == (rows['velocidade_km'] > DataAnalyzer.SPEED_LIMIT).sum()
+        assert stats['distancia_total'] == pytest.approx(rows['odometro_periodo_km'].sum(), rel=1e-5)
+
+def test_compare_vehicles_without_matching_rows():
+    analyzer = DataAnalyzer(make_frame())
+    analyzer.apply_filters(data_inicio='2030-01-01', data_fim='2030-01-31')
+
+    stats = analyzer.get_vehicle_stats()
+    assert stats.empty
+    assert list(stats.columns) == DataAnalyzer.VEHICLE_STATS_COLUMNS
+    assert analyzer.compare_vehicles(['AAA1111', 'BBB2222']) == {}
+
+def test_compare_vehicles_needs_two_known_plates():
+    analyzer = DataAnalyzer(make_frame())
+    assert analyzer.compare_vehicles(['AAA1111', 'ZZZ0000']) == {}
+
+def test_pushdown_falls_back_to_frame_when_database_aggregates_fail(monkeypatch):
+    df = make_frame()
+
+    def unavailable(*args, **kwargs):
+        raise RuntimeError('database unavailable')
+
+    monkeypatch.setattr(DatabaseManager, 'get_telematics_aggregates', unavailable)
+    monkeypatch.setattr(DatabaseManager, 'get_dashboard_data', lambda **kwargs: df)
+    analyzer = DataAnalyzer.from_database(pushdown=True, columns='analise')
+
+    vehicles = analyzer.get_vehicle_aggregates().set_index('placa')
+    by_plate = df.groupby('placa', observed=True)
+    assert vehicles['registros'].to_dict() == by_plate.size().to_dict()
+    assert vehicles['velocidade_maxima'].to_dict() == by_plate['velocidade_km'].max().to_dict()
+
+    speed = analyzer.get_speed_analysis()
+    assert speed['distribuicao'].sum() == len(df)
+    assert speed['velocidade_maxima_por_veiculo'].to_dict() == by_plate['velocidade_km'].max().to_dict()
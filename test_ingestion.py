@@ -0,0 +1,104 @@
+"""
+Behavior checks of re-upload detection and natural-key dedup on ingest.
+
+The bulk-load checks need a PostgreSQL database they may clear: set
+TEST_DATABASE_URL to run them, otherwise they are skipped.
+"""
+import io
+import os
+import pytest
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+from database import connection
+from database.csv_sniffer import CSVSniffer
+from database.db_manager import DatabaseManager
+from database.models import ProcessingHistory, TelematicsData, TelematicsDailyRollup
+from database.normalizer import TelematicsNormalizer
+from database.services import FleetDatabaseService
+
+SAMPLE_CSV = 'attached_assets/relatorio_historico_de_posicoes-tfe-6d41_05-09-2025_06_47_1757817200636.csv'
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+
+def sample_batch():
+    spec = CSVSniffer.sniff(SAMPLE_CSV)
+    return TelematicsNormalizer.normalize(spec.read(SAMPLE_CSV))
+
+def distinct_positions(batch):
+    """Rows of a batch left once the natural key (plate, time, packet, event) is deduplicated"""
+    valid = batch[batch['data'].notna()]
+    keys = valid.assign(pacote=valid['pacote'].fillna(''), tipo_evento=valid['tipo_evento'].fillna(''))
+    return len(keys.drop_duplicates(['placa', 'data', 'pacote', 'tipo_evento']))
+
+def test_ingestion_status_requires_every_row_stored():
+    assert FleetDatabaseService.ingestion_status(100, 100, 0) == 'completed'
+    assert FleetDatabaseService.ingestion_status(100, 40, 60) == 'completed'
+    assert FleetDatabaseService.ingestion_status(100, 40, 50) == 'partial'
+    assert FleetDatabaseService.ingestion_status(0, 0, 0) == 'completed'
+
+def test_only_completed_files_are_treated_as_processed():
+    engine = create_engine('sqlite://')
+    ProcessingHistory.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    db = FleetDatabaseService()
+    db.session = session
+    for content_hash, status in (('a' * 64, 'completed'), ('b' * 64, 'partial'),
+                                 ('c' * 64, 'failed'), ('d' * 64, 'processing')):
+        db.save_processing_history(filename=f'{status}.csv', records_processed=1,
+                                   processing_status=status, content_hash=content_hash)
+
+    assert db.get_processed_hashes(['a' * 64, 'b' * 64, 'c' * 64, 'd' * 64, 'e' * 64]) == {'a' * 64}
+    assert db.is_content_processed('a' * 64)
+    assert not db.is_content_processed('b' * 64)
+    session.close()
+
+def test_content_hash_matches_for_path_buffer_and_bytes():
+    with open(SAMPLE_CSV, 'rb') as f:
+        data = f.read()
+    buffer = io.BytesIO(data)
+    buffer.seek(10)
+    expected = DatabaseManager.content_hash(data)
+    assert DatabaseManager.content_hash(SAMPLE_CSV) == expected
+    assert DatabaseManager.content_hash(buffer) == expected
+    # The caller's read position is kept
+    assert buffer.tell() == 10
+
+@pytest.fixture
+def postgres():
+    if not TEST_DATABASE_URL:
+        pytest.skip('TEST_DATABASE_URL not set')
+    if connection.engine is None:
+        connection.DATABASE_URL = TEST_DATABASE_URL
+    assert connection.initialize_database()
+    assert str(connection.engine.url) == str(create_engine(TEST_DATABASE_URL).url)
+    with FleetDatabaseService() as db:
+        db.clear_all_data()
+    yield
+    with FleetDatabaseService() as db:
+        db.clear_all_data()
+
+def test_reloading_a_batch_skips_natural_key_duplicates(postgres):
+    batch = sample_batch()
+    read = int(batch['data'].notna().sum())
+    stored = distinct_positions(batch)
+
+    with FleetDatabaseService() as db:
+        first = db.save_telematics_data(batch)
+        assert first == stored
+        assert db.last_save_stats['duplicates'] == read - stored
+
+        again = db.save_telematics_data(batch)
+        assert again == 0
+        assert db.last_save_stats['duplicates'] == read
+
+        assert db.session.query(func.count()).select_from(TelematicsData).scalar() == stored
+        # Rollups only receive the rows that were actually inserted
+        assert db.session.query(func.sum(TelematicsDailyRollup.records)).scalar() == stored
+
+def test_reupload_of_a_completed_file_is_skipped(postgres):
+    first = DatabaseManager.migrate_csv_stream(SAMPLE_CSV)
+    assert first['success'] and not first.get('skipped')
+    assert first['records_failed'] == 0
+
+    second = DatabaseManager.migrate_csv_stream(SAMPLE_CSV)
+    assert second['skipped']
+    assert second['records_processed'] == 0
@@ -0,0 +1,78 @@
+"""
+Behavior checks of the telemetry query helpers: UTC bounds, rollup bucket bounds and compact frames
+"""
+from datetime import date, datetime, timedelta, timezone
+import pandas as pd
+import pytest
+from database.connection import as_utc
+from database.services import FleetDatabaseService
+
+def utc(text):
+    return pd.Timestamp(text, tz='UTC')
+
+def test_naive_bounds_are_utc():
+    assert as_utc(datetime(2025, 3, 1, 12)) == datetime(2025, 3, 1, 12, tzinfo=timezone.utc)
+    assert as_utc(date(2025, 3, 1)) == datetime(2025, 3, 1, tzinfo=timezone.utc)
+    assert as_utc('2025-03-01 12:00') == datetime(2025, 3, 1, 12, tzinfo=timezone.utc)
+    brasilia = timezone(timedelta(hours=-3))
+    assert as_utc(datetime(2025, 3, 1, 21, tzinfo=brasilia)) == datetime(2025, 3, 2, 0, tzinfo=timezone.utc)
+
+def test_day_bounds_from_a_date_filter():
+    start, end = FleetDatabaseService._bucket_bounds('D', date(2025, 3, 1), datetime(2025, 3, 5, 23, 59, 59, 999999))
+    # Inclusive end of day closes the bucket of 5 March
+    assert (start, end) == (utc('2025-03-01'), utc('2025-03-06'))
+
+def test_end_on_a_boundary_excludes_the_bucket_it_opens():
+    _, end = FleetDatabaseService._bucket_bounds('D', None, date(2025, 3, 5))
+    assert end == utc('2025-03-05')
+
+def test_hour_bounds_in_another_time_zone_are_converted():
+    start, end = FleetDatabaseService._bucket_bounds('h', pd.Timestamp('2025-03-01 09:00', tz='America/Sao_Paulo'), None)
+    assert start == utc('2025-03-01 12:00')
+    assert end is None
+
+@pytest.mark.parametrize('unit, start, end', [
+    ('D', '2025-03-01 10:00', None),
+    ('D', None, '2025-03-05 12:00'),
+    ('h', '2025-03-01 10:30', None),
+])
+def test_bounds_inside_a_bucket_are_rejected(unit, start, end):
+    with pytest.raises(ValueError):
+        FleetDatabaseService._bucket_bounds(unit, start, end)
+
+def test_compact_frame_dtypes_and_category_union():
+    first = pd.DataFrame({
+        'placa': ['AAA1111', 'AAA1111'],
+        'data': pd.to_datetime(['2025-03-01 10:00', '2025-03-01 11:00'], utc=True),
+        'velocidade_km': [10.5, 0.0],
+        'latitude': [-15.793889, -15.8],
+        'gps': [1, 0],
+    })
+    second = pd.DataFrame({
+        'placa': ['BBB2222'],
+        'data': pd.to_datetime(['2025-03-01 12:00'], utc=True),
+        'velocidade_km': [80.25],
+        'latitude': [-15.9],
+        'gps': [1],
+    })
+
+    frame = FleetDatabaseService.compact_frame([first, second])
+
+    assert isinstance(frame['placa'].dtype, pd.CategoricalDtype)
+    assert list(frame['placa'].cat.categories) == ['AAA1111', 'BBB2222']
+    assert frame['placa'].tolist() == ['AAA1111', 'AAA1111', 'BBB2222']
+    assert frame['velocidade_km'].dtype == 'float32'
+    assert frame['velocidade_km'].tolist() == [10.5, 0.0, 80.25]
+    # Coordinates keep double precision
+    assert frame['latitude'].dtype == 'float64'
+    assert frame['latitude'].iloc[0] == -15.793889
+    assert frame['gps'].dtype == 'int8'
+
+def test_column_profiles_resolve_to_known_columns():
+    for profile, columns in FleetDatabaseService.TELEMATICS_COLUMN_PROFILES.items():
+        assert FleetDatabaseService.resolve_columns(profile) == columns
+        assert set(columns) <= set(FleetDatabaseService.TELEMATICS_FRAME_COLUMNS)
+    assert 'motorista' in FleetDatabaseService.resolve_columns('mapa_rotas')
+    assert 'endereco' not in FleetDatabaseService.resolve_columns()
+    with pytest.raises(ValueError):
+        FleetDatabaseService.resolve_columns(['placa', 'nao_existe'])
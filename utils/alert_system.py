@@ -19,7 +19,7 @@ class AlertSystem:
     def check_realtime_alerts(self) -> List[Dict[str, Any]]:
         """Verifica alertas em tempo real"""
         alerts = []
-        df = DatabaseManager.get_dashboard_data()
+        df = DatabaseManager.get_dashboard_data(columns='alertas')
         
         if df.empty:
             return alerts
@@ -100,19 +100,15 @@ class AlertSystem:
     def _check_battery_alerts(self, df: pd.DataFrame) -> List[Dict]:
         alerts = []
         if 'battery_level' in df.columns:
-            # Converter battery_level para numérico (vem como string)
-            df_copy = df.copy()
-            df_copy['bateria_num'] = pd.to_numeric(df_copy['battery_level'], errors='coerce')
-            
-            # Filtrar apenas valores válidos
-            df_copy = df_copy.dropna(subset=['bateria_num'])
+            # battery_level já é numérico (convertido na ingestão)
+            df_copy = df[df['battery_level'].notna()]
             
             if not df_copy.empty:
                 # Alertas de bateria baixa (abaixo de 12V)
-                low_battery = df_copy[df_copy['bateria_num'] < self.alert_configs['bateria_baixa']]
+                low_battery = df_copy[df_copy['battery_level'] < self.alert_configs['bateria_baixa']]
                 
                 for _, row in low_battery.iterrows():
-                    bat = row['bateria_num']
+                    bat = row['battery_level']
                     severity = 'Alta' if bat < self.alert_configs['bateria_critica'] else 'Média'
                     alerts.append({
                         'tipo': 'Bateria Baixa',
@@ -7,6 +7,8 @@ import re
 import sys
 sys.path.append('.')
 from database.db_manager import DatabaseManager
+from database.csv_sniffer import CSVSniffer
+from database.normalizer import TelematicsNormalizer
 
 class CSVProcessor:
     """Classe para processar arquivos CSV de dados telemáticos"""
@@ -167,42 +169,11 @@ class CSVProcessor:
     def process_csv_file(self, uploaded_file):
         """Processa arquivo CSV completo"""
         try:
-            # Detectar separador e encoding do arquivo
-            separator = ','
-            encoding = 'utf-8'
+            # Detectar separador, encoding e cabeçalho com uma única amostra
+            spec = CSVSniffer.sniff(uploaded_file)
+            df = spec.read(uploaded_file)
             
-            # Tentar diferentes separadores e encodings
-            sample = uploaded_file.read(1024)
-            uploaded_file.seek(0)
-            
-            if isinstance(sample, bytes):
-                sample_str = sample.decode('utf-8', errors='ignore')
-            else:
-                sample_str = sample
-            
-            # Detectar separador (vírgula vs ponto e vírgula)
-            if sample_str.count(';') > sample_str.count(','):
-                separator = ';'
-            
-            # Tentar ler com diferentes encodings
-            df = None
-            encodings_to_try = ['utf-8', 'latin-1', 'iso-8859-1', 'windows-1252', 'cp1252']
-            
-            for enc in encodings_to_try:
-                try:
-                    uploaded_file.seek(0)
-                    df = pd.read_csv(uploaded_file, sep=separator, encoding=enc)
-                    encoding = enc
-                    break
-                except:
-                    continue
-            
-            if df is None:
-                # Fall back para leitura padrão
-                uploaded_file.seek(0)
-                df = pd.read_csv(uploaded_file, sep=separator)
-            
-            st.info(f"📄 Arquivo lido com separador '{separator}' e encoding '{encoding}'")
+            st.info(f"📄 Arquivo lido com separador '{spec.sep}' e encoding '{spec.encoding}'")
             
             # Validar estrutura
             if not self.validate_csv_structure(df):
@@ -216,9 +187,7 @@ class CSVProcessor:
             
             # Converter horímetros
             if 'horimetro_periodo' in clean_df.columns:
-                clean_df['horimetro_periodo'] = clean_df['horimetro_periodo'].apply(
-                    self.convert_time_to_hours
-                )
+                clean_df['horimetro_periodo'] = TelematicsNormalizer.to_seconds(clean_df['horimetro_periodo']) / 3600.0
             
             # Salvar dados processados
             filename = getattr(uploaded_file, 'name', 'uploaded_file.csv')
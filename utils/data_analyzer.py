@@ -1,3 +1,4 @@
+import functools
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
@@ -7,160 +8,456 @@ from plotly.subplots import make_subplots
 import sys
 sys.path.append('.')
 from database.db_manager import DatabaseManager
+from database.services import FleetDatabaseService
+from database.normalizer import TelematicsNormalizer
+
+def _detached(result):
+    """Cópia rasa de um resultado: atribuições do chamador não alteram o que ficou memoizado"""
+    if isinstance(result, dict):
+        return {key: _detached(value) for key, value in result.items()}
+    if isinstance(result, (pd.DataFrame, pd.Series)):
+        return result.copy(deep=False)
+    return result
+
+def _memoized(method):
+    """Calcula a análise uma vez por estado de filtros; chamadas seguintes reutilizam o resultado"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        try:
+            cached = key in self._results
+        except TypeError:
+            # Argumentos não hasheáveis (ex.: um DataFrame de estatísticas já calculado)
+            return method(self, *args, **kwargs)
+        if not cached:
+            self._results[key] = method(self, *args, **kwargs)
+        return _detached(self._results[key])
+    return wrapper
+
+class VehicleTimeIndex:
+    """Intervalos de linhas por veículo de um DataFrame ordenado por (placa, data), com busca binária por data"""
+    
+    def __init__(self, frame):
+        codes = self.plate_codes(frame['placa'])
+        boundaries = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+        self.starts = np.concatenate(([0], boundaries))
+        self.ends = np.concatenate((boundaries, [len(frame)]))
+        
+        # Rótulos lidos só na primeira linha de cada bloco
+        plates = frame['placa'].take(self.starts).tolist()
+        self.vehicle_rows = {
+            plate: (int(start), int(end))
+            for plate, start, end in zip(plates, self.starts, self.ends) if not pd.isna(plate)
+        }
+        
+        dates = frame['data']
+        # Inteiros do datetime (UTC quando há timezone); NaT é o menor int64 e fica no início de cada veículo
+        self.ticks = dates.array.asi8
+        self.unit = getattr(dates.dtype, 'unit', None) or np.datetime_data(dates.dtype)[0]
+        self.tz = getattr(dates.dtype, 'tz', None)
+    
+    @staticmethod
+    def plate_codes(plates):
+        """Código inteiro de cada placa (-1 para nulos)"""
+        if isinstance(plates.dtype, pd.CategoricalDtype):
+            return plates.array.codes
+        return pd.factorize(plates)[0]
+    
+    @classmethod
+    def build(cls, frame):
+        """(frame ordenado por placa e data, índice); só reordena, com uma cópia, se o frame não vier ordenado"""
+        codes = cls.plate_codes(frame['placa'])
+        ticks = frame['data'].array.asi8
+        boundaries = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+        in_order = ticks[1:] >= ticks[:-1]
+        in_order[boundaries - 1] = True
+        # Ordenado se nenhuma placa se repete entre blocos e as datas crescem dentro de cada um
+        run_codes = codes[np.concatenate(([0], boundaries))]
+        if len(np.unique(run_codes)) != len(run_codes) or not in_order.all():
+            frame = frame.take(np.lexsort((ticks, codes)))
+        return frame, cls(frame)
+    
+    @staticmethod
+    def as_bound(value, tz):
+        """Data do filtro no mesmo tipo da coluna; datas sem timezone valem como UTC em dados com timezone"""
+        bound = pd.Timestamp(value)
+        if tz is not None and bound.tz is None:
+            return bound.tz_localize('UTC')
+        if tz is None and bound.tz is not None:
+            return bound.tz_convert('UTC').tz_localize(None)
+        return bound
+    
+    def time_bound(self, value, ceil=False):
+        """Data do filtro -> inteiro comparável a self.ticks, na unidade da coluna (Timestamp.value é sempre ns).
+        
+        Frações abaixo da unidade são truncadas, ou arredondadas para cima com ceil (limite inferior).
+        """
+        bound = self.as_bound(value, self.tz)
+        if bound.tz is not None:
+            bound = bound.tz_convert(None)
+        exact = bound.to_datetime64()
+        tick = np.datetime64(exact, self.unit)
+        if ceil and tick < exact:
+            tick += np.timedelta64(1, self.unit)
+        return int(tick.view('i8'))
+    
+    def rows(self, placa=None, start=None, end=None):
+        """Intervalos [início, fim) das linhas do veículo (ou de todos) com data entre start e end, inclusive"""
+        if placa is not None:
+            ranges = [self.vehicle_rows.get(placa, (0, 0))]
+        else:
+            ranges = zip(self.starts.tolist(), self.ends.tolist())
+        if start is None and end is None:
+            return list(ranges)
+        
+        # NaT nunca satisfaz um filtro de data
+        low = max(self.time_bound(start, ceil=True), pd.NaT.value + 1) if start is not None else pd.NaT.value + 1
+        high = self.time_bound(end) if end is not None else None
+        selected = []
+        for first, last in ranges:
+            ticks = self.ticks[first:last]
+            lower = first + int(np.searchsorted(ticks, low, side='left'))
+            upper = first + int(np.searchsorted(ticks, high, side='right')) if high is not None else last
+            if lower < upper:
+                selected.append((lower, upper))
+        return selected
+    
+    @staticmethod
+    def take(frame, ranges):
+        """Linhas dos intervalos; intervalos contíguos viram uma fatia (view), sem copiar os dados"""
+        merged = []
+        for first, last in ranges:
+            if merged and merged[-1][1] == first:
+                merged[-1] = (merged[-1][0], last)
+            elif first < last:
+                merged.append((first, last))
+        if not merged:
+            return frame.iloc[0:0]
+        if len(merged) == 1:
+            return frame.iloc[merged[0][0]:merged[0][1]]
+        return frame.take(np.concatenate([np.arange(first, last) for first, last in merged]))
 
 class DataAnalyzer:
     """Classe para análise de dados de frota"""
     
+    # Dia da semana ISO (1 = segunda) -> nome usado por Series.dt.day_name()
+    ISO_WEEKDAYS = {1: 'Monday', 2: 'Tuesday', 3: 'Wednesday', 4: 'Thursday', 5: 'Friday', 6: 'Saturday', 7: 'Sunday'}
+    
+    # Limites de compliance
+    SPEED_LIMIT = 80  # km/h
+    MIN_GPS_COVERAGE = 95  # %
+    
     def __init__(self, df):
         """Inicializa o analisador com DataFrame"""
-        self.df = df
-        self.filtered_df = df.copy()
+        # Índice por (placa, data) do df, montado uma vez ao carregar (ver _prepare)
+        self._index = None
+        self._df = self._prepare(df)
+        # Cópia rasa: colunas derivadas ficam no analisador, os dados não são duplicados
+        self._filtered_df = self._df.copy(deep=False) if self._df is not None else None
+        # Filtros equivalentes na base, para consultas agregadas; None se o df não veio da base
+        self.source_filters = None
+        # Modo push-down: KPIs e agregações calculados pela base, registros brutos só sob demanda
+        self.pushdown = False
+        self._base_filters = None
+        # Colunas (lista ou perfil de painel) buscadas quando os registros vêm da base
+        self.columns = None
+        # Análises já calculadas para o estado atual dos filtros (ver _memoized)
+        self._results = {}
+    
+    @property
+    def df(self):
+        """Registros brutos; no modo push-down são carregados da base no primeiro acesso"""
+        if self._df is None:
+            self._df = self._prepare(self._load_frame(self._base_filters, self.columns))
+        return self._df
+    
+    @df.setter
+    def df(self, value):
+        self._df = self._prepare(value)
+        self._results.clear()
+    
+    @property
+    def filtered_df(self):
+        """Registros filtrados; no modo push-down são carregados da base no primeiro acesso"""
+        if self._filtered_df is None:
+            self._filtered_df = self._load_frame(self.source_filters, self.columns)
+        return self._filtered_df
+    
+    @filtered_df.setter
+    def filtered_df(self, value):
+        # Um DataFrame atribuído de fora não corresponde mais aos filtros da base
+        self._filtered_df = value
+        self.source_filters = None
+        self.pushdown = False
+        self._results.clear()
+    
+    def _prepare(self, df):
+        """Converte 'data' para datetime e indexa o frame por (placa, data), uma única vez por carga"""
+        self._index = None
+        if df is None or df.empty or 'data' not in df.columns:
+            return df
+        if not pd.api.types.is_datetime64_any_dtype(df['data']):
+            df = df.copy(deep=False)
+            df['data'] = pd.to_datetime(df['data'], errors='coerce')
+        if 'placa' in df.columns and pd.api.types.is_datetime64_any_dtype(df['data']):
+            # Frames da base já chegam nessa ordem; os demais são reordenados aqui uma vez
+            df, self._index = VehicleTimeIndex.build(df)
+        return df
+    
+    @staticmethod
+    def _database_filters(filters):
+        """Filtros do analisador -> argumentos de DatabaseManager ('Todos' vira None)"""
+        return {
+            'client_filter': filters['cliente'] if filters['cliente'] not in [None, "Todos", "TODOS"] else None,
+            'vehicle_filter': filters['placa'] if filters['placa'] not in [None, "Todos", "TODOS"] else None,
+            'start_date': filters['data_inicio'],
+            'end_date': filters['data_fim']
+        }
+    
+    @classmethod
+    def _load_frame(cls, filters, columns=None):
+        df = DatabaseManager.get_dashboard_data(columns=columns, **cls._database_filters(filters))
+        if not df.empty:
+            print(f"✅ DataAnalyzer: {len(df):,} registros carregados da base PostgreSQL")
+        return df
     
     @classmethod
-    def from_database(cls, cliente=None, placa=None, data_inicio=None, data_fim=None):
-        """Cria uma instância do analisador usando dados da base de dados"""
+    def from_database(cls, cliente=None, placa=None, data_inicio=None, data_fim=None, pushdown=False, columns=None):
+        """Cria uma instância do analisador usando dados da base de dados.
+        
+        Com pushdown=True nenhum registro bruto é carregado: get_kpis,
+        get_speed_analysis e get_operational_analysis viram consultas agregadas
+        e df/filtered_df só são buscados se algum painel os acessar.
+        
+        columns limita os registros às colunas de uma lista ou de um perfil de
+        painel (ex.: 'analise', as colunas usadas pelas análises desta classe).
+        """
+        filters = {'cliente': cliente, 'placa': placa, 'data_inicio': data_inicio, 'data_fim': data_fim}
+        if pushdown:
+            analyzer = cls(None)
+            analyzer.pushdown = True
+            analyzer.columns = columns
+            analyzer._base_filters = dict(filters)
+            analyzer.source_filters = filters
+            return analyzer
+        
         try:
             # Buscar dados da base de dados com filtros
-            df = DatabaseManager.get_dashboard_data(
-                client_filter=cliente if cliente != "Todos" else None,
-                vehicle_filter=placa if placa != "Todos" else None,
-                start_date=data_inicio,
-                end_date=data_fim
-            )
-            
-            if not df.empty:
-                print(f"✅ DataAnalyzer: {len(df):,} registros carregados da base PostgreSQL")
-            
-            return cls(df)
+            analyzer = cls(cls._load_frame(filters, columns))
+            analyzer.columns = columns
+            analyzer._base_filters = dict(filters)
+            analyzer.source_filters = filters
+            return analyzer
         except Exception as e:
             print(f"❌ Erro ao carregar dados: {str(e)}")
             # Em caso de erro, retornar analisador com DataFrame vazio
-            empty_df = pd.DataFrame(columns=[
-                'cliente', 'placa', 'data', 'velocidade_km', 'odometro_periodo_km',
-                'gps', 'bloqueado', 'engine_hours_period'
-            ])
+            empty_df = pd.DataFrame(columns=FleetDatabaseService.TELEMATICS_COLUMN_PROFILES['analise'])
             return cls(empty_df)
     
+    def set_filters(self, cliente=None, placa=None, data_inicio=None, data_fim=None):
+        """Registra os filtros para as consultas à base sem carregar registros"""
+        self._results.clear()
+        if self.source_filters is None:
+            return
+        if data_inicio and data_fim and pd.Timestamp(data_inicio).date() == pd.Timestamp(data_fim).date():
+            # Mesma regra de apply_filters: período de um único dia inclui o dia inteiro
+            data_fim = pd.Timestamp(data_fim).replace(hour=23, minute=59, second=59, microsecond=999999)
+        # Toda chave é reatribuída: "Todos" ou vazio volta ao filtro da carga (None se carregou tudo)
+        base = self._base_filters or {}
+        for key, value in (('cliente', cliente), ('placa', placa), ('data_inicio', data_inicio), ('data_fim', data_fim)):
+            if not value or (isinstance(value, str) and value in ["Todos", "TODOS"]):
+                value = base.get(key)
+            self.source_filters[key] = value
+        if self.pushdown:
+            self._filtered_df = None
+    
     def apply_filters(self, cliente=None, placa=None, data_inicio=None, data_fim=None):
         """Aplica filtros aos dados com tratamento robusto para 'TODOS'"""
-        try:
-            filtered = self.df.copy()
-            
-            # Filtro por cliente - garantir que "Todos" não cause problemas
-            if cliente and cliente not in ["Todos", "TODOS", None]:
-                filtered = filtered[filtered['cliente'] == cliente]
-            
-            # Filtro por placa - garantir que "Todos" não cause problemas  
-            if placa and placa not in ["Todos", "TODOS", None]:
-                filtered = filtered[filtered['placa'] == placa]
-        
-        except Exception as e:
-            # Em caso de erro, retornar dados originais sem filtros
-            print(f"Erro ao aplicar filtros: {str(e)}")
-            filtered = self.df.copy()
-        
-        # Verificar se há dados e se a coluna 'data' existe e é datetime
-        if not filtered.empty and 'data' in filtered.columns:
+        if self.pushdown:
+            # Os registros filtrados vêm direto da base, sem carregar o período inteiro
+            self.set_filters(cliente, placa, data_inicio, data_fim)
+            return self.filtered_df
+        
+        frame = self.df
+        vehicle = placa if placa and placa not in ["Todos", "TODOS", None] else None
+        start = data_inicio or None
+        end = data_fim or None
+        # Se mesmo dia, incluir todo o dia até 23:59:59
+        if start is not None and end is not None and pd.Timestamp(start).date() == pd.Timestamp(end).date():
+            end = pd.Timestamp(end).replace(hour=23, minute=59, second=59, microsecond=999999)
+        
+        if self._index is not None:
+            # Placa vira um intervalo de linhas e o período, busca binária dentro de cada veículo
+            filtered = VehicleTimeIndex.take(frame, self._index.rows(vehicle, start, end))
+        else:
+            filtered = frame
             try:
-                # Garantir que a coluna 'data' é datetime
-                if not pd.api.types.is_datetime64_any_dtype(filtered['data']):
-                    filtered['data'] = pd.to_datetime(filtered['data'], errors='coerce')
-                
-                if data_inicio:
-                    # Converter data_inicio para o mesmo timezone dos dados
-                    try:
-                        if hasattr(filtered['data'].dtype, 'tz') and filtered['data'].dt.tz is not None:
-                            # Dados têm timezone, converter data_inicio
-                            data_inicio_tz = pd.Timestamp(data_inicio).tz_localize('UTC')
-                        else:
-                            # Dados sem timezone, usar timestamp simples
-                            data_inicio_tz = pd.Timestamp(data_inicio)
-                        filtered = filtered[filtered['data'] >= data_inicio_tz]
-                    except Exception:
-                        # Em caso de erro, usar comparação simples
-                        data_inicio_tz = pd.Timestamp(data_inicio)
-                        filtered = filtered[filtered['data'] >= data_inicio_tz]
-                
-                if data_fim:
-                    # Converter data_fim para o mesmo timezone dos dados
-                    try:
-                        if hasattr(filtered['data'].dtype, 'tz') and filtered['data'].dt.tz is not None:
-                            # Dados têm timezone, converter data_fim
-                            data_fim_tz = pd.Timestamp(data_fim).tz_localize('UTC')
-                        else:
-                            # Dados sem timezone, usar timestamp simples
-                            data_fim_tz = pd.Timestamp(data_fim)
-                        
-                        # CORREÇÃO: Se mesmo dia, incluir todo o dia até 23:59:59
-                        if data_inicio and pd.Timestamp(data_inicio).date() == pd.Timestamp(data_fim).date():
-                            data_fim_tz = data_fim_tz.replace(hour=23, minute=59, second=59, microsecond=999999)
-                        
-                        filtered = filtered[filtered['data'] <= data_fim_tz]
-                    except Exception:
-                        # Em caso de erro, usar comparação simples
-                        data_fim_tz = pd.Timestamp(data_fim)
-                        
-                        # CORREÇÃO: Se mesmo dia, incluir todo o dia até 23:59:59
-                        if data_inicio and pd.Timestamp(data_inicio).date() == pd.Timestamp(data_fim).date():
-                            data_fim_tz = data_fim_tz.replace(hour=23, minute=59, second=59, microsecond=999999)
-                        
-                        filtered = filtered[filtered['data'] <= data_fim_tz]
-                        
-            except Exception:
-                # Se houver erro com datetime, não aplicar filtros de data
-                pass
-        
-        self.filtered_df = filtered
+                if vehicle is not None:
+                    filtered = filtered[filtered['placa'] == vehicle]
+                if 'data' in filtered.columns and pd.api.types.is_datetime64_any_dtype(filtered['data']):
+                    tz = filtered['data'].dt.tz
+                    if start is not None:
+                        filtered = filtered[filtered['data'] >= VehicleTimeIndex.as_bound(start, tz)]
+                    if end is not None:
+                        filtered = filtered[filtered['data'] <= VehicleTimeIndex.as_bound(end, tz)]
+            except Exception as e:
+                # Em caso de erro, retornar dados originais sem filtros
+                print(f"Erro ao aplicar filtros: {str(e)}")
+                filtered = frame
+        
+        # Filtro por cliente - garantir que "Todos" não cause problemas
+        if cliente and cliente not in ["Todos", "TODOS", None] and 'cliente' in filtered.columns:
+            filtered = filtered[filtered['cliente'] == cliente]
+        
+        # Cópia rasa: as fatias continuam compartilhando os dados do frame carregado
+        filtered = filtered.copy(deep=False)
+        
+        # set_filters também descarta as análises memoizadas do filtro anterior
+        self.set_filters(cliente, placa, data_inicio, data_fim)
+        self._filtered_df = filtered
         return filtered
     
+    @_memoized
+    def get_activity_profile(self, by):
+        """Agregação por hora/dia/dia da semana/mês/placa lida dos rollups da base; None se indisponível"""
+        if self.source_filters is None or not DatabaseManager.rollups_maintained():
+            return None
+        try:
+            profile = DatabaseManager.get_activity_profile(by, **self._database_filters(self.source_filters))
+        except Exception as e:
+            print(f"Rollups indisponíveis, agregando o DataFrame: {str(e)}")
+            return None
+        if profile.empty:
+            return None
+        if by == 'placa':
+            profile = profile.drop(columns='veiculos')
+        # Mesmos nomes das agregações feitas sobre o DataFrame
+        return profile.rename(columns={
+            'veiculos': 'placa',
+            'velocidade_media': 'velocidade_km',
+            'km': 'odometro_periodo_km'
+        })
+    
     def _calculate_total_hours(self, time_series):
-        """Converte série de tempo (HH:MM:SS) para total de horas"""
-        total_hours = 0.0
-        for time_str in time_series:
-            if pd.isna(time_str) or time_str == '' or time_str == '0':
-                continue
-            try:
-                # Parse formato HH:MM:SS
-                parts = str(time_str).split(':')
-                if len(parts) >= 3:
-                    hours = int(parts[0])
-                    minutes = int(parts[1])
-                    seconds = int(parts[2])
-                    total_hours += hours + (minutes / 60.0) + (seconds / 3600.0)
-                elif len(parts) == 2:  # HH:MM
-                    hours = int(parts[0])
-                    minutes = int(parts[1])
-                    total_hours += hours + (minutes / 60.0)
-                elif len(parts) == 1:  # Apenas horas
-                    total_hours += float(parts[0])
-            except (ValueError, IndexError):
-                # Ignorar valores inválidos
-                continue
-        return float(total_hours)
+        """Converte horímetro em segundos (ou texto HH:MM:SS legado) para total de horas"""
+        if not pd.api.types.is_numeric_dtype(time_series):
+            time_series = TelematicsNormalizer.to_seconds(time_series)
+        return float(time_series.sum() / 3600.0)
+    
+    @_memoized
+    def get_aggregates(self, group_by=None):
+        """Agregados calculados pela base para os filtros atuais (modo push-down); None se indisponível"""
+        if not self.pushdown:
+            return None
+        try:
+            return DatabaseManager.get_telematics_aggregates(group_by, **self._database_filters(self.source_filters))
+        except Exception as e:
+            print(f"Agregação na base indisponível, usando o DataFrame: {str(e)}")
+            return None
+    
+    @_memoized
+    def get_vehicle_aggregates(self):
+        """Agregados por placa com as colunas de get_aggregates('placa'); do DataFrame se a base não responder"""
+        vehicles = self.get_aggregates('placa')
+        if vehicles is not None:
+            return vehicles
+        df = self.filtered_df
+        vehicles = df.groupby('placa', observed=True).agg(
+            registros=('velocidade_km', 'size'),
+            velocidade_amostras=('velocidade_km', 'count'),
+            velocidade_media=('velocidade_km', 'mean'),
+            velocidade_maxima=('velocidade_km', 'max'),
+            km=('odometro_periodo_km', 'sum'),
+            gps=('gps', 'mean'),
+            bloqueados=('bloqueado', 'sum')
+        )
+        vehicles['km'] = vehicles['km'].astype('float64')
+        vehicles['algum_bloqueado'] = vehicles['bloqueados'] > 0
+        return vehicles.reset_index()
     
+    @_memoized
     def get_kpis(self):
         """Calcula KPIs principais"""
+        totals = self.get_aggregates()
+        if totals is not None:
+            if totals.empty or totals['registros'].iloc[0] == 0:
+                return {}
+            row = totals.iloc[0]
+            return {
+                'total_veiculos': int(row['veiculos']),
+                'total_registros': int(row['registros']),
+                'velocidade_media': float(row['velocidade_media']),
+                'velocidade_maxima': float(row['velocidade_maxima']),
+                'distancia_total': float(row['km']),
+                'tempo_ativo_horas': float(row['horimetro_segundos'] / 3600.0),
+                'cobertura_gps': float(row['gps'] * 100),
+                'veiculos_bloqueados': int(row['bloqueados']),
+                'periodo_dias': int((row['fim'] - row['inicio']).days + 1)
+            }
+        
         if self.filtered_df.empty:
             return {}
         
-        df = self.filtered_df
+        return self._frame_kpis(self.filtered_df)
+    
+    @staticmethod
+    def _count_distinct(series):
+        """Valores distintos presentes; em colunas categóricas lidos dos códigos, sem hashing"""
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # O código -1 (nulo) marca a posição sentinela do fim, que não é contada
+            seen = np.zeros(len(series.cat.categories) + 1, dtype=bool)
+            seen[series.array.codes] = True
+            return int(np.count_nonzero(seen[:-1]))
+        return int(series.nunique())
+    
+    @staticmethod
+    def _span_days(series):
+        """Dias cobertos por uma coluna datetime, com mínimo e máximo reduzidos sobre os inteiros subjacentes"""
+        if pd.api.types.is_datetime64_any_dtype(series):
+            ticks = series.array.asi8
+            first = ticks.min()
+            # NaT é o menor int64: com nulos, usar a redução do pandas que os ignora
+            if first != pd.NaT.value:
+                unit = getattr(series.dtype, 'unit', None) or np.datetime_data(series.dtype)[0]
+                return int(pd.Timedelta(int(ticks.max() - first), unit=unit).days + 1)
+        return int((series.max() - series.min()).days + 1)
+    
+    def _frame_kpis(self, df):
+        """Todos os KPIs do DataFrame, cada redução feita uma única vez sobre os arrays das colunas"""
+        records = len(df)
+        speed = df['velocidade_km']
         
-        kpis = {
-            'total_veiculos': int(df['placa'].nunique()),
-            'total_registros': int(len(df)),
-            'velocidade_media': float(df['velocidade_km'].mean()),
-            'velocidade_maxima': float(df['velocidade_km'].max()),
+        return {
+            'total_veiculos': self._count_distinct(df['placa']),
+            'total_registros': int(records),
+            'velocidade_media': float(speed.mean()),
+            'velocidade_maxima': float(speed.max()),
             'distancia_total': float(df['odometro_periodo_km'].sum()),
             'tempo_ativo_horas': self._calculate_total_hours(df['engine_hours_period']) if 'engine_hours_period' in df.columns else 0.0,
-            'cobertura_gps': float((df['gps'].sum() / len(df)) * 100),
+            'cobertura_gps': float((df['gps'].sum() / records) * 100),
             'veiculos_bloqueados': int(df['bloqueado'].sum()),
-            'periodo_dias': int((df['data'].max() - df['data'].min()).days + 1) if len(df) > 0 else 0
+            'periodo_dias': self._span_days(df['data'])
         }
-        
-        return kpis
     
+    @_memoized
     def get_speed_analysis(self):
         """Análise de velocidade"""
+        # Qualquer agregação que falhe na base (None) faz a análise inteira vir do DataFrame
+        bands = self.get_aggregates('faixa_velocidade')
+        vehicles = self.get_aggregates('placa') if bands is not None else None
+        hours = self.get_aggregates('hora') if vehicles is not None else None
+        if hours is not None:
+            if bands.empty:
+                return {}
+            vehicles = vehicles.set_index('placa')
+            hours = hours.set_index('hora').rename_axis('data')
+            return {
+                'distribuicao': bands.set_index('faixa_velocidade')['registros'].rename('count').sort_values(ascending=False),
+                'velocidade_media_por_veiculo': vehicles['velocidade_media'].rename('velocidade_km').sort_values(ascending=False),
+                'velocidade_maxima_por_veiculo': vehicles['velocidade_maxima'].rename('velocidade_km').sort_values(ascending=False),
+                'velocidade_por_hora': hours['velocidade_media'].rename('velocidade_km')
+            }
+        
         df = self.filtered_df
         
         if df.empty:
@@ -176,129 +473,179 @@ class DataAnalyzer:
         ]
         choices = ['Parado', 'Baixa (1-40)', 'Moderada (41-60)', 'Alta (61-80)', 'Muito Alta (80+)']
         
-        df['faixa_velocidade'] = np.select(conditions, choices, default='Indefinido')
+        speed_bands = pd.Series(np.select(conditions, choices, default='Indefinido'), index=df.index, name='faixa_velocidade')
         
-        speed_dist = df['faixa_velocidade'].value_counts()
+        speed_dist = speed_bands.value_counts()
         
         return {
             'distribuicao': speed_dist,
-            'velocidade_media_por_veiculo': df.groupby('placa')['velocidade_km'].mean().sort_values(ascending=False),
-            'velocidade_maxima_por_veiculo': df.groupby('placa')['velocidade_km'].max().sort_values(ascending=False),
+            'velocidade_media_por_veiculo': df.groupby('placa', observed=True)['velocidade_km'].mean().sort_values(ascending=False),
+            'velocidade_maxima_por_veiculo': df.groupby('placa', observed=True)['velocidade_km'].max().sort_values(ascending=False),
             'velocidade_por_hora': df.groupby(df['data'].dt.hour)['velocidade_km'].mean()
         }
     
+    @_memoized
     def get_operational_analysis(self):
         """Análise operacional"""
-        df = self.filtered_df
-        
-        if df.empty:
-            return {}
-        
-        # Análise por veículo
-        agg_dict = {
-            'velocidade_km': ['mean', 'max', 'count'],
-            'odometro_periodo_km': 'sum',
-            'gps': 'mean',
-            'bloqueado': 'any'
-        }
-        
-        # Adicionar engine_hours_period apenas se existir na coluna
-        if 'engine_hours_period' in df.columns:
-            agg_dict['engine_hours_period'] = 'sum'
-        
-        vehicle_stats = df.groupby('placa').agg(agg_dict).round(2)
-        
-        # Achatamento do MultiIndex
-        vehicle_stats.columns = ['_'.join(col) for col in vehicle_stats.columns]
-        vehicle_stats = vehicle_stats.reset_index()
-        
-        # Análise temporal
-        daily_stats = df.groupby(df['data'].dt.date).agg({
-            'placa': 'nunique',
-            'velocidade_km': 'mean',
-            'odometro_periodo_km': 'sum'
-        }).reset_index()
+        vehicles = self.get_aggregates('placa')
+        if vehicles is not None:
+            if vehicles.empty:
+                return {}
+            # Mesmas colunas do groupby/agg achatado abaixo
+            vehicle_stats = pd.DataFrame({
+                'placa': vehicles['placa'],
+                'velocidade_km_mean': vehicles['velocidade_media'],
+                'velocidade_km_max': vehicles['velocidade_maxima'],
+                'velocidade_km_count': vehicles['velocidade_amostras'],
+                'odometro_periodo_km_sum': vehicles['km'],
+                'gps_mean': vehicles['gps'],
+                'bloqueado_any': vehicles['algum_bloqueado'].astype(bool),
+                'engine_hours_period_sum': vehicles['horimetro_segundos']
+            }).round(2)
+        else:
+            df = self.filtered_df
+            
+            if df.empty:
+                return {}
+            
+            # Análise por veículo
+            agg_dict = {
+                'velocidade_km': ['mean', 'max', 'count'],
+                'odometro_periodo_km': 'sum',
+                'gps': 'mean',
+                'bloqueado': 'any'
+            }
+            
+            # Adicionar engine_hours_period apenas se existir na coluna
+            if 'engine_hours_period' in df.columns:
+                agg_dict['engine_hours_period'] = 'sum'
+            
+            vehicle_stats = df.groupby('placa', observed=True).agg(agg_dict).round(2)
+            
+            # Achatamento do MultiIndex
+            vehicle_stats.columns = ['_'.join(col) for col in vehicle_stats.columns]
+            vehicle_stats = vehicle_stats.reset_index()
+        
+        # Análise temporal e quilometragem: rollups diários/horários quando os dados vêm da base
+        daily_profile = self.get_activity_profile('data')
+        hourly_profile = self.get_activity_profile('hora')
+        vehicle_profile = self.get_activity_profile('placa')
+        
+        if daily_profile is not None:
+            daily_stats = daily_profile[['data', 'placa', 'velocidade_km', 'odometro_periodo_km']]
+        else:
+            daily_stats = self.filtered_df.groupby(self.filtered_df['data'].dt.date).agg({
+                'placa': 'nunique',
+                'velocidade_km': 'mean',
+                'odometro_periodo_km': 'sum'
+            }).reset_index()
         
         # Análise de utilização por hora
-        hourly_usage = df.groupby(df['data'].dt.hour).agg({
-            'placa': 'nunique',
-            'velocidade_km': 'mean'
-        }).reset_index()
+        if hourly_profile is not None:
+            hourly_usage = hourly_profile.rename(columns={'hora': 'data'})[['data', 'placa', 'velocidade_km']]
+        else:
+            hourly_usage = self.filtered_df.groupby(self.filtered_df['data'].dt.hour).agg({
+                'placa': 'nunique',
+                'velocidade_km': 'mean'
+            }).reset_index()
+        
+        if vehicle_profile is not None:
+            total_km = vehicle_profile.set_index('placa')['odometro_periodo_km']
+        else:
+            total_km = self.filtered_df.groupby('placa', observed=True)['odometro_periodo_km'].sum()
         
         return {
             'estatisticas_por_veiculo': vehicle_stats,
             'estatisticas_diarias': daily_stats,
             'utilizacao_por_hora': hourly_usage,
-            'total_km_por_veiculo': df.groupby('placa')['odometro_periodo_km'].sum().sort_values(ascending=False)
+            'total_km_por_veiculo': total_km.sort_values(ascending=False)
         }
     
-    def get_compliance_analysis(self):
-        """Análise de compliance/conformidade"""
+    # Colunas de get_vehicle_stats, presentes mesmo quando nenhum registro passa nos filtros
+    VEHICLE_STATS_COLUMNS = ['total_registros', 'velocidade_media', 'velocidade_maxima', 'distancia_total',
+                             'cobertura_gps', 'bloqueios', 'inicio', 'fim',
+                             'violacoes_velocidade', 'registros_parado', 'tempo_ativo']
+    
+    @_memoized
+    def get_vehicle_stats(self):
+        """Estatísticas por veículo em uma única agregação, base do compliance, da eficiência e da comparação"""
         df = self.filtered_df
         
         if df.empty:
-            return {}
+            return pd.DataFrame(columns=self.VEHICLE_STATS_COLUMNS, index=pd.Index([], name='placa'))
+        
+        vehicle_stats = df.groupby('placa', observed=True).agg(
+            total_registros=('velocidade_km', 'size'),
+            velocidade_media=('velocidade_km', 'mean'),
+            velocidade_maxima=('velocidade_km', 'max'),
+            distancia_total=('odometro_periodo_km', 'sum'),
+            cobertura_gps=('gps', 'mean'),
+            bloqueios=('bloqueado', 'sum'),
+            inicio=('data', 'min'),
+            fim=('data', 'max')
+        )
+        vehicle_stats['cobertura_gps'] *= 100
+        
+        # Contagens derivadas somadas num único groupby auxiliar (uma fatoração das placas)
+        speed = df['velocidade_km']
+        derived = {
+            'violacoes_velocidade': speed > self.SPEED_LIMIT,
+            'registros_parado': speed == 0
+        }
+        if 'engine_hours_period' in df.columns:
+            seconds = df['engine_hours_period']
+            derived['tempo_ativo'] = seconds if pd.api.types.is_numeric_dtype(seconds) else TelematicsNormalizer.to_seconds(seconds)
+        sums = pd.DataFrame(derived).groupby(df['placa'], observed=True).sum()
         
-        # Definir limites de compliance
-        SPEED_LIMIT = 80  # km/h
-        MIN_GPS_COVERAGE = 95  # %
+        vehicle_stats['violacoes_velocidade'] = sums['violacoes_velocidade']
+        vehicle_stats['registros_parado'] = sums['registros_parado']
+        vehicle_stats['tempo_ativo'] = sums['tempo_ativo'] / 3600.0 if 'tempo_ativo' in sums else 0.0
         
-        # Análise de excesso de velocidade
-        speed_violations = df[df['velocidade_km'] > SPEED_LIMIT]
+        return vehicle_stats
+    
+    @_memoized
+    def get_compliance_analysis(self, vehicle_stats=None):
+        """Análise de compliance/conformidade"""
+        if vehicle_stats is None:
+            vehicle_stats = self.get_vehicle_stats()
         
-        # Análise de cobertura GPS
-        gps_coverage_by_vehicle = df.groupby('placa')['gps'].mean() * 100
-        low_gps_vehicles = gps_coverage_by_vehicle[gps_coverage_by_vehicle < MIN_GPS_COVERAGE]
+        if vehicle_stats.empty:
+            return {}
         
-        # Veículos com problemas
-        blocked_vehicles = df[df['bloqueado'] == True]['placa'].unique()
+        violations = vehicle_stats['violacoes_velocidade']
+        gps_coverage_by_vehicle = vehicle_stats['cobertura_gps'].rename('gps')
+        low_gps_vehicles = gps_coverage_by_vehicle[gps_coverage_by_vehicle < self.MIN_GPS_COVERAGE]
         
-        # Score de compliance por veículo
-        compliance_scores = {}
-        for placa in df['placa'].unique():
-            vehicle_data = df[df['placa'] == placa]
-            
-            # Pontuação baseada em critérios
-            speed_score = 100 - (len(vehicle_data[vehicle_data['velocidade_km'] > SPEED_LIMIT]) / len(vehicle_data)) * 100
-            gps_score = (vehicle_data['gps'].mean() * 100)
-            block_score = 100 if not vehicle_data['bloqueado'].any() else 0
-            
-            overall_score = (speed_score * 0.4 + gps_score * 0.4 + block_score * 0.2)
-            compliance_scores[placa] = round(overall_score, 2)
+        # Score de compliance por veículo: velocidade 40%, GPS 40%, bloqueio 20%
+        speed_score = 100 - (violations / vehicle_stats['total_registros']) * 100
+        block_score = (vehicle_stats['bloqueios'] == 0) * 100
+        compliance_scores = (speed_score * 0.4 + gps_coverage_by_vehicle * 0.4 + block_score * 0.2).round(2)
         
         return {
-            'violacoes_velocidade': len(speed_violations),
+            'violacoes_velocidade': int(violations.sum()),
             'veiculos_baixo_gps': len(low_gps_vehicles),
-            'veiculos_bloqueados': len(blocked_vehicles),
-            'score_compliance': compliance_scores,
-            'detalhes_violacoes': speed_violations.groupby('placa').size().sort_values(ascending=False),
+            'veiculos_bloqueados': int((vehicle_stats['bloqueios'] > 0).sum()),
+            'score_compliance': compliance_scores.to_dict(),
+            'detalhes_violacoes': violations[violations > 0].rename(None).sort_values(ascending=False),
             'cobertura_gps_por_veiculo': gps_coverage_by_vehicle.sort_values(ascending=True)
         }
     
-    def compare_vehicles(self, placas_list):
+    def compare_vehicles(self, placas_list, vehicle_stats=None):
         """Compara múltiplos veículos"""
         if not placas_list or len(placas_list) < 2:
             return {}
         
-        comparison_data = {}
+        if vehicle_stats is None:
+            vehicle_stats = self.get_vehicle_stats()
         
-        for placa in placas_list:
-            vehicle_data = self.filtered_df[self.filtered_df['placa'] == placa]
-            
-            if not vehicle_data.empty:
-                comparison_data[placa] = {
-                    'total_registros': len(vehicle_data),
-                    'velocidade_media': vehicle_data['velocidade_km'].mean(),
-                    'velocidade_maxima': vehicle_data['velocidade_km'].max(),
-                    'distancia_total': vehicle_data['odometro_periodo_km'].sum(),
-                    'tempo_ativo': vehicle_data['engine_hours_period'].sum() if 'engine_hours_period' in vehicle_data.columns else 0,
-                    'cobertura_gps': (vehicle_data['gps'].mean() * 100),
-                    'violacoes_velocidade': len(vehicle_data[vehicle_data['velocidade_km'] > 80]),
-                    'bloqueios': vehicle_data['bloqueado'].sum()
-                }
-        
-        return comparison_data
+        placas = [placa for placa in placas_list if placa in vehicle_stats.index]
+        if vehicle_stats.empty or len(placas) < 2:
+            return {}
+        columns = ['total_registros', 'velocidade_media', 'velocidade_maxima', 'distancia_total',
+                   'tempo_ativo', 'cobertura_gps', 'violacoes_velocidade', 'bloqueios']
+        return vehicle_stats.loc[placas, columns].to_dict('index')
     
+    @_memoized
     def get_temporal_patterns(self):
         """Análise de padrões temporais"""
         df = self.filtered_df
@@ -306,27 +653,44 @@ class DataAnalyzer:
         if df.empty:
             return {}
         
+        columns = ['velocidade_km', 'placa', 'odometro_periodo_km']
+        weekly_profile = self.get_activity_profile('dia_semana')
+        hourly_profile = self.get_activity_profile('hora')
+        monthly_profile = self.get_activity_profile('mes')
+        
         # Padrões por dia da semana
-        df['dia_semana'] = df['data'].dt.day_name()
-        weekly_patterns = df.groupby('dia_semana').agg({
-            'velocidade_km': 'mean',
-            'placa': 'nunique',
-            'odometro_periodo_km': 'sum'
-        })
+        if weekly_profile is not None:
+            weekly_profile['dia_semana'] = weekly_profile['dia_semana'].map(self.ISO_WEEKDAYS)
+            weekly_patterns = weekly_profile.set_index('dia_semana')[columns].sort_index()
+        else:
+            weekly_patterns = df.groupby(df['data'].dt.day_name().rename('dia_semana')).agg({
+                'velocidade_km': 'mean',
+                'placa': 'nunique',
+                'odometro_periodo_km': 'sum'
+            })
         
         # Padrões por hora do dia
-        hourly_patterns = df.groupby(df['data'].dt.hour).agg({
-            'velocidade_km': 'mean',
-            'placa': 'nunique',
-            'odometro_periodo_km': 'sum'
-        })
+        if hourly_profile is not None:
+            hourly_patterns = hourly_profile.set_index('hora')[columns].rename_axis('data')
+        else:
+            hourly_patterns = df.groupby(df['data'].dt.hour).agg({
+                'velocidade_km': 'mean',
+                'placa': 'nunique',
+                'odometro_periodo_km': 'sum'
+            })
         
         # Padrões mensais - usando year+month para evitar warning de timezone
-        monthly_patterns = df.groupby([df['data'].dt.year, df['data'].dt.month]).agg({
-            'velocidade_km': 'mean',
-            'placa': 'nunique',
-            'odometro_periodo_km': 'sum'
-        })
+        if monthly_profile is not None:
+            months = monthly_profile['mes']
+            monthly_patterns = monthly_profile[columns].set_index(
+                pd.MultiIndex.from_arrays([months.dt.year, months.dt.month], names=['data', 'data'])
+            )
+        else:
+            monthly_patterns = df.groupby([df['data'].dt.year, df['data'].dt.month]).agg({
+                'velocidade_km': 'mean',
+                'placa': 'nunique',
+                'odometro_periodo_km': 'sum'
+            })
         
         return {
             'padroes_semanais': weekly_patterns,
@@ -334,25 +698,29 @@ class DataAnalyzer:
             'padroes_mensais': monthly_patterns
         }
     
-    def get_efficiency_metrics(self):
+    @_memoized
+    def get_efficiency_metrics(self, vehicle_stats=None):
         """Métricas de eficiência"""
-        df = self.filtered_df
+        if vehicle_stats is None:
+            vehicle_stats = self.get_vehicle_stats()
         
-        if df.empty:
+        if vehicle_stats.empty:
             return {}
         
-        # Eficiência por veículo
-        vehicle_efficiency = df.groupby('placa').apply(
-            lambda x: {
-                'km_por_dia': x['odometro_periodo_km'].sum() / max(1, (x['data'].max() - x['data'].min()).days + 1),
-                'utilizacao_diaria': len(x) / max(1, (x['data'].max() - x['data'].min()).days + 1),
-                'velocidade_media': x['velocidade_km'].mean(),
-                'tempo_parado_pct': (len(x[x['velocidade_km'] == 0]) / len(x)) * 100
-            }
-        )
+        # Eficiência por veículo, uma linha por placa
+        days = ((vehicle_stats['fim'] - vehicle_stats['inicio']).dt.days + 1).clip(lower=1)
+        vehicle_efficiency = pd.DataFrame({
+            'total_registros': vehicle_stats['total_registros'],
+            'distancia_total': vehicle_stats['distancia_total'].astype('float64'),
+            'velocidade_media': vehicle_stats['velocidade_media'].astype('float64'),
+            'cobertura_gps': vehicle_stats['cobertura_gps'],
+            'km_por_dia': vehicle_stats['distancia_total'] / days,
+            'utilizacao_diaria': vehicle_stats['total_registros'] / days,
+            'tempo_parado_pct': vehicle_stats['registros_parado'] / vehicle_stats['total_registros'] * 100
+        })
         
         return {
             'eficiencia_por_veiculo': vehicle_efficiency,
-            'top_veiculos_km': df.groupby('placa')['odometro_periodo_km'].sum().sort_values(ascending=False).head(10),
-            'veiculos_mais_utilizados': df.groupby('placa').size().sort_values(ascending=False).head(10)
+            'top_veiculos_km': vehicle_stats['distancia_total'].rename('odometro_periodo_km').sort_values(ascending=False).head(10),
+            'veiculos_mais_utilizados': vehicle_stats['total_registros'].rename(None).sort_values(ascending=False).head(10)
         }
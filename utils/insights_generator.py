@@ -232,7 +232,7 @@ class InsightsGenerator:
         if 'engine_hours_period' in df.columns:
             agg_map['engine_hours_period'] = 'sum'
         
-        vehicle_usage = df.groupby('placa').agg(agg_map)
+        vehicle_usage = df.groupby('placa', observed=True).agg(agg_map)
         
         for placa, data in vehicle_usage.iterrows():
             total_km = data['odometro_periodo_km']
@@ -61,11 +61,11 @@ class PredictiveMaintenanceAnalyzer:
         try:
             features_data = []
             
-            # Converter campos numéricos primeiro
+            # Campos já chegam numéricos da base (horímetro em segundos, bateria em %)
             numeric_columns = ['velocidade_km', 'battery_level', 'tensao', 'odometro_periodo_km', 'engine_hours_period']
             for col in numeric_columns:
                 if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+                    df[col] = df[col].astype('float64').fillna(0)
             
             # Agrupar por hora para análise temporal
             df_hourly = df.groupby(df['data'].dt.floor('H')).agg({
@@ -5,15 +5,16 @@ Gerenciador de dados mensais - preparado para uploads recorrentes
 import os
 import pandas as pd
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from database.db_manager import DatabaseManager
+from database.parallel_ingestion import ParallelIngestor
 
 class MonthlyDataManager:
     """Gerencia uploads de dados mensais com a mesma estrutura"""
     
     @staticmethod
-    def process_monthly_upload(csv_files: List[str]) -> Dict[str, Any]:
-        """Processa upload mensal de múltiplos arquivos CSV"""
+    def process_monthly_upload(csv_files: List[str], workers: Optional[int] = None) -> Dict[str, Any]:
+        """Processa upload mensal de múltiplos arquivos CSV em paralelo"""
         results = {
             'success': True,
             'processed_files': 0,
@@ -22,24 +23,21 @@ class MonthlyDataManager:
             'errors': []
         }
         
+        sources = []
         for csv_file in csv_files:
-            try:
-                if not os.path.exists(csv_file):
-                    results['errors'].append(f"Arquivo não encontrado: {csv_file}")
-                    continue
-                
-                # Processar arquivo
-                result = DatabaseManager.migrate_csv_to_database(csv_file)
-                
-                if result['success']:
-                    results['processed_files'] += 1
-                    results['total_records'] += result.get('records_processed', 0)
-                    results['new_vehicles'] += result.get('unique_vehicles', 0)
-                else:
-                    results['errors'].append(f"{os.path.basename(csv_file)}: {result.get('error', 'Erro desconhecido')}")
-                    
-            except Exception as e:
-                results['errors'].append(f"{os.path.basename(csv_file)}: {str(e)}")
+            if not os.path.exists(csv_file):
+                results['errors'].append(f"Arquivo não encontrado: {csv_file}")
+                continue
+            sources.append((os.path.basename(csv_file), csv_file, os.path.getsize(csv_file)))
+        
+        # Cada arquivo é independente: parsing em processos separados, escrita com conexões limitadas
+        for result in ParallelIngestor(workers=workers).run(sources):
+            if result['success']:
+                results['processed_files'] += 1
+                results['total_records'] += result.get('records_processed', 0)
+                results['new_vehicles'] += result.get('unique_vehicles', 0)
+            else:
+                results['errors'].append(f"{result['filename']}: {result.get('error', 'Erro desconhecido')}")
         
         # Se houve erros mas alguns sucessos, ainda é parcialmente bem-sucedido
         if results['errors'] and results['processed_files'] == 0:
@@ -52,23 +50,22 @@ class MonthlyDataManager:
         """Resumo dos dados mensais na base"""
         summary = DatabaseManager.get_fleet_summary()
         
-        # Adicionar informações específicas mensais
-        df = DatabaseManager.get_dashboard_data()
+        # Adicionar informações específicas mensais, dos rollups diários
+        monthly = DatabaseManager.get_activity_profile('mes')
         
-        if not df.empty:
-            # Análise temporal
-            df['mes'] = df['data'].dt.to_period('M')
-            monthly_data = df.groupby('mes').agg({
-                'placa': 'nunique',
-                'velocidade_km': 'mean',
-                'data': 'count'
-            }).reset_index()
+        if not monthly.empty and summary.get('start_date') is not None:
+            monthly_data = pd.DataFrame({
+                'mes': monthly['mes'].dt.tz_localize(None).dt.to_period('M'),
+                'placa': monthly['veiculos'],
+                'velocidade_km': monthly['velocidade_media'],
+                'data': monthly['registros']
+            })
             
             summary['monthly_breakdown'] = monthly_data.to_dict('records')
             summary['data_period'] = {
-                'start': df['data'].min().strftime('%d/%m/%Y'),
-                'end': df['data'].max().strftime('%d/%m/%Y'),
-                'days': (df['data'].max() - df['data'].min()).days
+                'start': summary['start_date'].strftime('%d/%m/%Y'),
+                'end': summary['end_date'].strftime('%d/%m/%Y'),
+                'days': (summary['end_date'] - summary['start_date']).days
             }
         
         return summary
@@ -419,7 +419,7 @@ class PDFReportGenerator:
             # 3. ANÁLISE POR CLIENTE
             self.add_header('3. ANÁLISE POR CLIENTE')
             
-            client_stats = filtered_df.groupby('cliente').agg({
+            client_stats = filtered_df.groupby('cliente', observed=True).agg({
                 'placa': 'nunique',
                 'velocidade_km': ['mean', 'max'],
                 'odometro_periodo_km': 'sum'
@@ -478,7 +478,7 @@ class PDFReportGenerator:
             # 5. ANÁLISE DETALHADA POR VEÍCULO
             self.add_header('5. ANÁLISE DETALHADA POR VEÍCULO')
             
-            vehicle_stats = filtered_df.groupby(['cliente', 'placa']).agg({
+            vehicle_stats = filtered_df.groupby(['cliente', 'placa'], observed=True).agg({
                 'velocidade_km': ['mean', 'max', 'std'],
                 'odometro_periodo_km': 'sum',
                 'data': 'count'
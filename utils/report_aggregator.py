@@ -186,7 +186,8 @@ class ReportDataAggregator:
         
         # Status de ignição
         if 'ignicao' in df.columns:
-            operational['ignition_stats'] = df['ignicao'].value_counts().to_dict()
+            # Coluna categórica: status sem registros aparecem com contagem zero
+            operational['ignition_stats'] = df['ignicao'].value_counts().loc[lambda counts: counts > 0].to_dict()
         
         # Status de bloqueio
         if 'bloqueado' in df.columns:
@@ -233,7 +234,7 @@ class ReportDataAggregator:
             
             # Piores veículos em compliance
             if not violations.empty:
-                vehicle_violations = violations.groupby('placa').size().reset_index(name='violations')
+                vehicle_violations = violations.groupby('placa', observed=True).size().reset_index(name='violations')
                 worst_vehicles = vehicle_violations.nlargest(5, 'violations')
                 compliance['worst_vehicles'] = worst_vehicles.to_dict('records')
             
@@ -28,7 +28,7 @@ class FleetVisualizations:
         charts = {}
         
         # Gráfico de velocidade média por veículo
-        speed_by_vehicle = self.analyzer.filtered_df.groupby('placa')['velocidade_km'].mean().sort_values(ascending=False)
+        speed_by_vehicle = self.analyzer.filtered_df.groupby('placa', observed=True)['velocidade_km'].mean().sort_values(ascending=False)
         
         speed_chart = px.bar(
             x=speed_by_vehicle.values[:15],  # Top 15